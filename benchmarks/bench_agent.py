@@ -0,0 +1,250 @@
+"""
+End-to-end benchmark of the agent loop with a scripted, deterministic model.
+
+Each task replays a fixed list of steps through `Session.run` with the
+chosen prompt profile, so the real loop, history, tools and tracing run while the model
+costs nothing (or a fixed simulated latency). Reported per task: turns,
+prompt bytes per turn, loop overhead per turn (wall time minus tool time
+minus model time), tool wall time and peak RSS. Results are printed and
+written to bench_output.txt at the repository root.
+
+    python benchmarks/bench_agent.py [--profile chat|chat2] [--no-stream] [--latency 0.0] [--turns 500]
+"""
+import argparse
+import contextlib
+import json
+import os
+import resource
+import sys
+import tempfile
+import time
+from types import SimpleNamespace
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from mini_cursor import tracing  # noqa: E402
+from mini_cursor.agent import Session  # noqa: E402
+from mini_cursor.profiles import PROFILES  # noqa: E402
+
+
+class ScriptedModel:
+    """
+    Stands in for the OpenAI client: every create() returns the next step of
+    the script, as a completion or as a stream of small chunks.
+    """
+
+    def __init__(self, steps, latency=0.0, chunk_size=64):
+        self.steps = [json.dumps(step) for step in steps]
+        self.latency = latency
+        self.chunk_size = chunk_size
+        self.calls = 0
+        self.prompt_bytes = []
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self.create))
+
+    def create(self, messages, model, stream=False, **params):
+        self.prompt_bytes.append(len(json.dumps(messages, ensure_ascii=False).encode("utf-8")))
+        content = self.steps[min(self.calls, len(self.steps) - 1)]
+        self.calls += 1
+        if self.latency:
+            time.sleep(self.latency)
+        if not stream:
+            message = SimpleNamespace(role="assistant", content=content, tool_calls=None)
+            return SimpleNamespace(choices=[SimpleNamespace(index=0, message=message)], usage=None)
+        return _Stream(content, self.chunk_size)
+
+
+class _Stream:
+    def __init__(self, content, chunk_size):
+        self.content = content
+        self.chunk_size = chunk_size
+
+    def __iter__(self):
+        for i in range(0, len(self.content), self.chunk_size):
+            delta = SimpleNamespace(content=self.content[i:i + self.chunk_size])
+            yield SimpleNamespace(choices=[SimpleNamespace(index=0, delta=delta)], usage=None)
+
+    def close(self):
+        pass
+
+
+def action(function, tool_input):
+    return {"step": "action", "function": function, "input": tool_input}
+
+
+def batch(*calls):
+    return {"step": "action", "calls": [dict(c, parallel=True) for c in calls]}
+
+
+def write(path, content):
+    return {"function": "write_file", "input": {"path": path, "content": content}}
+
+
+def vite_scaffold():
+    return [
+        {"step": "plan", "content": "Create a Vite + React app by hand and check the files."},
+        action("run_command", "mkdir -p vite-app/src vite-app/public"),
+        batch(
+            write("vite-app/package.json", json.dumps({
+                "name": "vite-app", "private": True, "type": "module",
+                "scripts": {"dev": "vite", "build": "vite build"},
+                "dependencies": {"react": "^18.3.1", "react-dom": "^18.3.1"},
+                "devDependencies": {"@vitejs/plugin-react": "^4.3.1", "vite": "^5.4.0"},
+            }, indent=2)),
+            write("vite-app/vite.config.js", "import { defineConfig } from 'vite'\nimport react from '@vitejs/plugin-react'\n\nexport default defineConfig({ plugins: [react()] })\n"),
+            write("vite-app/index.html", "<!doctype html>\n<html><body><div id=\"root\"></div><script type=\"module\" src=\"/src/main.jsx\"></script></body></html>\n"),
+            write("vite-app/src/main.jsx", "import React from 'react'\nimport ReactDOM from 'react-dom/client'\nimport App from './App.jsx'\n\nReactDOM.createRoot(document.getElementById('root')).render(<App />)\n"),
+            write("vite-app/src/App.jsx", "export default function App() {\n  return <h1>Hello Vite</h1>\n}\n"),
+            write("vite-app/src/App.css", "h1 { font-family: sans-serif; }\n"),
+        ),
+        {"step": "observe", "content": "Files are in place; listing them."},
+        action("list_tree", {"path": "vite-app", "depth": 3}),
+        action("edit_file", {"path": "vite-app/src/App.jsx", "edits": [
+            {"search": "  return <h1>Hello Vite</h1>\n", "replace": "  return <main><h1>Hello Vite</h1><p>Edit src/App.jsx</p></main>\n"},
+        ]}),
+        action("search_code", {"query": "createRoot", "path": "vite-app"}),
+        {"step": "output", "content": "The Vite app is ready in vite-app/."},
+    ]
+
+
+def express_server():
+    return [
+        {"step": "plan", "content": "Create an Express hello world server and start it."},
+        action("run_command", "mkdir -p express-app && cd express-app && printf '{\"name\":\"express-app\"}' > package.json"),
+        action("write_file", {"path": "express-app/index.js", "content": "const express = require('express');\nconst app = express();\napp.get('/', (req, res) => res.send('Hello World'));\napp.listen(3000, () => console.log('listening on 3000'));\n"}),
+        action("start_process", {"command": "sh -c 'sleep 0.2; echo listening on 3000; sleep 30'", "name": "express"}),
+        action("wait_for_process", {"name": "express", "pattern": "listening", "timeout": 10}),
+        action("tail_process", {"name": "express", "lines": 10}),
+        action("stop_process", "express"),
+        action("run_command", "cd .."),
+        {"step": "output", "content": "Server was running at http://localhost:3000."},
+    ]
+
+
+def todo_app():
+    js = "function addTask() {\n  const input = document.getElementById('taskInput');\n  if (!input.value.trim()) return;\n}\n"
+    return [
+        {"step": "plan", "content": "Write a plain HTML/CSS/JS ToDo app in one batch."},
+        batch(
+            write("todo-app/index.html", "<!DOCTYPE html>\n<html><body><input id=\"taskInput\"><ul id=\"taskList\"></ul><script src=\"script.js\"></script></body></html>\n"),
+            write("todo-app/style.css", "body { font-family: sans-serif; }\n.completed { text-decoration: line-through; }\n"),
+            write("todo-app/script.js", js),
+        ),
+        action("read_file", "todo-app/script.js"),
+        action("edit_file", {"path": "todo-app/script.js", "edits": [
+            {"search": "  if (!input.value.trim()) return;\n", "replace": "  if (!input.value.trim()) return;\n  const li = document.createElement('li');\n  li.textContent = input.value;\n  document.getElementById('taskList').appendChild(li);\n"},
+        ]}),
+        {"step": "output", "content": "Open todo-app/index.html to use the app."},
+    ]
+
+
+def huge_outputs():
+    return [
+        {"step": "plan", "content": "Produce very large command and file outputs."},
+        action("run_command", "seq 1 500000"),
+        action("run_command", "mkdir -p huge && seq 1 2000000 > huge/numbers.txt && wc -l huge/numbers.txt"),
+        action("read_file", "huge/numbers.txt"),
+        action("read_file", {"file_path": "huge/numbers.txt", "start_line": 1500000, "end_line": 1500200}),
+        action("run_command", "yes 'a fairly long line of build log output that repeats' | head -n 200000"),
+        action("search_code", {"query": "1999999", "path": "huge"}),
+        {"step": "output", "content": "Large outputs handled."},
+    ]
+
+
+def long_session(turns):
+    steps = [{"step": "plan", "content": "A long session of small reads, commands and edits."}]
+    action_cycle = [
+        lambda i: action("run_command", f"echo step {i}"),
+        lambda i: action("write_file", {"path": f"long/note_{i % 20}.txt", "content": f"note {i}\n" * 20}),
+        lambda i: action("read_file", {"file_path": f"long/note_{(i - 1) % 20}.txt"}),
+        lambda i: {"step": "observe", "content": f"Step {i} looks fine; continuing with the next change."},
+    ]
+    for i in range(turns - 2):
+        steps.append(action_cycle[i % len(action_cycle)](i))
+    steps.append({"step": "output", "content": "Long session finished."})
+    return steps
+
+
+def rss_mb():
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def run(profile, stream, name, steps, latency, trace_path):
+    model = ScriptedModel(steps, latency=latency)
+    session = Session(profile, client=model, stream=stream, protocol="json")
+    tracing.tracer.path = trace_path
+    if os.path.exists(trace_path):
+        os.remove(trace_path)
+
+    started = time.perf_counter()
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        session.run(f"benchmark task: {name}")
+    wall = time.perf_counter() - started
+
+    records = tracing.load([trace_path])
+    tool_time = tracing.tool_wall(records)
+    turns = model.calls
+    prompts = model.prompt_bytes
+    overhead = (wall - tool_time - latency * turns) / turns
+    return {
+        "task": name,
+        "turns": turns,
+        "prompt_p50_kb": tracing.percentile(prompts, 50) / 1024,
+        "prompt_max_kb": max(prompts) / 1024,
+        "prompt_last_kb": prompts[-1] / 1024,
+        "overhead_ms": overhead * 1000,
+        "tool_s": tool_time,
+        "wall_s": wall,
+        "peak_rss_mb": rss_mb(),
+        "history_tokens": session.history.tokens(),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the agent loop with a scripted model.")
+    parser.add_argument("--profile", default="chat", choices=sorted(PROFILES))
+    parser.add_argument("--no-stream", action="store_true", help="use non-streaming completions")
+    parser.add_argument("--latency", type=float, default=0.0, help="simulated model latency per turn (seconds)")
+    parser.add_argument("--turns", type=int, default=500, help="length of the long session")
+    parser.add_argument("--output", default=os.path.join(ROOT, "bench_output.txt"))
+    args = parser.parse_args()
+
+    os.environ.setdefault("GEMINI_API_KEY", "bench")
+    workspace = tempfile.mkdtemp(prefix="agent-bench-")
+    os.chdir(workspace)
+    trace_path = os.path.join(workspace, ".trace.jsonl")
+
+    tasks = [
+        ("vite_scaffold", vite_scaffold()),
+        ("express_server", express_server()),
+        ("todo_app", todo_app()),
+        ("huge_outputs", huge_outputs()),
+        (f"long_session_{args.turns}", long_session(args.turns)),
+    ]
+    rss_before = rss_mb()
+    results = [run(args.profile, not args.no_stream, name, steps, args.latency, trace_path) for name, steps in tasks]
+
+    header = (
+        f"{'task':<20} {'turns':>5} {'prompt p50':>11} {'prompt max':>11} {'last':>9} "
+        f"{'overhead/turn':>14} {'tools':>8} {'wall':>8} {'peak RSS':>9} {'hist tok':>9}"
+    )
+    lines = [
+        f"agent loop benchmark: {args.profile} profile, {'non-streaming' if args.no_stream else 'streaming'}, "
+        f"simulated model latency {args.latency:.3f}s, python {sys.version.split()[0]}",
+        f"RSS before tasks: {rss_before:.0f} MB",
+        header,
+    ]
+    for r in results:
+        lines.append(
+            f"{r['task']:<20} {r['turns']:>5} {r['prompt_p50_kb']:>8.1f} KB {r['prompt_max_kb']:>8.1f} KB "
+            f"{r['prompt_last_kb']:>6.1f} KB {r['overhead_ms']:>11.2f} ms {r['tool_s']:>7.2f}s "
+            f"{r['wall_s']:>7.2f}s {r['peak_rss_mb']:>6.0f} MB {r['history_tokens']:>9}"
+        )
+    report = "\n".join(lines)
+    print(report)
+    with open(args.output, "w", encoding="utf-8") as f:
+        f.write(report + "\n")
+
+
+if __name__ == "__main__":
+    main()
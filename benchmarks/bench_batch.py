@@ -0,0 +1,72 @@
+"""
+Scaffolding benchmark: writes a 15-file project one action per model turn
+and again as a single batch action, and reports the round trips saved.
+Model latency is simulated (no network) so only the loop-side cost is real.
+
+    python benchmarks/bench_batch.py [model_latency_seconds]
+"""
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from mini_cursor.batch import call_tool, run_batch  # noqa: E402
+
+
+FILES = [
+    "package.json", "vite.config.js", "index.html", "README.md", ".gitignore",
+    "src/main.jsx", "src/App.jsx", "src/App.css", "src/index.css",
+    "src/components/Header.jsx", "src/components/TodoList.jsx", "src/components/TodoItem.jsx",
+    "src/hooks/useTodos.js", "src/api/client.js", "public/robots.txt",
+]
+
+
+def write_file(path, content):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(content)
+    return f"{path} created and code written successfully."
+
+
+TOOLS = {"write_file": {"fn": write_file}}
+
+
+def calls_for(root):
+    return [
+        {
+            "function": "write_file",
+            "parallel": True,
+            "input": {"path": os.path.join(root, name), "content": f"// {name}\n" + "x = 1;\n" * 200},
+        }
+        for name in FILES
+    ]
+
+
+def main():
+    latency = float(sys.argv[1]) if len(sys.argv) > 1 else 1.0
+    with tempfile.TemporaryDirectory() as tmp:
+        calls = calls_for(os.path.join(tmp, "one-by-one"))
+        started = time.perf_counter()
+        for call in calls:
+            call_tool(TOOLS, call["function"], call["input"])
+        sequential_tools = time.perf_counter() - started
+        sequential_trips = len(calls) + 1  # one action per file, then the final answer
+
+        calls = calls_for(os.path.join(tmp, "batched"))
+        started = time.perf_counter()
+        run_batch(calls, TOOLS)
+        batch_tools = time.perf_counter() - started
+        batch_trips = 2  # one batch action, then the final answer
+
+    print(f"files: {len(FILES)}, simulated model latency: {latency:.2f}s per round trip")
+    print(f"one action per turn: {sequential_trips:3d} round trips, tools {sequential_tools * 1000:6.1f} ms, "
+          f"est. total {sequential_trips * latency + sequential_tools:6.2f}s")
+    print(f"single batch action: {batch_trips:3d} round trips, tools {batch_tools * 1000:6.1f} ms, "
+          f"est. total {batch_trips * latency + batch_tools:6.2f}s")
+    print(f"round trips saved: {sequential_trips - batch_trips}")
+
+
+if __name__ == "__main__":
+    main()
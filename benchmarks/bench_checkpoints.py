@@ -0,0 +1,109 @@
+"""
+Checkpoint cost on a large source tree: the first checkpoint (every
+file stored), one with nothing changed, one after editing a few files, a
+restore, and the disk used by the store against the tree itself. A full
+copy of the tree per checkpoint (shutil.copytree) is the baseline. A
+node_modules folder of the same size sits next to it and is skipped.
+
+    python benchmarks/bench_checkpoints.py [--files 30000] [--dirs 2000]
+"""
+import argparse
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from mini_cursor import checkpoints, workspace  # noqa: E402
+
+
+def make_tree(root, files, dirs, seed=3):
+    """A fake monorepo: many small JS files and some duplicated license files, under packages/ and node_modules/."""
+    rng = random.Random(seed)
+    folders = [os.path.join(root, top, f"pkg-{i // 8}", *(["lib"] if i % 8 else []), f"part{i % 8}")
+               for top in ("packages", "node_modules") for i in range(dirs)]
+    for folder in folders:
+        os.makedirs(folder, exist_ok=True)
+    os.makedirs(os.path.join(root, "src"), exist_ok=True)
+    license_text = "MIT License\n\nPermission is hereby granted, free of charge, ...\n" * 20
+    for i in range(files * 2):
+        folder = folders[i % len(folders)]
+        if i % 10 == 0:
+            path, text = os.path.join(folder, f"LICENSE{i}"), license_text
+        else:
+            size = int(rng.expovariate(1 / 4000)) + 64
+            path, text = os.path.join(folder, f"module{i}.js"), f"// module {i}\n" + "x = 1;\n" * (size // 7)
+        with open(path, "w") as f:
+            f.write(text)
+    for i in range(10):
+        with open(os.path.join(root, "src", f"App{i}.jsx"), "w") as f:
+            f.write(f"export default function App{i}() {{ return null; }}\n")
+
+
+def disk_usage(path):
+    total = 0
+    for directory, _, names in os.walk(path):
+        for name in names:
+            try:
+                total += os.lstat(os.path.join(directory, name)).st_blocks * 512
+            except OSError:
+                pass
+    return total
+
+
+def timed(fn, *args):
+    started = time.perf_counter()
+    result = fn(*args)
+    return time.perf_counter() - started, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark workspace checkpoints on a large tree.")
+    parser.add_argument("--files", type=int, default=30000)
+    parser.add_argument("--dirs", type=int, default=2000)
+    args = parser.parse_args()
+
+    root = tempfile.mkdtemp(prefix="agent-checkpoints-")
+    try:
+        make_tree(root, args.files, args.dirs)
+        skipped_bytes = disk_usage(os.path.join(root, "node_modules"))
+        tree_bytes = disk_usage(root) - skipped_bytes
+        print(f"tree: {args.files} files in {args.dirs} folders, {tree_bytes / 2**20:.0f} MB on disk, "
+              f"plus {skipped_bytes / 2**20:.0f} MB of node_modules (skipped)")
+
+        copy_seconds, _ = timed(shutil.copytree, os.path.join(root, "packages"), root + "-copy")
+        copy_bytes = disk_usage(root + "-copy")
+        shutil.rmtree(root + "-copy")
+
+        with workspace.activate(workspace.Workspace(root)):
+            store = checkpoints.get_store()
+            first_seconds, (first, _) = timed(store.create, "first")
+            same_seconds, (same, created) = timed(store.create, "unchanged", True)
+            for i in range(10):
+                with open(os.path.join(root, "src", f"App{i}.jsx"), "a") as f:
+                    f.write(f"// edit {i}\n")
+            edit_seconds, (edited, _) = timed(store.create, "after 10 edits")
+            store_bytes = disk_usage(store.path)
+            restore_seconds, (_, _, written, removed) = timed(store.restore, first["id"])
+            # A fresh store object has no parsed trees cached, as in a new process
+            cold = checkpoints.CheckpointStore(root)
+            cold_seconds, _ = timed(cold.create, "cold, unchanged", True)
+
+        print(f"  full copy per checkpoint     {copy_seconds:6.2f}s  +{copy_bytes / 2**20:6.1f} MB each")
+        print(f"  first checkpoint             {first_seconds:6.2f}s  +{first['new_bytes'] / 2**20:6.1f} MB")
+        print(f"  nothing changed              {same_seconds:6.2f}s  +{same['new_bytes'] / 2**10 if created else 0:6.1f} KB"
+              f"  ({'new checkpoint' if created else 'skipped, same tree'})")
+        print(f"  nothing changed, cold store  {cold_seconds:6.2f}s")
+        print(f"  10 files edited              {edit_seconds:6.2f}s  +{edited['new_bytes'] / 2**10:6.1f} KB")
+        print(f"  restore first checkpoint     {restore_seconds:6.2f}s  ({written} written, {removed} removed)")
+        print(f"  store after 2 checkpoints: {store_bytes / 2**20:.1f} MB for a {tree_bytes / 2**20:.1f} MB tree "
+              f"({store_bytes / tree_bytes:.2f}x; full copies: {2 * copy_bytes / tree_bytes:.2f}x)")
+    finally:
+        shutil.rmtree(root, True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+"""
+Time spent in run_command over an edit loop that re-runs the same install
+and inspection commands after every small change, with the command result
+cache on and off. The project has no dependencies, so `npm install` is as
+fast as it gets here; real installs take far longer per skipped run.
+
+    python benchmarks/bench_command_cache.py [--rounds 10]
+"""
+import argparse
+import contextlib
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from mini_cursor import command_cache, workspace  # noqa: E402
+from mini_cursor.command_cache import get_command_cache  # noqa: E402
+from mini_cursor.tools import run_command, write_file  # noqa: E402
+
+
+def session(rounds):
+    """One edit loop; returns seconds spent in run_command and the number of commands."""
+    commands = ["node -v", "npm -v"] if shutil.which("npm") else ["python --version"]
+    install = "npm install --offline --no-audit --no-fund" if shutil.which("npm") else "pip install -r requirements.txt"
+    spent, count = 0.0, 0
+    for i in range(rounds):
+        write_file(f"src/step{i}.js", f"export const step = {i};\n")
+        for command in [install, "ls", "cat package.json", "ls src"] + commands:
+            started = time.perf_counter()
+            run_command(command)
+            spent += time.perf_counter() - started
+            count += 1
+    return spent, count
+
+
+def run(rounds, enabled):
+    root = tempfile.mkdtemp(prefix="agent-command-cache-")
+    with open(os.path.join(root, "package.json"), "w") as f:
+        json.dump({"name": "bench-app", "version": "1.0.0", "private": True}, f)
+    with open(os.path.join(root, "requirements.txt"), "w") as f:
+        f.write("")
+    command_cache.ENABLED = enabled
+    ws = workspace.Workspace(root)
+    try:
+        with workspace.activate(ws), open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+            spent, count = session(rounds)
+            cache = get_command_cache()
+        return spent, count, cache.hits, cache.saved
+    finally:
+        ws.close()
+        shutil.rmtree(root, True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure run_command time saved by the command result cache.")
+    parser.add_argument("--rounds", type=int, default=10, help="edit rounds, each re-running the same commands")
+    args = parser.parse_args()
+
+    off, count, _, _ = run(args.rounds, enabled=False)
+    on, _, hits, saved = run(args.rounds, enabled=True)
+    print(f"{count} commands over {args.rounds} edit rounds")
+    print(f"  cache off  {off:7.2f}s in run_command")
+    print(f"  cache on   {on:7.2f}s in run_command  ({hits} cached answers, ~{saved:.2f}s of command time skipped)")
+    print(f"  speedup: {off / on:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+"""
+fix_errors over a large build log: the streaming rule engine (one pass,
+one combined matcher, fixed-size blocks) against the same rules applied
+the old way (the whole log read into one string and rescanned once per
+rule). Each mode runs in a fresh process so its peak RSS is its own.
+
+    python benchmarks/bench_fix_errors.py [--mb 200]
+"""
+import argparse
+import json
+import os
+import random
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from mini_cursor import error_rules  # noqa: E402
+
+NOISE = [
+    "  [built] ./src/components/Button{n}.jsx 1.2 KiB {{main}}",
+    "[{n}/2048] Compiling module src/features/feature_{n}.ts",
+    "npm WARN deprecated some-package@1.{n}.0: this version is no longer supported",
+    "INFO  [vite] hmr update /src/pages/Page{n}.jsx",
+    "    at Object.<anonymous> (/app/node_modules/lib/index.js:{n}:15)",
+    "Collecting package-{n}==1.0.{n}",
+]
+ERRORS = [
+    "Error: listen EADDRINUSE: address already in use :::{port}",
+    "ModuleNotFoundError: No module named 'pkg{n}'",
+    "Error: Cannot find module 'lib-{n}'",
+    "src/app.ts(10,5): error TS2322: Type 'string' is not assignable to type 'number'.",
+    "TypeError: Cannot read properties of undefined (reading 'map')",
+]
+
+
+def make_log(path, megabytes, seed=7):
+    rng = random.Random(seed)
+    target = megabytes * 1024 * 1024
+    written = 0
+    with open(path, "w", encoding="utf-8") as f:
+        while written < target:
+            lines = []
+            for _ in range(1000):
+                if rng.random() < 0.0005:
+                    line = rng.choice(ERRORS).format(n=rng.randint(1, 40), port=rng.choice((3000, 5173, 8000)))
+                else:
+                    line = rng.choice(NOISE).format(n=rng.randint(1, 9999))
+                lines.append(line)
+            chunk = "\n".join(lines) + "\n"
+            f.write(chunk)
+            written += len(chunk)
+
+
+def run_streaming(path):
+    with open(path, "r", encoding="utf-8", errors="replace") as f:
+        findings, _, _ = error_rules.get_rules().scan(f)
+    return len(findings)
+
+
+def run_materialized(path):
+    with open(path, "r", encoding="utf-8", errors="replace") as f:
+        log = f.read()
+    found = set()
+    for rule in error_rules.get_rules().rules:
+        for m in rule.regex.finditer(log):
+            found.add((rule.name, rule.suggestion.format_map(error_rules._Fields({**rule.defaults, **{
+                k: v for k, v in m.groupdict().items() if v}}))))
+    return len(found)
+
+
+def child(mode, path):
+    started = time.perf_counter()
+    findings = (run_streaming if mode == "streaming" else run_materialized)(path)
+    elapsed = time.perf_counter() - started
+    print(json.dumps({"seconds": elapsed, "findings": findings,
+                      "rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024}))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark fix_errors on a large log.")
+    parser.add_argument("--mb", type=int, default=200, help="log size in MB")
+    parser.add_argument("--child", nargs=2, metavar=("MODE", "PATH"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.child:
+        return child(*args.child)
+
+    fd, path = tempfile.mkstemp(prefix="agent-build-", suffix=".log")
+    os.close(fd)
+    try:
+        make_log(path, args.mb)
+        size = os.path.getsize(path) / (1024 * 1024)
+        print(f"{size:.0f} MB log, {len(error_rules.get_rules().rules)} rules")
+        for mode, label in (("materialized", "whole log, one pass per rule"), ("streaming", "streamed, one combined pass")):
+            out = subprocess.run([sys.executable, __file__, "--child", mode, path], capture_output=True, text=True,
+                                 check=True)
+            result = json.loads(out.stdout)
+            print(f"  {label:<30} {result['seconds']:6.2f}s  {size / result['seconds']:6.1f} MB/s  "
+                  f"peak RSS {result['rss_mb']:6.0f} MB  {result['findings']} distinct suggestions")
+    finally:
+        os.remove(path)
+
+
+if __name__ == "__main__":
+    main()
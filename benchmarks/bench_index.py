@@ -0,0 +1,73 @@
+"""
+Index benchmark: generates a synthetic repository (Python and JS files plus
+an ignored node_modules), builds the workspace index and times a few
+search_code/list_tree queries against it.
+
+    python benchmarks/bench_index.py [file_count]
+"""
+import os
+import random
+import resource
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from mini_cursor import project_index  # noqa: E402
+
+
+WORDS = ["user", "order", "cart", "item", "price", "token", "session", "render", "fetch", "state"]
+
+
+def generate(root, count):
+    rng = random.Random(1)
+    with open(os.path.join(root, ".gitignore"), "w") as f:
+        f.write("node_modules/\n*.log\n")
+    for i in range(count):
+        folder = os.path.join(root, "src", f"pkg{i % 200}")
+        os.makedirs(folder, exist_ok=True)
+        a, b = rng.choice(WORDS), rng.choice(WORDS)
+        if i % 2:
+            body = f"export function {a}_{b}_{i}(x) {{\n  return x + {i};\n}}\n" + f"// {a} {b} filler line\n" * 40
+            name = f"mod{i}.js"
+        else:
+            body = f"class {a.title()}{b.title()}{i}:\n    def {a}_{i}(self):\n        return {i}\n" + f"# {a} {b} filler line\n" * 40
+            name = f"mod{i}.py"
+        with open(os.path.join(folder, name), "w") as f:
+            f.write(body)
+    ignored = os.path.join(root, "node_modules", "dep")
+    os.makedirs(ignored)
+    with open(os.path.join(ignored, "index.js"), "w") as f:
+        f.write("function needle_in_node_modules() {}\n")
+
+
+def timed(label, fn, *args, **kwargs):
+    started = time.perf_counter()
+    result = fn(*args, **kwargs)
+    print(f"{label:<34} {(time.perf_counter() - started) * 1000:8.1f} ms  {result.splitlines()[0]}")
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 50_000
+    with tempfile.TemporaryDirectory() as root:
+        generate(root, count)
+        os.chdir(root)
+        started = time.perf_counter()
+        index = project_index.get_index(root)
+        build = time.perf_counter() - started
+        rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+        print(f"indexed {len(index.files)} files in {build:.1f}s, {len(index.postings)} trigrams, max RSS {rss:.0f} MB")
+        started = time.perf_counter()
+        index.refresh()
+        print(f"background refresh (no changes)    {(time.perf_counter() - started) * 1000:8.1f} ms")
+        timed("search_code rare literal", project_index.search_code, "return x + 1235;")
+        timed("search_code common literal", project_index.search_code, "filler line")
+        timed("search_code regex", project_index.search_code, r"def user_\d+\(", regex=True)
+        timed("search_code symbols", project_index.search_code, "UserCart", symbols=True)
+        timed("search_code ignored file", project_index.search_code, "needle_in_node_modules")
+        timed("list_tree depth 2", project_index.list_tree, ".", 2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+"""
+Prompt size with retrieved few-shot examples versus the whole example
+library inlined in the system prompt, for a set of typical queries. Also
+checks that the system prompt (the cacheable prefix) is byte-identical
+whatever the query.
+
+    python benchmarks/bench_prompt.py [--profile chat|chat2] [-k 2]
+"""
+import argparse
+import hashlib
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from mini_cursor.few_shot import ExampleLibrary  # noqa: E402
+from mini_cursor.history import ConversationHistory, estimate_tokens  # noqa: E402
+from mini_cursor.profiles import PROFILES  # noqa: E402
+
+
+QUERIES = [
+    "Create a Vite + React app with a counter and run it",
+    "Make a todo list page with plain HTML, CSS and JavaScript",
+    "Create an express server with a /health route",
+    "Set up an Express server using ES modules (import syntax)",
+    "Build a FastAPI backend with CRUD endpoints for books",
+    "My React app crashes with TypeError: cannot read properties of undefined, fix it",
+    "Write a Python script that renames all .jpeg files in a folder to .jpg",
+]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure prompt tokens saved by few-shot retrieval.")
+    parser.add_argument("--profile", default="chat", choices=sorted(PROFILES))
+    parser.add_argument("-k", type=int, default=None, help="examples per query (default AGENT_EXAMPLES_K)")
+    args = parser.parse_args()
+
+    profile = PROFILES[args.profile]
+    library = ExampleLibrary(profile.examples_dir, k=args.k if args.k is not None else profile.examples.k)
+    static = estimate_tokens(profile.system_prompt)
+    inlined = static + library.total_tokens()
+
+    print(f"{args.profile} profile: system prompt {static} tokens; {len(library.examples)} examples in the library "
+          f"({library.total_tokens()} tokens); all inlined would be {inlined} tokens per call")
+    prefixes = set()
+    saved_total = 0
+    for query in QUERIES:
+        history = ConversationHistory(profile.system_prompt)
+        content, chosen, saved = library.inject(query)
+        history.append({"role": "user", "content": content})
+        prefixes.add(hashlib.sha256(history.messages[0]["content"].encode("utf-8")).hexdigest())
+        sent = static + estimate_tokens(content)
+        saved_total += saved
+        names = ", ".join(e.name for e in chosen)
+        print(f"  {query[:58]:<58} -> {names:<44} {sent:>5} tokens, saved {saved:>5} per call")
+    print(f"average saved per call: {saved_total // len(QUERIES)} tokens "
+          f"({saved_total / len(QUERIES) / inlined:.0%} of the inlined prompt)")
+    print(f"system prompt prefix identical across queries: {'yes' if len(prefixes) == 1 else 'NO'}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+"""
+Compares the JSON-in-content protocol with native function calling
+(AGENT_PROTOCOL=tools): the fixed prompt each request carries, and the
+prompt size per turn while the same ToDo task is scripted through both
+loops. Parse-failure rates need a real model, so pass trace files from real
+sessions with --trace to get them per protocol.
+
+    python benchmarks/bench_protocols.py [--profile chat|chat2] [--trace .mini_cursor/trace.jsonl ...]
+"""
+import argparse
+import asyncio
+import contextlib
+import json
+import os
+import sys
+import tempfile
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from mini_cursor import function_calling, tracing  # noqa: E402
+from mini_cursor.agent import Session  # noqa: E402
+from mini_cursor.history import ConversationHistory, estimate_tokens  # noqa: E402
+from mini_cursor.profiles import PROFILES  # noqa: E402
+from mini_cursor.tools import available_tools  # noqa: E402
+
+from bench_agent import ScriptedModel  # noqa: E402
+
+
+FILES = {
+    "todo-app/index.html": "<!DOCTYPE html>\n<html><body><input id=\"taskInput\"><ul id=\"taskList\"></ul><script src=\"script.js\"></script></body></html>\n",
+    "todo-app/style.css": "body { font-family: sans-serif; }\n.completed { text-decoration: line-through; }\n",
+    "todo-app/script.js": "function addTask() {\n  const input = document.getElementById('taskInput');\n}\n",
+}
+
+
+def json_steps():
+    return [
+        {"step": "plan", "content": "Create the folder, write three files, check them."},
+        {"step": "action", "function": "run_command", "input": "mkdir -p todo-app"},
+        {"step": "action", "calls": [
+            {"function": "write_file", "parallel": True, "input": {"path": path, "content": content}}
+            for path, content in FILES.items()
+        ]},
+        {"step": "action", "function": "list_tree", "input": {"path": "todo-app"}},
+        {"step": "output", "content": "Open todo-app/index.html to use the app."},
+    ]
+
+
+def tool_replies():
+    def call(i, name, arguments):
+        return SimpleNamespace(id=f"call-{i}", type="function",
+                               function=SimpleNamespace(name=name, arguments=json.dumps(arguments)))
+
+    return [
+        ("Create the folder, write three files, check them.", [call(1, "run_command", {"command": "mkdir -p todo-app"})]),
+        (None, [call(2 + i, "write_file", {"path": p, "content": c}) for i, (p, c) in enumerate(FILES.items())]),
+        (None, [call(9, "list_tree", {"path": "todo-app"})]),
+        ("Open todo-app/index.html to use the app.", None),
+    ]
+
+
+class ScriptedToolModel:
+    """Returns scripted (content, tool_calls) replies for the function-calling loop."""
+
+    def __init__(self, replies):
+        self.replies = replies
+        self.calls = 0
+        self.prompt_bytes = []
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self.create))
+
+    def create(self, messages, model, tools=None, **params):
+        self.prompt_bytes.append(len(json.dumps(messages).encode("utf-8")) + len(json.dumps(tools).encode("utf-8")))
+        content, tool_calls = self.replies[min(self.calls, len(self.replies) - 1)]
+        self.calls += 1
+        message = SimpleNamespace(role="assistant", content=content, tool_calls=tool_calls)
+        return SimpleNamespace(choices=[SimpleNamespace(index=0, message=message)], usage=None)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare the JSON and native tool-calling protocols.")
+    parser.add_argument("--profile", default="chat", choices=sorted(PROFILES))
+    parser.add_argument("--trace", nargs="*", default=[], help="trace files from real sessions")
+    args = parser.parse_args()
+
+    os.environ.setdefault("GEMINI_API_KEY", "bench")
+    os.chdir(tempfile.mkdtemp(prefix="protocol-bench-"))
+    profile = PROFILES[args.profile]
+    tracing.tracer.path = None
+    schemas = json.dumps(function_calling.tool_schemas(available_tools))
+
+    json_fixed = estimate_tokens(profile.system_prompt)
+    tools_fixed = estimate_tokens(profile.tools_system_prompt) + estimate_tokens(schemas)
+    print(f"Fixed prompt per request ({args.profile} profile):")
+    print(f"  json protocol   system prompt {json_fixed:>6} tokens")
+    print(f"  tools protocol  system prompt {estimate_tokens(profile.tools_system_prompt):>6} tokens "
+          f"+ tool schemas {estimate_tokens(schemas):>6} tokens = {tools_fixed} tokens "
+          f"({abs(1 - tools_fixed / json_fixed):.0%} {'smaller' if tools_fixed <= json_fixed else 'larger'})")
+
+    json_model = ScriptedModel(json_steps())
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        Session(profile, client=json_model, stream=False, protocol="json").run("Create a ToDo app")
+        tools_model = ScriptedToolModel(tool_replies())
+        history = ConversationHistory(profile.tools_system_prompt)
+        history.append({"role": "user", "content": "Create a ToDo app"})
+        asyncio.run(function_calling.run_tools_task(tools_model, history, available_tools, model="scripted"))
+
+    print("Scripted ToDo task:")
+    for name, model in (("json", json_model), ("tools", tools_model)):
+        total = sum(model.prompt_bytes)
+        print(f"  {name:<6} protocol  {model.calls} requests, {total / 1024:7.1f} KB sent "
+              f"(~{total // 4} tokens), {total / model.calls / 1024:5.1f} KB per request")
+
+    if args.trace:
+        print("Real sessions:")
+        print(tracing.summarize(tracing.load(args.trace)))
+
+
+if __name__ == "__main__":
+    main()
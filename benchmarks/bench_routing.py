@@ -0,0 +1,141 @@
+"""
+Model routing on a mix of routine and hard tasks, with scripted models: a
+fast, cheap one that cannot get past the hard steps (it sends prose instead
+of JSON, or keeps calling fix_errors) and a slow, expensive one that always
+can. Compares always-fast, always-strong and the default routing rules on
+tasks finished, model calls, model time, tokens and estimated cost, all
+taken from the trace the agent writes.
+
+    python benchmarks/bench_routing.py [--tasks 12] [--hard 0.33]
+"""
+import argparse
+import contextlib
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+# Short backoff between retries, so the run measures the models rather than the sleeps
+os.environ.setdefault("AGENT_RETRY_BASE_SECS", "0.01")
+os.environ.setdefault("AGENT_CHECKPOINTS", "0")
+
+from mini_cursor import tracing  # noqa: E402
+from mini_cursor.agent import Session  # noqa: E402
+from mini_cursor.routing import DEFAULT_RULES, Router  # noqa: E402
+
+FAST, STRONG = "fast-model", "strong-model"
+# Seconds per call and dollars per million tokens
+LATENCY = {FAST: 0.02, STRONG: 0.10}
+PRICE = {FAST: 0.10, STRONG: 1.25}
+# A task still going after this many calls is stopped and counted as not done
+MAX_CALLS = 25
+
+
+def action(function, tool_input):
+    return {"step": "action", "function": function, "input": tool_input}
+
+
+def make_task(i, hard, kind):
+    steps = [
+        {"step": "plan", "content": f"Create module {i} and check it."},
+        action("write_file", {"path": f"task{i}/index.js", "content": f"export const value = {i};\n" * 20}),
+        action("read_file", f"task{i}/index.js"),
+    ]
+    if hard:
+        steps.append({"hard": kind, **action("edit_file", {"path": f"task{i}/index.js", "edits": [
+            {"search": f"export const value = {i};\n", "replace": f"export const value = {i + 1};\n"}]})})
+    steps += [
+        {"step": "observe", "content": "The module looks right."},
+        {"step": "output", "content": f"Module {i} is ready."},
+    ]
+    return steps
+
+
+class ScriptedModels:
+    """
+    One client for both models. A script step only advances on a good reply;
+    the fast model's reply to a hard step is prose or a fix_errors call.
+    """
+
+    def __init__(self, steps):
+        self.steps = steps
+        self.index = 0
+        self.calls = 0
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self.create))
+
+    def create(self, messages, model, stream=False, **params):
+        time.sleep(LATENCY[model])
+        self.calls += 1
+        step = self.steps[min(self.index, len(self.steps) - 1)]
+        if self.calls >= MAX_CALLS:
+            content = json.dumps({"step": "output", "content": "Stopped: too many turns."})
+        elif step.get("hard") and model == FAST:
+            if step["hard"] == "prose":
+                content = "Sure! I will now update the file so the value is incremented."
+            else:
+                content = json.dumps(action("fix_errors", {"error_log": "TypeError: Cannot read properties of undefined"}))
+        else:
+            content = json.dumps({k: v for k, v in step.items() if k != "hard"})
+            self.index += 1
+        message = SimpleNamespace(role="assistant", content=content, tool_calls=None)
+        usage = {"prompt_tokens": sum(len(m.get("content") or "") for m in messages) // 4,
+                 "completion_tokens": len(content) // 4}
+        usage["total_tokens"] = usage["prompt_tokens"] + usage["completion_tokens"]
+        return SimpleNamespace(choices=[SimpleNamespace(index=0, message=message)], usage=usage)
+
+
+def run(strategy, tasks, trace_path):
+    tracing.tracer.path = trace_path
+    if os.path.exists(trace_path):
+        os.remove(trace_path)
+    finished = 0
+    for i, steps in enumerate(tasks):
+        if strategy == "always fast":
+            router = Router(FAST, STRONG, rules=[])
+        elif strategy == "always strong":
+            router = Router(STRONG, STRONG, rules=[])
+        else:
+            router = Router(FAST, STRONG, rules=DEFAULT_RULES)
+        model = ScriptedModels(steps)
+        session = Session("chat", client=model, stream=False, protocol="json", router=router)
+        with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+            finished += session.run(f"task {i}") is not None and model.calls < MAX_CALLS
+    records = tracing.load([trace_path])
+    seconds = sum(r["latency_s"] or 0 for r in records)
+    tokens = {model: sum(r["usage"]["total_tokens"] for r in records if r.get("model") == model)
+              for model in (FAST, STRONG)}
+    cost = sum(tokens[model] * PRICE[model] / 1e6 for model in tokens)
+    calls = {model: sum(1 for r in records if r.get("model") == model) for model in (FAST, STRONG)}
+    return finished, calls, seconds, sum(tokens.values()), cost, records
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark per-turn model routing with scripted models.")
+    parser.add_argument("--tasks", type=int, default=12)
+    parser.add_argument("--hard", type=float, default=0.33, help="share of tasks with a step only the strong model gets right")
+    args = parser.parse_args()
+
+    rng = random.Random(11)
+    tasks = [make_task(i, rng.random() < args.hard, rng.choice(["prose", "flail"])) for i in range(args.tasks)]
+    hard = sum(any(s.get("hard") for s in t) for t in tasks)
+    root = tempfile.mkdtemp(prefix="agent-routing-")
+    os.chdir(root)
+    trace_path = os.path.join(root, "trace.jsonl")
+
+    print(f"{args.tasks} tasks, {hard} with a step the fast model cannot do; latency fast {LATENCY[FAST]}s, "
+          f"strong {LATENCY[STRONG]}s; $/M tokens fast {PRICE[FAST]}, strong {PRICE[STRONG]}")
+    print(f"{'strategy':<15} {'done':>6} {'fast calls':>11} {'strong calls':>13} {'model time':>11} {'tokens':>8} {'est. cost':>10}")
+    for strategy in ("always fast", "always strong", "routed"):
+        finished, calls, seconds, tokens, cost, records = run(strategy, tasks, trace_path)
+        print(f"{strategy:<15} {finished:>3}/{len(tasks):<2} {calls[FAST]:>11} {calls[STRONG]:>13} {seconds:>10.2f}s "
+              f"{tokens:>8} ${cost:>9.5f}")
+    print()
+    print(tracing.summarize(records))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+"""
+Load test of the multi-session server with a mock model. For each
+concurrency level, that many clients each create a session, send one task
+(plan, write a file, run a command, read it back, answer) and delete the
+session, until --sessions have finished. The model answers after a fixed
+simulated latency, so the numbers show what the server adds: sessions per
+second and the p50/p95/p99 latency of a whole session as load grows.
+
+    python benchmarks/bench_server.py [--levels 1,4,16,64] [--sessions 64] [--latency 0.05] [--max-model-calls 16]
+"""
+import argparse
+import asyncio
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import httpx  # noqa: E402
+
+from mini_cursor import tracing  # noqa: E402
+from mini_cursor.profiles import PROFILES  # noqa: E402
+from mini_cursor.server import AgentServer  # noqa: E402
+
+
+STEPS = [
+    {"step": "plan", "content": "Write a greeting file, check it from the shell and read it back."},
+    {"step": "action", "function": "write_file", "input": {"path": "hello.txt", "content": "hello from the server\n"}},
+    {"step": "action", "function": "run_command", "input": "wc -c hello.txt"},
+    {"step": "action", "function": "read_file", "input": "hello.txt"},
+    {"step": "output", "content": "hello.txt is written and checked."},
+]
+
+
+class AsyncScriptedModel:
+    """An async stand-in for the model client: the next step of STEPS after `latency` seconds."""
+
+    def __init__(self, latency, stats):
+        self.latency = latency
+        self.stats = stats
+        self.calls = 0
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self.create))
+
+    async def create(self, messages, model, stream=False, **params):
+        content = json.dumps(STEPS[min(self.calls, len(STEPS) - 1)])
+        self.calls += 1
+        self.stats.in_flight += 1
+        self.stats.peak = max(self.stats.peak, self.stats.in_flight)
+        try:
+            await asyncio.sleep(self.latency)
+        finally:
+            self.stats.in_flight -= 1
+        message = SimpleNamespace(role="assistant", content=content, tool_calls=None)
+        return SimpleNamespace(choices=[SimpleNamespace(index=0, message=message)], usage=None)
+
+
+async def one_session(client):
+    started = time.perf_counter()
+    created = (await client.post("/sessions")).json()
+    reply = await client.post(f"/sessions/{created['id']}/messages", json={"content": "write and check hello.txt"})
+    reply.raise_for_status()
+    if reply.json().get("result") != STEPS[-1]["content"]:
+        raise RuntimeError(f"unexpected reply: {reply.json()}")
+    await client.delete(f"/sessions/{created['id']}")
+    return time.perf_counter() - started
+
+
+async def level(base_url, concurrency, sessions):
+    latencies = []
+    remaining = iter(range(sessions))
+
+    async def worker(client):
+        for _ in remaining:
+            latencies.append(await one_session(client))
+
+    # One keep-alive connection per client, like separate users (a shared
+    # httpx pool rescans every connection per request and would dominate),
+    # built before the clock starts since each loads the CA bundle
+    clients = [httpx.AsyncClient(base_url=base_url, timeout=120) for _ in range(concurrency)]
+    started = time.perf_counter()
+    await asyncio.gather(*(worker(client) for client in clients))
+    wall = time.perf_counter() - started
+    await asyncio.gather(*(client.aclose() for client in clients))
+    return wall, latencies
+
+
+async def run(args):
+    root = tempfile.mkdtemp(prefix="agent-server-bench-")
+    stats = SimpleNamespace(in_flight=0, peak=0)
+    server = AgentServer(root=root, profile=args.profile, protocol="json", stream=False,
+                         client_factory=lambda: AsyncScriptedModel(args.latency, stats),
+                         max_model_calls=args.max_model_calls)
+    listener = await server.start("127.0.0.1", 0)
+    base_url = "http://127.0.0.1:%d" % listener.sockets[0].getsockname()[1]
+    print(f"{len(STEPS)} model calls per session, {args.latency * 1000:.0f} ms simulated latency each, "
+          f"at most {args.max_model_calls} model calls in flight")
+    print(f"{'clients':>7} {'sessions':>8} {'sessions/s':>11} {'p50':>8} {'p95':>8} {'p99':>8} {'peak calls':>11}")
+    try:
+        for concurrency in args.levels:
+            stats.peak = 0
+            count = max(args.sessions, concurrency)
+            wall, latencies = await level(base_url, concurrency, count)
+            p50, p95, p99 = (tracing.percentile(latencies, p) * 1000 for p in (50, 95, 99))
+            print(f"{concurrency:>7} {count:>8} {count / wall:>11.1f} {p50:>6.0f}ms {p95:>6.0f}ms {p99:>6.0f}ms "
+                  f"{stats.peak:>11}")
+    finally:
+        await server.close()
+        shutil.rmtree(root, True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test the multi-session server with a mock model.")
+    parser.add_argument("--profile", default="chat", choices=sorted(PROFILES))
+    parser.add_argument("--levels", default="1,4,16,64", help="comma-separated client concurrency levels")
+    parser.add_argument("--sessions", type=int, default=64, help="sessions per level")
+    parser.add_argument("--latency", type=float, default=0.05, help="simulated model latency per call (seconds)")
+    parser.add_argument("--max-model-calls", type=int, default=16)
+    args = parser.parse_args()
+    args.levels = [int(n) for n in args.levels.split(",")]
+
+    tracing.tracer.path = None
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
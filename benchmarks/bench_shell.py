@@ -0,0 +1,52 @@
+"""
+Compares a fresh shell per command with the persistent shell worker on a
+scripted sequence of small commands.
+
+    python benchmarks/bench_shell.py [count]
+"""
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from mini_cursor.shell_worker import ShellWorker, run_in_worker  # noqa: E402
+from mini_cursor.spool import run_spooled  # noqa: E402
+
+
+COMMANDS = [
+    "echo hello",
+    "pwd",
+    "true",
+    "ls",
+    "printf 'a\\nb\\n' | wc -l",
+]
+
+
+def script(count):
+    return [COMMANDS[i % len(COMMANDS)] for i in range(count)]
+
+
+def bench(label, run, commands):
+    started = time.perf_counter()
+    for command in commands:
+        run(command)
+    elapsed = time.perf_counter() - started
+    print(f"{label:<24} {elapsed * 1000:8.1f} ms total  {elapsed / len(commands) * 1000:6.2f} ms/command")
+    return elapsed
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100
+    commands = script(count)
+    with tempfile.TemporaryDirectory() as tmp:
+        os.chdir(tmp)
+        ShellWorker().close()  # warm the page cache for bash
+        fresh = bench("fresh shell per call", run_spooled, commands)
+        persistent = bench("persistent worker", run_in_worker, commands)
+    print(f"speedup: {fresh / persistent:.1f}x over {count} commands")
+
+
+if __name__ == "__main__":
+    main()
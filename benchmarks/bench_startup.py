@@ -0,0 +1,71 @@
+"""
+Cold-start time to the `> ` prompt: starts the agent as a fresh process,
+waits for the prompt on stdout and closes stdin. Also reports the modules
+that are imported at that point, to catch heavy imports creeping back in
+before the first request.
+
+    python benchmarks/bench_startup.py [--runs 9]
+"""
+import argparse
+import os
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+HEAVY = ("openai", "httpx", "pydantic")
+
+COMMANDS = [
+    ("python -m mini_cursor", [sys.executable, "-m", "mini_cursor"]),
+    ("python chat.py", [sys.executable, os.path.join(ROOT, "chat.py")]),
+    ("python chat2.py", [sys.executable, os.path.join(ROOT, "chat2.py")]),
+]
+
+
+def time_to_prompt(cmd, env):
+    started = time.perf_counter()
+    process = subprocess.Popen(cmd, stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL,
+                               cwd=ROOT, env=env)
+    seen = b""
+    while not seen.endswith(b"> "):
+        chunk = process.stdout.read(1)
+        if not chunk:
+            raise RuntimeError(f"{' '.join(cmd)} exited before showing the prompt")
+        seen += chunk
+    elapsed = time.perf_counter() - started
+    process.stdin.close()
+    process.wait()
+    return elapsed
+
+
+def heavy_modules_at_prompt(env):
+    probe = (
+        "import sys, mini_cursor.cli as cli, builtins\n"
+        "def stop(prompt=''):\n"
+        "    print(','.join(m for m in " + repr(HEAVY) + " if m in sys.modules)); raise EOFError\n"
+        "builtins.input = stop\n"
+        "cli.main([])\n"
+    )
+    out = subprocess.run([sys.executable, "-c", probe], cwd=ROOT, env=env, capture_output=True, text=True)
+    return out.stdout.split("\n")[0].strip()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure cold-start time to the agent prompt.")
+    parser.add_argument("--runs", type=int, default=9)
+    args = parser.parse_args()
+
+    env = {**os.environ, "GEMINI_API_KEY": os.getenv("GEMINI_API_KEY", "bench"), "AGENT_TRACE": "off"}
+    print(f"cold start to the '> ' prompt, median of {args.runs} runs, python {sys.version.split()[0]}")
+    for label, cmd in COMMANDS:
+        times = sorted(time_to_prompt(cmd, env) for _ in range(args.runs))
+        print(f"  {label:<24} {times[len(times) // 2] * 1000:7.0f} ms  (min {times[0] * 1000:.0f} ms)")
+    started = time.perf_counter()
+    subprocess.run([sys.executable, "-c", "import openai"], check=True)
+    print(f"  for reference, `import openai` alone takes {(time.perf_counter() - started) * 1000:.0f} ms")
+    print(f"  heavy modules imported at the prompt: {heavy_modules_at_prompt(env) or 'none'}")
+
+
+if __name__ == "__main__":
+    main()
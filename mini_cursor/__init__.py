@@ -0,0 +1,16 @@
+"""
+Mini Cursor, a terminal-based coding agent. `Session` (mini_cursor.agent)
+is the agent core; `mini-cursor` / `python -m mini_cursor` runs it
+interactively.
+"""
+
+__version__ = "0.1.0"
+
+
+def __getattr__(name):
+    # Imported on demand so `import mini_cursor` stays cheap and .env is loaded before settings are read
+    if name == "Session":
+        from .agent import Session
+
+        return Session
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
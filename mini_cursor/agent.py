@@ -0,0 +1,299 @@
+"""
+The agent core. A Session is one conversation: its prompt profile, model
+client, token-budgeted history and protocol. `Session.arun` takes a user
+request through the plan → action → observe loop until the profile's final
+step; model calls are async, tools run in worker threads, and cancelling
+the task stops the in-flight call or interrupts the running command.
+`Session.run` is the blocking wrapper the CLI uses, where Ctrl-C cancels
+the request instead of the process; server.py runs many sessions' arun()
+on one loop, each in its own Workspace. The OpenAI client is only imported and
+built on the first model call, so nothing heavy runs before the `> ` prompt.
+"""
+import asyncio
+import contextlib
+import json
+import os
+import signal
+import time
+
+from . import checkpoints, function_calling, tracing, workspace
+from .batch import call_tool, run_batch
+from .client import REQUEST_TIMEOUT, close_pool, create, make_client
+from .file_tools import get_read_cache
+from .function_calling import ToolsUnsupported, run_tools_task
+from .history import ConversationHistory
+from .profiles import get_profile
+from .recovery import RetryBudget, parse_reply, retry_after
+from .routing import Router
+from .shell_worker import interrupt_worker
+from .streaming import finish_drains, stream_step
+from .tools import available_tools
+
+
+# The fast model; routing.py escalates to AGENT_STRONG_MODEL per turn
+MODEL = os.getenv("AGENT_MODEL", "gemini-2.0-flash")
+
+# Stream responses and dispatch as soon as the JSON object closes (AGENT_STREAM=0 to disable)
+STREAM = os.getenv("AGENT_STREAM", "1") != "0"
+
+CANCELLED = "⏹️ Cancelled by the user."
+
+
+async def _with_checkpoint(output, tool_names):
+    """Checkpoints the workspace if the tools that produced `output` may have changed it, and says so."""
+    created = await asyncio.to_thread(checkpoints.auto_checkpoint, f"after {', '.join(tool_names)}", tool_names)
+    return f"{output}\n📸 checkpoint {created}" if created else output
+
+
+class Session:
+    def __init__(self, profile=None, client=None, model=MODEL, stream=STREAM, protocol=None, tools=None,
+                 workspace=None, limiter=None, tracer=None, router=None):
+        self.profile = get_profile(profile) if profile is None or isinstance(profile, str) else profile
+        self._client = client
+        self.model = model
+        self.stream = stream
+        # Native tool calls (AGENT_PROTOCOL=tools); falls back to the JSON protocol if unsupported
+        self.protocol = protocol or function_calling.PROTOCOL
+        self.tools = available_tools if tools is None else tools
+        self.tools_verified = False
+        # Where tools run (None: the process-wide default at the cwd)
+        self.workspace = workspace
+        # Shared cap on concurrent model calls, e.g. an asyncio.Semaphore
+        self.limiter = limiter or contextlib.nullcontext()
+        self.tracer = tracer or tracing.tracer
+        # Picks the model per turn: `model` for routine steps, a stronger one when the task needs it
+        self.router = router or Router(model)
+        self._loop = None
+        # Token-budgeted history: system prompt + recent turns verbatim, older turns summarized
+        self.history = ConversationHistory(self.system_prompt)
+
+    @property
+    def client(self):
+        if self._client is None:
+            self._client = make_client()
+        return self._client
+
+    @client.setter
+    def client(self, client):
+        self._client = client
+
+    @property
+    def system_prompt(self):
+        return self.profile.tools_system_prompt if self.protocol == "tools" else self.profile.system_prompt
+
+    def run(self, user_query):
+        """
+        Blocking wrapper around arun() on the session's own event loop (kept
+        across requests so pooled connections stay warm). Ctrl-C cancels the
+        request and returns None.
+        """
+        if self._loop is None:
+            self._loop = asyncio.new_event_loop()
+        task = self._loop.create_task(self.arun(user_query))
+        try:
+            self._loop.add_signal_handler(signal.SIGINT, task.cancel)
+            handled = True
+        except (NotImplementedError, RuntimeError, ValueError):
+            # Windows or not the main thread: Ctrl-C keeps its default behaviour
+            handled = False
+        try:
+            return self._loop.run_until_complete(task)
+        except asyncio.CancelledError:
+            return None
+        finally:
+            if handled:
+                self._loop.remove_signal_handler(signal.SIGINT)
+            # The loop is idle until the next request, so let the last stream finish now
+            self._loop.run_until_complete(finish_drains())
+
+    def close(self):
+        """Closes the event loop run() created, and its connection pool."""
+        if self._loop is not None:
+            self._loop.run_until_complete(close_pool())
+            self._loop.run_until_complete(self._loop.shutdown_asyncgens())
+            self._loop.close()
+            self._loop = None
+
+    async def arun(self, user_query):
+        """Runs one user request through the agent loop and returns the final answer."""
+        active = workspace.activate(self.workspace) if self.workspace is not None else contextlib.nullcontext()
+        with active:
+            try:
+                # With AGENT_CHECKPOINTS=1 every request can be undone with restore
+                created = await asyncio.to_thread(checkpoints.auto_checkpoint, f"before: {user_query[:80]}")
+                if created:
+                    print(f"📸 checkpoint {created}")
+                if self.protocol == "tools":
+                    self.history.append({ "role": "user", "content": user_query })
+                    try:
+                        result = await run_tools_task(self.client, self.history, self.tools, self.model,
+                                                      verified=self.tools_verified, tracer=self.tracer, limiter=self.limiter,
+                                                      router=self.router)
+                        self.tools_verified = True
+                        return result
+                    except ToolsUnsupported as e:
+                        print(f"⚠️ Native tool calls were rejected ({e}); falling back to the JSON protocol.")
+                        self.protocol = "json"
+                        self.history.messages[0] = { "role": "system", "content": self.system_prompt }
+                        self.history.messages.pop()
+                return await self._run_json(user_query)
+            except asyncio.CancelledError:
+                self._cancelled()
+                raise
+
+    def _cancelled(self):
+        """Stops the running command and leaves the history valid for the next request."""
+        interrupt_worker()
+        if self.tracer.current is not None:
+            self.tracer.current.interrupted("cancelled")
+        self.tracer.finish()
+        messages = self.history.messages
+        pending = []
+        for message in reversed(messages):
+            if message.get("role") == "tool":
+                pending.append(message)
+                continue
+            if message.get("role") == "assistant" and message.get("tool_calls"):
+                # Every requested tool call needs a result, or the next request is rejected
+                answered = {m.get("tool_call_id") for m in pending}
+                for call in message["tool_calls"]:
+                    if call["id"] not in answered:
+                        self.history.append({"role": "tool", "tool_call_id": call["id"], "content": CANCELLED})
+            break
+        if self.protocol != "tools":
+            self.history.append({ "role": "assistant", "content": json.dumps({ "step": "observe", "content": CANCELLED }) })
+        print(f"\n{CANCELLED}")
+
+    async def _run_json(self, user_query):
+        history = self.history
+        # Only the few-shot examples relevant to this query are sent, after the unchanging system prompt
+        content, chosen, saved = self.profile.examples.inject(user_query)
+        history.append({ "role": "user", "content": content })
+        if chosen:
+            print(f"📚 examples: {', '.join(e.name for e in chosen)} (~{saved} prompt tokens saved per call)")
+        # One trace record per model call (AGENT_TRACE, summarize with `python -m mini_cursor.tracing`)
+        self.tracer.start_task()
+        # Bounded retries with backoff for malformed replies and unknown tools
+        retries = RetryBudget()
+
+        while True:
+            messages = history.for_request()
+            get_read_cache().next_turn(history.verbatim_turns)
+            turn = self.tracer.begin(messages)
+            model = self.router.choose(turn)
+            streamed = None
+            try:
+                async with self.limiter:
+                    if self.stream:
+                        streamed = await asyncio.wait_for(stream_step(self.client, messages, model=model), REQUEST_TIMEOUT)
+                        response = streamed.content
+                    else:
+                        response = await asyncio.wait_for(create(
+                            self.client,
+                            messages=messages,
+                            response_format={"type": "json_object"},
+                            stream=False,
+                            model=model,
+                        ), REQUEST_TIMEOUT)
+            except asyncio.TimeoutError:
+                turn.interrupted("timeout")
+                problem = f"The model did not answer within {REQUEST_TIMEOUT:.0f}s"
+                if not await retry_after(retries, history, problem, format_hint=False):
+                    self.tracer.finish()
+                    return None
+                continue
+            if streamed:
+                turn.response(streamed.content, streamed, ttft=streamed.ttft, streamed=True)
+                print(streamed.timing())
+            else:
+                turn.response(response.choices[0].message.content, response)
+
+            content = None
+            try:
+                content = streamed.content if streamed else response.choices[0].message.content
+                # Code fences, trailing commas and concatenated objects are repaired locally
+                parsed_output, repaired = parse_reply(content)
+            except (ValueError, IndexError, AttributeError) as e:
+                turn.parse_error(e)
+                print(f"❌ Error parsing response: {e}")
+                if not await retry_after(retries, history, f"Your last reply could not be parsed ({e})", content):
+                    self.tracer.finish()
+                    return None
+                continue
+            if repaired:
+                retries.saved += 1
+                turn.repaired()
+
+            history.append({ "role": "assistant", "content": json.dumps(parsed_output) })
+            step = parsed_output.get("step")
+            turn.step(step)
+
+            if step == "plan" or step == "observe":
+                if not (streamed and streamed.echoed):
+                    print(f"🧠: {parsed_output.get('content')}")
+                retries.succeeded()
+                continue
+
+            if step == "action" and isinstance(parsed_output.get("calls"), list):
+                calls = parsed_output["calls"]
+                print(f"🧠: running a batch of {len(calls)} tool calls")
+                output = await asyncio.to_thread(run_batch, calls, self.tools, on_call=turn.tool)
+                output = await _with_checkpoint(output, [c.get("function") for c in calls if isinstance(c, dict)])
+                print(f"🧠: output batch: {output}")
+                history.append({ "role": "assistant", "content": json.dumps({ "step": "observe", "content":  output}) })
+                retries.succeeded()
+                continue
+
+            if step == "action":
+                tool_name = parsed_output.get("function")
+                tool_input = parsed_output.get("input")
+                if tool_name == "write_file" and not (isinstance(tool_input, dict) and tool_input.get("path")):
+                    print(f"❌ write_file without a path: {tool_input!r}")
+                    problem = 'write_file needs an input object like {"path": "...", "content": "..."}'
+                    if not await retry_after(retries, history, problem, format_hint=False):
+                        self.tracer.finish()
+                        return None
+                    continue
+                if tool_name == "write_file":
+                    print(f"🧠: running {tool_name} in {tool_input['path']}")
+                else:
+                    print(f"🧠: running {tool_name}: {tool_input}")
+
+                if tool_name in self.tools:
+                    # In a worker thread, so a slow command does not stall the event loop
+                    started = time.perf_counter()
+                    output = await asyncio.to_thread(call_tool, self.tools, tool_name, tool_input)
+                    turn.tool(tool_name, time.perf_counter() - started, output)
+                    output = await _with_checkpoint(output, [tool_name])
+                    print(f"🧠: output {tool_name}: {output}")
+                    history.append({ "role": "assistant", "content": json.dumps({ "step": "observe", "content":  output}) })
+                    retries.succeeded()
+                    continue
+
+                print(f"❌ Unknown tool: {tool_name}")
+                problem = f"There is no tool named {tool_name!r}. Available tools: {', '.join(self.tools)}"
+                if not await retry_after(retries, history, problem, format_hint=False):
+                    self.tracer.finish()
+                    return None
+                continue
+
+            retries.succeeded()
+
+            if step == "get_system":
+                tool_name = parsed_output.get("function")
+                print(f"🧠: tool_name {tool_name}")
+
+                if tool_name in self.tools:
+                    started = time.perf_counter()
+                    output = await asyncio.to_thread(self.tools[tool_name].get("fn"))
+                    turn.tool(tool_name, time.perf_counter() - started, output)
+                    print(f"🧠: output {output}")
+                    history.append({ "role": "assistant", "content": json.dumps({ "step": "observe", "output":  output}) })
+                    continue
+
+            if step in self.profile.final_steps:
+                print(f"🤖: {parsed_output.get('content')}")
+                if retries.saved:
+                    print(f"🔧 Repaired {retries.saved} malformed replies locally ({retries.saved} model calls saved)")
+                self.tracer.finish()
+                return parsed_output.get("content")
@@ -0,0 +1,155 @@
+"""
+Several tool calls from one model turn, run concurrently where safe.
+
+An action step can carry a list of `calls`. plan_groups splits them into
+groups that run one after another. Consecutive calls marked
+`"parallel": true` share a group when their tools are in PARALLEL_SAFE
+and no write touches a path another call in the group uses. A group runs
+on a pool of AGENT_BATCH_WORKERS threads, and the results come back in
+call order as one observation.
+"""
+import contextvars
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from . import workspace
+
+
+# Tools that may run concurrently with each other. Writes are only
+# parallel-safe when no other call in the same group touches the same path.
+PARALLEL_SAFE = {
+    "read_file",
+    "write_file",
+    "edit_file",
+    "read_output",
+    "search_code",
+    "list_tree",
+    "get_system_info",
+    "list_processes",
+    "tail_process",
+}
+WRITES = {"write_file", "edit_file"}
+MAX_WORKERS = int(os.getenv("AGENT_BATCH_WORKERS", "8"))
+
+_executor = None
+
+
+def _pool():
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(max_workers=MAX_WORKERS, thread_name_prefix="tool")
+    return _executor
+
+
+def call_tool(available_tools, name, tool_input):
+    """Runs one tool the same way the agent loop does (dict -> kwargs, else positional)."""
+    tool = available_tools.get(name)
+    if tool is None:
+        return f"❌ Unknown tool: {name}"
+    try:
+        if isinstance(tool_input, dict):
+            return tool["fn"](**tool_input)
+        return tool["fn"](tool_input)
+    except Exception as e:
+        return f"❌ Error: {str(e)}"
+
+
+def _path_of(call):
+    tool_input = call.get("input")
+    path = None
+    if isinstance(tool_input, dict):
+        path = tool_input.get("path") or tool_input.get("file_path")
+    elif call.get("function") == "read_file":
+        path = tool_input
+    if not isinstance(path, str) or not path:
+        return None
+    return os.path.normpath(os.path.join(workspace.current().root, path))
+
+
+def _label(call):
+    tool_input = call.get("input")
+    if isinstance(tool_input, dict):
+        target = tool_input.get("path") or tool_input.get("command") or tool_input.get("name")
+    else:
+        target = tool_input
+    return f"{call.get('function')} {target}" if target else str(call.get("function"))
+
+
+def plan_groups(calls):
+    """
+    Splits calls into groups that run one after another. Consecutive calls
+    marked `"parallel": true` share a group when their tools are parallel-safe
+    and no write in the group touches a path another call in it uses.
+    """
+    groups = []
+    current = []
+    touched = {}
+
+    for index, call in enumerate(calls):
+        name = call.get("function")
+        path = _path_of(call)
+        parallel = bool(call.get("parallel")) and name in PARALLEL_SAFE
+        conflict = path is not None and path in touched and (
+            name in WRITES or touched[path] in WRITES
+        )
+        if not parallel or conflict:
+            if current:
+                groups.append(current)
+            current, touched = [], {}
+        if not parallel:
+            groups.append([index])
+            continue
+        current.append(index)
+        if path is not None:
+            touched[path] = name if name in WRITES else touched.get(path, name)
+    if current:
+        groups.append(current)
+    return groups
+
+
+def _timed_call(available_tools, name, tool_input, on_call):
+    started = time.perf_counter()
+    result = call_tool(available_tools, name, tool_input)
+    if on_call is not None:
+        on_call(name, time.perf_counter() - started, result)
+    return result
+
+
+def run_calls(calls, available_tools, on_call=None):
+    """
+    Runs tool calls in plan_groups order and returns (results, parallel), the
+    per-call outputs and how many calls ran concurrently.
+    `on_call(name, seconds, result)` is called after each call, e.g. for tracing.
+    """
+    results = [None] * len(calls)
+    parallel = 0
+
+    for group in plan_groups(calls):
+        if len(group) == 1:
+            i = group[0]
+            results[i] = _timed_call(available_tools, calls[i].get("function"), calls[i].get("input"), on_call)
+            continue
+        parallel += len(group)
+        # Each call runs in a copy of this context, so it sees the session's workspace
+        futures = {
+            i: _pool().submit(contextvars.copy_context().run, _timed_call, available_tools,
+                              calls[i].get("function"), calls[i].get("input"), on_call)
+            for i in group
+        }
+        for i, future in futures.items():
+            results[i] = future.result()
+    return results, parallel
+
+
+def run_batch(calls, available_tools, on_call=None):
+    """Runs a batch of tool calls and returns one combined observation."""
+    started = time.perf_counter()
+    calls = [c if isinstance(c, dict) else {} for c in calls]
+    results, parallel = run_calls(calls, available_tools, on_call)
+
+    elapsed = time.perf_counter() - started
+    lines = [f"Batch of {len(calls)} calls ({parallel} ran in parallel) in {elapsed:.2f}s:"]
+    for i, (call, result) in enumerate(zip(calls, results), 1):
+        lines.append(f"[{i}] {_label(call)}: {result}")
+    return "\n".join(lines)
@@ -0,0 +1,583 @@
+"""
+Workspace checkpoints in a content-addressed store, for instant undo.
+
+A checkpoint is a tree of the workspace: files are stored once per
+content under their SHA-256 in .mini_cursor/checkpoints/objects, and each
+directory is a small JSON tree object listing its entries (content hash,
+mode, size, mtime), itself stored by hash. A new checkpoint reuses the
+hash of every file whose size and mtime match the previous checkpoint,
+and unchanged directories hash to the same tree object, so after the
+first one a checkpoint costs a stat per file plus the changed files and
+directories only.
+
+With AGENT_CHECKPOINTS=1 the agent takes one automatically before each
+request and after every turn whose tools could change files; either way
+the `checkpoint`, `restore` and `diff` tools and
+
+    mini-cursor checkpoints [list | create [LABEL] | restore ID | diff ID [TO]]
+
+work with them by id (cp-N). A restore first checkpoints the current
+state, so it can be undone too. The oldest automatic checkpoints beyond
+AGENT_CHECKPOINT_KEEP are pruned along with the objects only they used.
+VCS, dependency and build folders (SKIPPED: .git, node_modules, dist, ...)
+and files over AGENT_CHECKPOINT_MAX_FILE_MB are left out, and a restore
+never touches them.
+
+Every checkpoint first stats the tree without reading or copying anything.
+Over AGENT_CHECKPOINT_MAX_FILES files nothing is stored, and an automatic
+checkpoint that would copy more than AGENT_CHECKPOINT_MAX_MB of new or
+changed files is skipped; either one turns automatic checkpoints off for
+the workspace until the `checkpoint` tool saves one (started in a home
+folder, say, the agent does not copy it). If storing fails part way, the
+objects it wrote are removed again.
+"""
+import argparse
+import contextlib
+import difflib
+import hashlib
+import json
+import os
+import shutil
+import stat
+import tempfile
+import threading
+import time
+
+from . import workspace
+from .file_tools import write_listeners
+from .spool import _format_size
+
+
+# Automatic checkpoints are opt-in; the tools work either way
+ENABLED = os.getenv("AGENT_CHECKPOINTS", "0") == "1"
+STORE_DIR = os.path.join(".mini_cursor", "checkpoints")
+KEEP = int(os.getenv("AGENT_CHECKPOINT_KEEP", "100"))
+MAX_FILE_BYTES = int(float(os.getenv("AGENT_CHECKPOINT_MAX_FILE_MB", "50")) * 1024 * 1024)
+MAX_FILES = int(os.getenv("AGENT_CHECKPOINT_MAX_FILES", "200000"))
+# Most new or changed data an automatic checkpoint copies
+MAX_AUTO_BYTES = int(float(os.getenv("AGENT_CHECKPOINT_MAX_MB", "100")) * 1024 * 1024)
+# Folders never walked: version control, dependencies, caches and build output
+SKIPPED = {
+    ".git", ".hg", ".svn", ".mini_cursor", "node_modules", "bower_components", "__pycache__", ".venv", "venv",
+    ".tox", ".pytest_cache", ".mypy_cache", ".cache", ".next", ".nuxt", ".parcel-cache", ".gradle", "dist",
+    "build", "target", "coverage",
+}
+# Tools after which an automatic checkpoint is taken
+MUTATING = {"write_file", "edit_file", "run_command", "start_process"}
+MAX_DIFF_LINES = 300
+CHUNK = 1 << 20
+
+
+class CheckpointError(Exception):
+    pass
+
+
+class CheckpointStore:
+    def __init__(self, root):
+        self.root = os.path.realpath(root)
+        self.path = os.path.join(self.root, STORE_DIR)
+        self.objects = os.path.join(self.path, "objects")
+        self.snapshots = os.path.join(self.path, "snapshots")
+        self._trees = {}
+        self._folders = set()
+        self._records = None
+        self._lock = threading.RLock()
+        self._new_bytes = 0
+        # Objects the checkpoint being stored has written, removed again if it fails
+        self._written = []
+        # Set when the tree turned out too big for automatic checkpoints
+        self.too_large = None
+
+    # --- objects -------------------------------------------------------
+
+    def _object_path(self, digest):
+        return os.path.join(self.objects, digest[:2], digest[2:])
+
+    def _put_file(self, path):
+        """Stores a file's content (read once, hashed while copied) and returns its hash."""
+        with open(path, "rb") as src:
+            data = src.read(CHUNK)
+            if len(data) < CHUNK:
+                # Most files fit in one read: hash it, then write the blob only if it is new
+                digest = hashlib.sha256(data).hexdigest()
+                self._write_object(digest, data)
+                return digest
+        return self._put_large_file(path)
+
+    def _write_object(self, digest, data):
+        target = self._object_path(digest)
+        if os.path.exists(target):
+            return
+        folder = os.path.dirname(target)
+        if folder not in self._folders:
+            os.makedirs(folder, exist_ok=True)
+            self._folders.add(folder)
+        tmp = f"{target}.{threading.get_ident()}.tmp"
+        fd = os.open(tmp, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o444)
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(tmp, target)
+        except BaseException:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+            raise
+        self._written.append(target)
+        self._new_bytes += len(data)
+
+    def _put_large_file(self, path):
+        os.makedirs(self.objects, exist_ok=True)
+        sha = hashlib.sha256()
+        fd, tmp = tempfile.mkstemp(dir=self.objects, prefix=".tmp-")
+        try:
+            with open(path, "rb") as src, os.fdopen(fd, "wb") as dst:
+                while block := src.read(CHUNK):
+                    sha.update(block)
+                    dst.write(block)
+            digest = sha.hexdigest()
+            target = self._object_path(digest)
+            if os.path.exists(target):
+                os.remove(tmp)
+            else:
+                os.makedirs(os.path.dirname(target), exist_ok=True)
+                os.chmod(tmp, 0o444)
+                os.replace(tmp, target)
+                self._written.append(target)
+                self._new_bytes += os.path.getsize(target)
+            return digest
+        except BaseException:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+            raise
+
+    @staticmethod
+    def _hash_file(path):
+        sha = hashlib.sha256()
+        with open(path, "rb") as f:
+            while block := f.read(CHUNK):
+                sha.update(block)
+        return sha.hexdigest()
+
+    def _put_tree(self, entries, store):
+        data = json.dumps(entries, sort_keys=True, separators=(",", ":")).encode("utf-8")
+        digest = hashlib.sha256(data).hexdigest()
+        self._trees[digest] = entries
+        if store:
+            self._write_object(digest, data)
+        return digest
+
+    def _tree(self, digest):
+        entries = self._trees.get(digest)
+        if entries is None:
+            with open(self._object_path(digest), "rb") as f:
+                entries = self._trees[digest] = json.loads(f.read())
+        return entries
+
+    # --- snapshots -----------------------------------------------------
+
+    def _scan(self, path, old, counts):
+        """
+        Stats the directory `path` against the `old` tree without reading any
+        file. Returns its entries, with a None hash (and the path) for files
+        that must be read; counts gets their number of files and bytes.
+        """
+        entries = {}
+        try:
+            listing = list(os.scandir(path))
+        except OSError:
+            listing = []
+        for entry in listing:
+            if entry.name in SKIPPED:
+                continue
+            prev = old.get(entry.name) if old else None
+            try:
+                if entry.is_symlink():
+                    entries[entry.name] = ["l", os.readlink(entry.path)]
+                elif entry.is_dir():
+                    sub = self._tree(prev[1]) if prev and prev[0] == "d" else None
+                    entries[entry.name] = ["d", self._scan(entry.path, sub, counts)]
+                elif entry.is_file():
+                    st = entry.stat()
+                    counts["files"] += 1
+                    if counts["files"] > MAX_FILES:
+                        raise CheckpointError(f"{self.root} has more than {MAX_FILES} files "
+                                              "(raise AGENT_CHECKPOINT_MAX_FILES to checkpoint it)")
+                    if st.st_size > MAX_FILE_BYTES:
+                        entries[entry.name] = ["s", st.st_size, st.st_mtime_ns]
+                        continue
+                    mode = stat.S_IMODE(st.st_mode)
+                    if prev and prev[0] == "f" and prev[3] == st.st_size and prev[4] == st.st_mtime_ns:
+                        entries[entry.name] = ["f", prev[1], mode, st.st_size, st.st_mtime_ns]
+                    else:
+                        entries[entry.name] = ["f", None, mode, st.st_size, st.st_mtime_ns, entry.path]
+                        counts["changed"] += 1
+                        counts["bytes"] += st.st_size
+            except OSError:
+                # Vanished or unreadable mid-walk
+                continue
+        return entries
+
+    def _build(self, entries, store):
+        """Hashes (with store, also saves) the files a scan found changed; returns the tree hash."""
+        tree = {}
+        for name, entry in entries.items():
+            if entry[0] == "d":
+                tree[name] = ["d", self._build(entry[1], store)]
+            elif entry[0] == "f" and entry[1] is None:
+                try:
+                    digest = self._put_file(entry[5]) if store else self._hash_file(entry[5])
+                except (FileNotFoundError, PermissionError, IsADirectoryError):
+                    continue
+                tree[name] = ["f", digest] + entry[2:5]
+            else:
+                tree[name] = entry
+        return self._put_tree(tree, store)
+
+    def _current_tree(self, auto=False, store=True):
+        """(tree hash, file count) of the workspace now; nothing is stored if a limit is hit."""
+        latest = self.latest()
+        counts = {"files": 0, "changed": 0, "bytes": 0}
+        entries = self._scan(self.root, self._tree(latest["tree"]) if latest else None, counts)
+        if auto and store and counts["bytes"] > MAX_AUTO_BYTES:
+            raise CheckpointError(
+                f"{counts['changed']} new or changed files ({_format_size(counts['bytes'])}) are more than "
+                f"AGENT_CHECKPOINT_MAX_MB allows for an automatic checkpoint; call checkpoint to save one anyway")
+        if not store:
+            return self._build(entries, False), counts["files"]
+        self._written = []
+        try:
+            return self._build(entries, True), counts["files"]
+        except BaseException:
+            # Nothing refers to the objects this attempt added
+            for path in self._written:
+                with contextlib.suppress(OSError):
+                    os.remove(path)
+            self._trees.clear()
+            raise
+        finally:
+            self._written = []
+
+    def records(self):
+        with self._lock:
+            if self._records is None:
+                self._records = []
+                if os.path.isdir(self.snapshots):
+                    for name in sorted(os.listdir(self.snapshots)):
+                        if name.endswith(".json"):
+                            with open(os.path.join(self.snapshots, name), "r", encoding="utf-8") as f:
+                                self._records.append(json.load(f))
+            return self._records
+
+    def latest(self):
+        records = self.records()
+        return records[-1] if records else None
+
+    def find(self, id):
+        key = str(id).strip()
+        key = key if key.startswith("cp-") else f"cp-{key}"
+        for record in self.records():
+            if record["id"] == key:
+                return record
+        recent = ", ".join(f"{r['id']} ({r['label']})" for r in self.records()[-5:]) or "none yet"
+        raise CheckpointError(f"No checkpoint {id}. Recent checkpoints: {recent}")
+
+    def create(self, label, auto=False):
+        """Takes a checkpoint; returns (record, created). An automatic one is skipped if nothing changed."""
+        with self._lock:
+            started = time.perf_counter()
+            self._new_bytes = 0
+            latest = self.latest()
+            tree, files = self._current_tree(auto)
+            if auto and latest is not None and latest["tree"] == tree:
+                return latest, False
+            number = int(latest["id"][3:]) + 1 if latest else 1
+            record = {
+                "id": f"cp-{number}",
+                "label": label,
+                "auto": auto,
+                "tree": tree,
+                "created": time.time(),
+                "files": files,
+                "new_bytes": self._new_bytes,
+                "seconds": round(time.perf_counter() - started, 4),
+            }
+            os.makedirs(self.snapshots, exist_ok=True)
+            with open(os.path.join(self.snapshots, f"{number:08d}.json"), "w", encoding="utf-8") as f:
+                json.dump(record, f)
+            self.records().append(record)
+            if sum(r["auto"] for r in self.records()) > KEEP + KEEP // 10:
+                self.prune()
+            return record, True
+
+    def prune(self):
+        """Drops the oldest automatic checkpoints beyond KEEP and the objects no remaining one uses."""
+        with self._lock:
+            records = self.records()
+            autos = [r for r in records if r["auto"]]
+            drop = {r["id"] for r in autos[:max(0, len(autos) - KEEP)]}
+            for record in records:
+                if record["id"] in drop:
+                    os.remove(os.path.join(self.snapshots, f"{int(record['id'][3:]):08d}.json"))
+            self._records = [r for r in records if r["id"] not in drop]
+            live = set()
+            pending = [r["tree"] for r in self._records]
+            while pending:
+                digest = pending.pop()
+                if digest in live:
+                    continue
+                live.add(digest)
+                for entry in self._tree(digest).values():
+                    if entry[0] == "d":
+                        pending.append(entry[1])
+                    elif entry[0] == "f":
+                        live.add(entry[1])
+            for prefix in os.listdir(self.objects):
+                folder = os.path.join(self.objects, prefix)
+                if not os.path.isdir(folder):
+                    continue
+                for rest in os.listdir(folder):
+                    if prefix + rest not in live:
+                        os.remove(os.path.join(folder, rest))
+                        self._trees.pop(prefix + rest, None)
+            return len(drop)
+
+    # --- restore -------------------------------------------------------
+
+    def restore(self, id):
+        """Makes the workspace match checkpoint `id`; returns (record, before, written, removed)."""
+        with self._lock:
+            record = self.find(id)
+            before, _ = self.create(f"before restore to {record['id']}", auto=True)
+            counts = [0, 0]
+            self._restore_dir(self.root, self._tree(record["tree"]), self._tree(before["tree"]), counts)
+            return record, before, counts[0], counts[1]
+
+    def _restore_dir(self, path, want, have, counts):
+        for name, entry in want.items():
+            dest = os.path.join(path, name)
+            current = have.get(name)
+            if current == entry or entry[0] == "s":
+                continue
+            if entry[0] == "d":
+                if current is not None and current[0] == "d":
+                    self._restore_dir(dest, self._tree(entry[1]), self._tree(current[1]), counts)
+                    continue
+                _remove(dest)
+                os.makedirs(dest, exist_ok=True)
+                self._restore_dir(dest, self._tree(entry[1]), {}, counts)
+            elif entry[0] == "f":
+                if current is not None and current[0] == "f" and current[1:3] == entry[1:3]:
+                    continue
+                if current is not None and current[0] != "f":
+                    _remove(dest)
+                self._write_blob(entry[1], dest, entry[2])
+                counts[0] += 1
+            elif entry[0] == "l":
+                _remove(dest)
+                os.symlink(entry[1], dest)
+                counts[0] += 1
+        for name, current in have.items():
+            # Files too large to store were never saved, so they are never deleted
+            if name not in want and current[0] != "s":
+                _remove(os.path.join(path, name))
+                counts[1] += 1
+
+    def _write_blob(self, digest, dest, mode):
+        directory = os.path.dirname(dest)
+        fd, tmp = tempfile.mkstemp(dir=directory, prefix=f".{os.path.basename(dest)}.", suffix=".tmp")
+        try:
+            with open(self._object_path(digest), "rb") as src, os.fdopen(fd, "wb") as dst:
+                shutil.copyfileobj(src, dst, CHUNK)
+            os.chmod(tmp, mode)
+            os.replace(tmp, dest)
+        except BaseException:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+            raise
+        for listener in write_listeners:
+            listener(dest)
+
+    # --- diff ----------------------------------------------------------
+
+    def changes(self, tree_a, tree_b, prefix=""):
+        """(status, path, entry_a, entry_b) for every file that differs between two trees."""
+        a, b = self._tree(tree_a), self._tree(tree_b)
+        for name in sorted(set(a) | set(b)):
+            path = prefix + name
+            ea, eb = a.get(name), b.get(name)
+            if ea == eb:
+                continue
+            if ea and eb and ea[0] == eb[0] == "d":
+                yield from self.changes(ea[1], eb[1], path + "/")
+            elif ea and eb and ea[0] == eb[0] == "f" and ea[1:3] == eb[1:3]:
+                # Only the mtime differs
+                continue
+            elif ea and eb and ea[0] == eb[0]:
+                yield ("M", path, ea, eb)
+            else:
+                if ea:
+                    yield from self._all(ea, path, "D")
+                if eb:
+                    yield from self._all(eb, path, "A")
+
+    def _all(self, entry, path, status):
+        """Every file under one added or deleted entry."""
+        if entry[0] != "d":
+            yield (status, path, entry if status == "D" else None, entry if status == "A" else None)
+            return
+        for name, child in sorted(self._tree(entry[1]).items()):
+            yield from self._all(child, f"{path}/{name}", status)
+
+    def _content(self, entry, path, live):
+        if entry is None:
+            return b""
+        if entry[0] == "l":
+            return f"-> {entry[1]}\n".encode("utf-8")
+        if entry[0] != "f":
+            return None
+        source = os.path.join(self.root, path) if live else self._object_path(entry[1])
+        with open(source, "rb") as f:
+            return f.read(MAX_FILE_BYTES)
+
+    def diff(self, id, to=None, path=None):
+        with self._lock:
+            record = self.find(id)
+            if to:
+                other, live, label_b = self.find(to), False, to
+                tree_b = other["tree"]
+            else:
+                tree_b, _ = self._current_tree(store=False)
+                live, label_b = True, "workspace"
+            prefix = (path or "").strip("/")
+            found = [c for c in self.changes(record["tree"], tree_b)
+                     if not prefix or c[1] == prefix or c[1].startswith(prefix + "/")]
+            if not found:
+                return f"🔍 No differences between {record['id']} and {label_b}" + (f" under {prefix}" if prefix else "")
+            counts = {s: sum(c[0] == s for c in found) for s in "MAD"}
+            lines = [f"🔍 {record['id']} ({record['label']}) → {label_b}: {counts['M']} modified, "
+                     f"{counts['A']} added, {counts['D']} deleted"]
+            lines += [f"{status} {name}" for status, name, _, _ in found[:200]]
+            if len(found) > 200:
+                lines.append(f"... and {len(found) - 200} more files")
+            budget = MAX_DIFF_LINES
+            for status, name, ea, eb in found:
+                if budget <= 0:
+                    lines.append("[... diff truncated; pass path to see one file ...]")
+                    break
+                old, new = self._content(ea, name, False), self._content(eb, name, live)
+                if old is None or new is None or b"\0" in old[:8192] or b"\0" in new[:8192]:
+                    lines.append(f"Binary or large file {name} differs")
+                    continue
+                body = list(difflib.unified_diff(
+                    old.decode("utf-8", "replace").splitlines(), new.decode("utf-8", "replace").splitlines(),
+                    f"{record['id']}/{name}", f"{label_b}/{name}", lineterm=""))
+                lines += body[:budget]
+                budget -= len(body)
+            return "\n".join(lines)
+
+
+def _remove(path):
+    if os.path.islink(path) or os.path.isfile(path):
+        os.remove(path)
+    elif os.path.isdir(path):
+        shutil.rmtree(path)
+
+
+def get_store():
+    """The active workspace's checkpoint store."""
+    return workspace.current().state("checkpoints", lambda ws: CheckpointStore(ws.root))
+
+
+def auto_checkpoint(label, tools=None):
+    """
+    Checkpoints the workspace after a turn whose `tools` could change files
+    (or unconditionally when tools is None). Returns the new id, or None if
+    disabled, not needed or nothing changed.
+    """
+    if not ENABLED or (tools is not None and not MUTATING.intersection(tools)):
+        return None
+    store = get_store()
+    if store.too_large:
+        return None
+    try:
+        record, created = store.create(label, auto=True)
+    except CheckpointError as e:
+        store.too_large = str(e)
+        print(f"⚠️ Automatic checkpoints are off for this workspace: {e}")
+        return None
+    except OSError:
+        return None
+    return record["id"] if created else None
+
+
+def checkpoint(label=None):
+    """Saves a checkpoint of the workspace now."""
+    store = get_store()
+    try:
+        record, _ = store.create(label or "manual checkpoint")
+        # From here on only changes are copied, so automatic checkpoints can resume
+        store.too_large = None
+    except CheckpointError as e:
+        return f"❌ {e}"
+    except OSError as e:
+        return f"❌ Error: could not save a checkpoint ({e})"
+    return (f"📸 Checkpoint {record['id']} saved: {record['files']} files, "
+            f"{_format_size(record['new_bytes'])} of new data, {record['seconds'] * 1000:.0f} ms.")
+
+
+def restore(id):
+    """Restores the workspace to checkpoint `id` (e.g. cp-3)."""
+    try:
+        record, before, written, removed = get_store().restore(id)
+    except CheckpointError as e:
+        return f"❌ {e}"
+    except OSError as e:
+        return f"❌ Error: could not restore {id} ({e})"
+    return (f"⏪ Restored {record['id']} ({record['label']}): {written} files written, {removed} removed. "
+            f"The state before the restore is {before['id']}.")
+
+
+def diff(id, to=None, path=None):
+    """Shows what changed between checkpoint `id` and the workspace (or checkpoint `to`)."""
+    try:
+        return get_store().diff(id, to, path)
+    except CheckpointError as e:
+        return f"❌ {e}"
+    except OSError as e:
+        return f"❌ Error: could not diff {id} ({e})"
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="mini-cursor checkpoints", description="List, take, restore and diff workspace checkpoints.")
+    parser.add_argument("--root", default=".", help="workspace folder (default: the current directory)")
+    commands = parser.add_subparsers(dest="command")
+    commands.add_parser("list", help="list checkpoints (the default)")
+    create = commands.add_parser("create", help="take a checkpoint now")
+    create.add_argument("label", nargs="?", default=None)
+    back = commands.add_parser("restore", help="restore the workspace to a checkpoint")
+    back.add_argument("id")
+    compare = commands.add_parser("diff", help="show changes since a checkpoint (or between two)")
+    compare.add_argument("id")
+    compare.add_argument("to", nargs="?", default=None)
+    compare.add_argument("--path", default=None, help="limit the diff to a file or folder")
+    args = parser.parse_args(argv)
+
+    with workspace.activate(workspace.Workspace(args.root)):
+        if args.command == "create":
+            print(checkpoint(args.label))
+        elif args.command == "restore":
+            print(restore(args.id))
+        elif args.command == "diff":
+            print(diff(args.id, args.to, args.path))
+        else:
+            records = get_store().records()
+            if not records:
+                print("No checkpoints yet.")
+            for record in records:
+                created = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(record["created"]))
+                print(f"{record['id']:>8}  {created}  {record['files']:>7} files  "
+                      f"+{_format_size(record['new_bytes']):>9}  {record['label']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+"""
+Command-line entry point: `mini-cursor`, `python -m mini_cursor`, or the
+chat.py/chat2.py scripts. Only the standard library and python-dotenv are
+imported before the `> ` prompt; the OpenAI client is built on the first
+request.
+"""
+import argparse
+
+
+def main(argv=None, profile=None):
+    import sys
+
+    argv = sys.argv[1:] if argv is None else argv
+    if argv[:1] == ["checkpoints"]:
+        # `mini-cursor checkpoints ...` needs neither the model client nor .env
+        from .checkpoints import main as checkpoints_main
+
+        return checkpoints_main(argv[1:])
+
+    # .env first, so every AGENT_* setting read at import time sees it
+    from dotenv import load_dotenv
+
+    load_dotenv()
+
+    from .agent import Session
+    from .profiles import DEFAULT_PROFILE, PROFILES
+
+    parser = argparse.ArgumentParser(prog="mini-cursor", description="Terminal-based coding agent.")
+    parser.add_argument("--profile", default=profile or DEFAULT_PROFILE, choices=sorted(PROFILES),
+                        help="prompt profile (default AGENT_PROFILE or chat)")
+    parser.add_argument("--protocol", choices=["json", "tools"], default=None,
+                        help="how tool calls are exchanged (default AGENT_PROTOCOL or json)")
+    parser.add_argument("--serve", type=int, metavar="PORT", default=None,
+                        help="serve many sessions over HTTP instead of the prompt (see server.py)")
+    args = parser.parse_args(argv)
+
+    if args.serve is not None:
+        from .server import serve
+
+        return serve(port=args.serve, profile=args.profile, protocol=args.protocol)
+
+    session = Session(profile=args.profile, protocol=args.protocol)
+    try:
+        while True:
+            try:
+                user_query = input('> ')
+            except (EOFError, KeyboardInterrupt):
+                print()
+                return
+            # Ctrl-C during a request cancels just that request
+            if user_query.strip():
+                session.run(user_query)
+    finally:
+        session.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""
+Model client construction and the small async adapters the agent core uses.
+
+Clients are AsyncOpenAI instances sharing one tuned httpx connection pool
+per event loop (keep-alive, HTTP/2 when the `h2` package is installed), so
+consecutive requests and concurrent sessions reuse warm connections.
+openai and httpx are only imported when the first client is built.
+
+The core also accepts synchronous clients (an OpenAI client, the scripted
+models in benchmarks/): `create` results are awaited only when awaitable,
+and streams are iterated whichever protocol they implement.
+"""
+import importlib.util
+import inspect
+import os
+import weakref
+
+
+BASE_URL = os.getenv("AGENT_BASE_URL", "https://generativelanguage.googleapis.com/v1beta/openai/")
+# Total seconds for one model call, including reading the whole stream
+REQUEST_TIMEOUT = float(os.getenv("AGENT_REQUEST_TIMEOUT", "120"))
+CONNECT_TIMEOUT = float(os.getenv("AGENT_CONNECT_TIMEOUT", "10"))
+MAX_CONNECTIONS = int(os.getenv("AGENT_HTTP_MAX_CONNECTIONS", "20"))
+KEEPALIVE_SECS = float(os.getenv("AGENT_HTTP_KEEPALIVE_SECS", "60"))
+
+# One pool per event loop: httpx connections cannot move between loops
+_pools = weakref.WeakKeyDictionary()
+
+
+def http_client():
+    """The shared httpx.AsyncClient for the running event loop."""
+    import asyncio
+
+    import httpx
+
+    loop = asyncio.get_running_loop()
+    pool = _pools.get(loop)
+    if pool is None or pool.is_closed:
+        pool = httpx.AsyncClient(
+            http2=importlib.util.find_spec("h2") is not None,
+            limits=httpx.Limits(
+                max_connections=MAX_CONNECTIONS,
+                max_keepalive_connections=MAX_CONNECTIONS,
+                keepalive_expiry=KEEPALIVE_SECS,
+            ),
+            timeout=httpx.Timeout(REQUEST_TIMEOUT, connect=CONNECT_TIMEOUT),
+        )
+        _pools[loop] = pool
+    return pool
+
+
+async def close_pool():
+    """Closes the running loop's shared pool (e.g. before the loop is closed)."""
+    import asyncio
+
+    pool = _pools.pop(asyncio.get_running_loop(), None)
+    if pool is not None:
+        await pool.aclose()
+
+
+def make_client():
+    """
+    Builds the model client on the running loop's shared pool
+    (AGENT_BASE_URL points it at mock_server.py or another compatible endpoint).
+    """
+    from openai import AsyncOpenAI
+
+    from .llm_cache import wrap_client
+
+    client = AsyncOpenAI(api_key=os.getenv("GEMINI_API_KEY"), base_url=BASE_URL, http_client=http_client())
+    # Record/replay response cache (AGENT_LLM_CACHE=on|record|replay)
+    return wrap_client(client)
+
+
+async def maybe_await(value):
+    if inspect.isawaitable(value):
+        return await value
+    return value
+
+
+async def create(client, **params):
+    """`client.chat.completions.create(**params)` for sync and async clients alike."""
+    return await maybe_await(client.chat.completions.create(**params))
+
+
+async def iterate(stream):
+    """Yields the chunks of an async or a sync stream."""
+    if hasattr(stream, "__aiter__"):
+        async for chunk in stream:
+            yield chunk
+    else:
+        for chunk in stream:
+            yield chunk
+
+
+async def close(stream):
+    closer = getattr(stream, "close", None)
+    if closer is not None:
+        await maybe_await(closer())
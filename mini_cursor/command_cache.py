@@ -0,0 +1,273 @@
+"""
+Result cache in front of run_command for commands that are safe to skip.
+
+Dependency installs (`npm install`, `pip install -r ...`, `poetry install`,
+...) are keyed on the content of their manifests and lockfiles plus the
+state of the installed tree (node_modules, site-packages); read-only
+commands (`ls`, `cat`, `grep`, `node -v`, ...) are keyed on the mtimes of
+the paths they look at. Fingerprints are taken when a command finishes, so
+running it again while nothing it depends on has changed is answered from
+the cache, marked as such. Only successful runs are cached, and any other
+command run in the shell drops the read-only entries, since it may have
+changed something the fingerprints do not see. `fresh=true` on run_command
+bypasses the cache; AGENT_COMMAND_CACHE=0 disables it.
+"""
+import glob
+import hashlib
+import os
+import shlex
+import shutil
+import site
+import threading
+import time
+
+from . import workspace
+
+
+ENABLED = os.getenv("AGENT_COMMAND_CACHE", "1") != "0"
+# Recursive read-only commands over bigger trees are not worth fingerprinting
+MAX_WALK = 5000
+
+READ_ONLY = {"ls", "cat", "head", "tail", "wc", "pwd", "tree", "find", "grep", "rg", "du", "stat", "file",
+             "diff", "cmp", "sort", "uniq", "nl"}
+RECURSIVE = {"tree", "find", "rg", "du"}
+VERSION_FLAGS = {"-v", "-V", "--version", "version"}
+# Tools whose `<tool> --version` is answered from the cache
+VERSIONED = {"node", "npm", "npx", "yarn", "pnpm", "bun", "deno", "tsc", "python", "python3", "pip", "pip3", "uv",
+             "poetry", "go", "cargo", "rustc", "java", "javac", "ruby", "gem", "php", "git", "docker"}
+# Flags that make an otherwise read-only command write, run something or never finish
+UNSAFE_FLAGS = {"-exec", "-execdir", "-ok", "-okdir", "-delete", "-fprint", "-fprintf", "-fls",
+                "-o", "--output", "-f", "-F", "--follow"}
+
+NODE_MANIFESTS = ("package.json", "package-lock.json", "npm-shrinkwrap.json", "yarn.lock", "pnpm-lock.yaml",
+                  "bun.lockb")
+NODE_TREE = ("node_modules", "node_modules/.package-lock.json", "node_modules/.yarn-integrity",
+             "node_modules/.modules.yaml", "node_modules/.yarn-state.yml")
+PYTHON_MANIFESTS = ("pyproject.toml", "setup.py", "setup.cfg", "poetry.lock", "uv.lock", "Pipfile", "Pipfile.lock")
+VENVS = (".venv", "venv", "env")
+
+
+def _segments(command):
+    """Splits a command line into ([argv, ...], [operator, ...]), or None if it does anything fancier."""
+    if "$" in command or "`" in command:
+        return None
+    lexer = shlex.shlex(command, posix=True, punctuation_chars=True)
+    lexer.whitespace_split = True
+    try:
+        tokens = list(lexer)
+    except ValueError:
+        return None
+    segments, ops, current = [], [], []
+    for token in tokens:
+        if token in ("&&", "|", ";"):
+            segments.append(current)
+            ops.append(token)
+            current = []
+        elif set(token) <= set("&|;<>()"):
+            # Redirects, background jobs, subshells
+            return None
+        else:
+            current.append(token)
+    segments.append(current)
+    if not all(segments):
+        return None
+    return segments, ops
+
+
+def _stat(path):
+    try:
+        st = os.stat(path)
+    except OSError:
+        return (path, None)
+    return (path, st.st_mtime_ns, st.st_size)
+
+
+def _digest(path):
+    try:
+        with open(path, "rb") as f:
+            return (path, hashlib.sha256(f.read()).hexdigest())
+    except OSError:
+        return (path, None)
+
+
+def _listing(path, recursive):
+    """Stats of a directory and its entries (recursively), or None past MAX_WALK entries."""
+    stats = [_stat(path)]
+    if not os.path.isdir(path):
+        return stats
+    if not recursive:
+        try:
+            names = sorted(os.listdir(path))
+        except OSError:
+            return stats
+        if len(names) > MAX_WALK:
+            return None
+        return stats + [_stat(os.path.join(path, name)) for name in names]
+    for directory, dirs, files in os.walk(path):
+        dirs.sort()
+        for name in dirs + sorted(files):
+            stats.append(_stat(os.path.join(directory, name)))
+        if len(stats) > MAX_WALK:
+            return None
+    return stats
+
+
+def _site_packages(directory):
+    """Site-packages folders an install run from `directory` may have changed."""
+    found = []
+    for venv in VENVS:
+        found += glob.glob(os.path.join(directory, venv, "lib", "python*", "site-packages"))
+        found += glob.glob(os.path.join(directory, venv, "Lib", "site-packages"))
+    if os.getenv("VIRTUAL_ENV"):
+        found += glob.glob(os.path.join(os.environ["VIRTUAL_ENV"], "lib", "python*", "site-packages"))
+    found += site.getsitepackages() + [site.getusersitepackages()]
+    return sorted(set(found))
+
+
+def _install_kind(argv):
+    """'node' or 'python' when argv installs dependencies, else None."""
+    name = os.path.basename(argv[0])
+    rest = argv[1:]
+    if name in ("npm", "pnpm", "bun") and rest[:1] and rest[0] in ("install", "i", "ci", "add"):
+        return "node"
+    if name == "yarn" and (not rest or rest[0] in ("install", "add")):
+        return "node"
+    if name in ("python", "python3") and rest[:2] == ["-m", "pip"]:
+        name, rest = "pip", rest[2:]
+    if name == "uv" and rest[:1] == ["pip"]:
+        name, rest = "pip", rest[1:]
+    if name in ("pip", "pip3") and rest[:1] == ["install"]:
+        return "python"
+    if (name, rest[:1]) in (("poetry", ["install"]), ("uv", ["sync"]), ("pipenv", ["install"]), ("pipenv", ["sync"])):
+        return "python"
+    return None
+
+
+def _install_fingerprint(kind, argv, directory):
+    if kind == "node":
+        return tuple(_digest(os.path.join(directory, name)) for name in NODE_MANIFESTS) + tuple(
+            _stat(os.path.join(directory, name)) for name in NODE_TREE)
+    manifests = [os.path.join(directory, name) for name in PYTHON_MANIFESTS]
+    for flag, value in zip(argv, argv[1:]):
+        if flag in ("-r", "--requirement", "-c", "--constraint"):
+            manifests.append(os.path.join(directory, value))
+    for arg in argv[2:]:
+        # Local projects (`pip install -e .`): their build files are manifests too
+        if not arg.startswith("-") and os.path.isdir(os.path.join(directory, arg)):
+            manifests += [os.path.join(directory, arg, name) for name in PYTHON_MANIFESTS]
+    return tuple(_digest(path) for path in manifests) + tuple(_stat(path) for path in _site_packages(directory))
+
+
+def _read_only(segments):
+    return all(
+        (len(argv) == 2 and argv[0] in VERSIONED and argv[1] in VERSION_FLAGS)
+        or (os.path.basename(argv[0]) in READ_ONLY and not UNSAFE_FLAGS.intersection(argv[1:]))
+        for argv in segments
+    )
+
+
+def _read_only_fingerprint(segments, cwd):
+    """Stats of everything a read-only pipeline looks at, or None if that is too much."""
+    stats = [_stat(cwd)]
+    for argv in segments:
+        name = os.path.basename(argv[0])
+        if len(argv) == 2 and argv[0] in VERSIONED and argv[1] in VERSION_FLAGS:
+            # The executable our PATH finds; a PATH changed inside the shell drops the entry anyway
+            stats.append(_stat(shutil.which(argv[0]) or argv[0]))
+            continue
+        recursive = name in RECURSIVE or any(a in ("-r", "-R", "--recursive") for a in argv[1:])
+        paths = [a for a in argv[1:] if not a.startswith("-") and os.path.exists(os.path.join(cwd, a))]
+        if not paths and name in ("ls", "tree", "find", "rg", "du", "grep"):
+            paths = ["."]
+        for path in paths:
+            listing = _listing(os.path.normpath(os.path.join(cwd, path)), recursive)
+            if listing is None:
+                return None
+            stats += listing
+    return tuple(stats)
+
+
+def classify(command, cwd):
+    """
+    (kind, directory, prefix) for a cacheable command: kind is "install" or
+    "read-only", directory where it runs and prefix the `cd` commands
+    leading up to an install. None when the command is not cacheable.
+    """
+    parsed = _segments(command.strip())
+    if parsed is None:
+        return None
+    segments, ops = parsed
+    *cds, last = segments
+    if all(op == "&&" for op in ops) and all(argv[0] == "cd" and len(argv) == 2 for argv in cds):
+        directory = cwd
+        for argv in cds:
+            directory = os.path.normpath(os.path.join(directory, os.path.expanduser(argv[1])))
+        if _install_kind(last):
+            return "install", directory, " && ".join(shlex.join(argv) for argv in cds)
+    if _read_only(segments):
+        return "read-only", cwd, ""
+    return None
+
+
+def fingerprint(command, kind, directory):
+    segments, _ = _segments(command.strip())
+    if kind == "install":
+        argv = segments[-1]
+        return _install_fingerprint(_install_kind(argv), argv, directory)
+    return _read_only_fingerprint(segments, directory)
+
+
+class CommandCache:
+    """Successful results of cacheable commands, keyed by (directory, command)."""
+
+    def __init__(self):
+        self.entries = {}
+        self.hits = 0
+        self.saved = 0.0
+        self._lock = threading.Lock()
+
+    def lookup(self, command, cwd):
+        """(entry, prefix) when a cached result still applies, else (None, classification)."""
+        found = classify(command, cwd)
+        if found is None:
+            return None, None
+        kind, directory, prefix = found
+        with self._lock:
+            entry = self.entries.get((directory, command.strip()))
+        if entry is not None and entry["fingerprint"] == fingerprint(command, kind, directory) is not None:
+            with self._lock:
+                self.hits += 1
+                self.saved += entry["seconds"]
+            return entry, found
+        return None, found
+
+    def store(self, command, found, code, summary, seconds):
+        """Records a finished run; anything but a read-only command drops the read-only entries."""
+        with self._lock:
+            if found is None or found[0] != "read-only":
+                self.entries = {k: e for k, e in self.entries.items() if e["kind"] != "read-only"}
+        if found is None or code != 0:
+            return
+        kind, directory, _ = found
+        current = fingerprint(command, kind, directory)
+        if current is None:
+            return
+        with self._lock:
+            self.entries[(directory, command.strip())] = {
+                "kind": kind, "fingerprint": current, "summary": summary, "seconds": seconds, "ran_at": time.time(),
+            }
+
+
+def get_command_cache():
+    """The active workspace's command cache."""
+    return workspace.current().state("commands", lambda ws: CommandCache())
+
+
+def describe_hit(entry):
+    ago = time.time() - entry["ran_at"]
+    if entry["kind"] == "install":
+        reason = "dependencies are already installed: the manifest, lockfile and installed packages are unchanged"
+    else:
+        reason = "read-only command and nothing it reads has changed"
+    return (f"♻️ Cached result from {ago:.0f}s ago ({reason}; skipped ~{entry['seconds']:.1f}s). "
+            f"Pass fresh=true to run it anyway.\n{entry['summary']}")
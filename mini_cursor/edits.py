@@ -0,0 +1,219 @@
+"""
+Patch-based file edits behind the edit_file tool.
+
+An edit is a search/replace pair. Edits can be given as dicts, as
+SEARCH/REPLACE blocks, or as a unified diff. apply_edit looks for an
+exact unique match first. Then it tries the same lines ignoring
+whitespace, keeping the file's own indentation. Last, it takes the most
+similar block of lines (FUZZY_RATIO). A miss reports the closest lines
+so the model can retry. edit_file applies every edit or none, and writes
+the result atomically.
+"""
+import difflib
+import os
+import re
+
+from . import workspace
+from .file_tools import atomic_write, get_read_cache
+
+
+FUZZY_RATIO = 0.85
+
+_BLOCK = re.compile(
+    r"^<{5,9} SEARCH[^\n]*\n(.*?)^={5,9}[ \t]*\n(.*?)^>{5,9} REPLACE[^\n]*$",
+    re.DOTALL | re.MULTILINE,
+)
+_HUNK = re.compile(r"^@@ -(\d+)(?:,(\d+))? \+\d+(?:,(\d+))? @@")
+
+
+class EditError(Exception):
+    pass
+
+
+def parse_blocks(text):
+    """Parses <<<<<<< SEARCH / ======= / >>>>>>> REPLACE blocks into edit dicts."""
+    edits = [{"search": m.group(1), "replace": m.group(2)} for m in _BLOCK.finditer(text)]
+    if not edits:
+        raise EditError("no SEARCH/REPLACE blocks found")
+    return edits
+
+
+def parse_unified_diff(diff):
+    """Turns each hunk of a unified diff into a search/replace edit with a line hint."""
+    edits = []
+    old_left = new_left = 0
+    for line in diff.splitlines():
+        match = _HUNK.match(line)
+        if match:
+            start, old_count, new_count = (int(g) if g is not None else 1 for g in match.groups())
+            edits.append({"search": [], "replace": [], "line": start})
+            old_left, new_left = old_count, new_count
+            continue
+        if old_left <= 0 and new_left <= 0:
+            continue  # file headers and anything between hunks
+        if line.startswith("\\"):
+            continue  # "\ No newline at end of file"
+        tag, body = (line[:1], line[1:]) if line else (" ", "")
+        if tag in " -":
+            edits[-1]["search"].append(body)
+            old_left -= 1
+        if tag in " +":
+            edits[-1]["replace"].append(body)
+            new_left -= 1
+    if not edits:
+        raise EditError("no @@ hunks found in diff")
+    return [
+        {
+            "search": "\n".join(e["search"]) + "\n",
+            "replace": "\n".join(e["replace"]) + "\n" if e["replace"] else "",
+            "line": e["line"],
+        }
+        for e in edits
+    ]
+
+
+def _norm(line):
+    return " ".join(line.split())
+
+
+def _indent(line):
+    return line[: len(line) - len(line.lstrip())]
+
+
+def _first_lines(numbers, limit=10):
+    numbers = list(numbers)
+    shown = ", ".join(str(n) for n in numbers[:limit])
+    return shown + (", ..." if len(numbers) > limit else "")
+
+
+def _line_number(text, index):
+    return text.count("\n", 0, index) + 1
+
+
+def _replace_lines(lines, start, end, search_lines, replace_lines, newline):
+    """
+    Replaces lines[start:end]. When the search block was matched ignoring
+    whitespace, replacement lines are re-indented the way the matched lines
+    differ from the search lines, so a wrongly indented block still fits.
+    """
+    indents = {}
+    for wanted, found in zip(search_lines, lines[start:end]):
+        if wanted.strip() and found.strip():
+            indents.setdefault(_indent(wanted), _indent(found.rstrip("\r\n")))
+    fixed = []
+    for line in replace_lines:
+        indent = _indent(line)
+        if line.strip() and indent in indents:
+            line = indents[indent] + line[len(indent):]
+        fixed.append(line + newline)
+    return lines[:start] + fixed + lines[end:]
+
+
+def apply_edit(text, search, replace, hint=None):
+    """
+    Applies one search/replace to `text`: an exact unique match first, then a
+    whitespace-insensitive line match, then the most similar block of lines
+    (difflib ratio >= FUZZY_RATIO). `hint` (a 1-based line) picks between
+    several equal matches.
+    """
+    if not search.strip():
+        raise EditError("empty search block")
+
+    count = text.count(search)
+    if count == 1 or (count > 1 and hint is not None):
+        positions = [m.start() for m in re.finditer(re.escape(search), text)]
+        index = min(positions, key=lambda p: abs(_line_number(text, p) - hint)) if count > 1 else positions[0]
+        return text[:index] + replace + text[index + len(search):]
+    if count > 1:
+        raise EditError(
+            f"search block matches {count} places (lines {_first_lines(_line_number(text, m.start()) for m in re.finditer(re.escape(search), text))}); "
+            "add surrounding lines to make it unique"
+        )
+
+    newline = "\r\n" if "\r\n" in text else "\n"
+    lines = text.splitlines(keepends=True)
+    search_lines = search.rstrip("\r\n").splitlines()
+    replace_lines = replace.rstrip("\r\n").splitlines() if replace.strip("\r\n") else []
+    size = len(search_lines)
+    wanted = [_norm(l) for l in search_lines]
+    normalized = [_norm(l) for l in lines]
+
+    starts = [i for i in range(len(lines) - size + 1) if normalized[i:i + size] == wanted]
+    if starts:
+        if len(starts) > 1 and hint is None:
+            raise EditError(
+                f"search block matches {len(starts)} places (lines {_first_lines(i + 1 for i in starts)}) "
+                "ignoring whitespace; add surrounding lines to make it unique"
+            )
+        start = min(starts, key=lambda i: abs(i + 1 - hint)) if hint is not None else starts[0]
+        return "".join(_replace_lines(lines, start, start + size, search_lines, replace_lines, newline))
+
+    target = "\n".join(wanted)
+    best, best_ratio = None, -1.0
+    matcher = difflib.SequenceMatcher(autojunk=False)
+    matcher.set_seq2(target)
+    for i in range(len(lines) - size + 1):
+        matcher.set_seq1("\n".join(normalized[i:i + size]))
+        if matcher.real_quick_ratio() < best_ratio or matcher.quick_ratio() < best_ratio:
+            continue
+        ratio = matcher.ratio()
+        if ratio > best_ratio or (ratio == best_ratio and hint is not None and best is not None
+                                  and abs(i + 1 - hint) < abs(best + 1 - hint)):
+            best, best_ratio = i, ratio
+    if best is not None and best_ratio >= FUZZY_RATIO:
+        return "".join(_replace_lines(lines, best, best + size, search_lines, replace_lines, newline))
+
+    if best is None:
+        raise EditError("search block not found (file is shorter than the block)")
+    snippet = "".join(lines[best:best + size]).rstrip("\n")
+    raise EditError(
+        f"search block not found; closest match is lines {best + 1}-{best + size} "
+        f"({best_ratio:.0%} similar):\n{snippet}"
+    )
+
+
+def edit_file(path, edits=None, diff=None):
+    """
+    Patches a file with search/replace edits or a unified diff and writes it
+    atomically. Either every edit applies or the file is left untouched.
+    """
+    target = workspace.current().resolve(path)
+    if not os.path.exists(target):
+        return f"❌ {path} not found; use write_file to create it"
+    try:
+        if diff:
+            changes = parse_unified_diff(diff)
+        elif isinstance(edits, str):
+            changes = parse_blocks(edits)
+        elif isinstance(edits, dict):
+            changes = [edits]
+        elif isinstance(edits, list) and edits:
+            changes = edits
+        else:
+            raise EditError('pass "edits" (a list of {"search", "replace"} or SEARCH/REPLACE blocks) or "diff"')
+    except EditError as e:
+        return f"❌ edit_file {path}: {e}"
+
+    with open(target, "r", encoding="utf-8", newline="") as f:
+        original = f.read()
+    text = original
+    for number, change in enumerate(changes, 1):
+        try:
+            if not isinstance(change, dict) or "search" not in change:
+                raise EditError('each edit needs "search" and "replace"')
+            text = apply_edit(text, change["search"], change.get("replace", ""), change.get("line"))
+        except EditError as e:
+            return f"❌ edit {number} of {len(changes)} in {path} failed, nothing was written: {e}"
+
+    if text == original:
+        return f"⚠️ {path}: edits matched but produced no change"
+    atomic_write(target, text)
+    get_read_cache().remember(target, "write")
+
+    added = removed = 0
+    for line in difflib.unified_diff(original.splitlines(), text.splitlines(), lineterm="", n=0):
+        if line.startswith("+") and not line.startswith("+++"):
+            added += 1
+        elif line.startswith("-") and not line.startswith("---"):
+            removed += 1
+    return f"✏️ {path}: applied {len(changes)} edit(s) (+{added} -{removed} lines)"
@@ -0,0 +1,197 @@
+"""
+Config-driven rule engine behind fix_errors.
+
+Rules live in error_rules.json (plus any files listed in AGENT_ERROR_RULES,
+separated by os.pathsep, whose rules are added or replace built-in ones of
+the same name). A rule is
+
+    {"name": "...", "regex": "..." | "literal": "...", "ignore_case": false,
+     "keywords": ["..."], "suggestion": "text with {field} placeholders",
+     "defaults": {...}, "priority": 50}
+
+where the fields are the named groups of the regex and the keywords are
+literal strings, one of which appears (case-sensitively) in every line the
+rule matches. All rules are compiled into one matcher: an alternation of
+the keywords, which `re` can skip through quickly, plus the full pattern
+of any rule without keywords. It runs over the log a block at a time, so
+the log is read once, in bounded memory, however large it is; only the
+lines it flags are matched against the individual rules to pull out their
+fields. Rules are line-oriented. Suggestions are deduplicated and ranked
+by priority, then by how often they were hit.
+"""
+import io
+import json
+import os
+import re
+import threading
+
+
+RULES_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "error_rules.json")
+EXTRA_RULES = os.getenv("AGENT_ERROR_RULES", "")
+BLOCK_CHARS = 1 << 20
+# A "line" longer than this is split, so one huge line cannot exhaust memory
+MAX_LINE_CHARS = 1 << 16
+MAX_FINDINGS = 1000
+MAX_SUGGESTIONS = 10
+
+_NAMED_GROUP = re.compile(r"\(\?P<(\w+)>|\(\?P=(\w+)\)")
+
+
+class Rule:
+    def __init__(self, spec, source):
+        self.name = spec.get("name")
+        self.suggestion = spec.get("suggestion")
+        if not self.name or not self.suggestion:
+            raise ValueError(f"{source}: every rule needs a name and a suggestion")
+        if ("regex" in spec) == ("literal" in spec):
+            raise ValueError(f"{source}: rule {self.name!r} needs exactly one of regex or literal")
+        self.pattern = spec["regex"] if "regex" in spec else re.escape(spec["literal"])
+        self.ignore_case = bool(spec.get("ignore_case"))
+        self.defaults = dict(spec.get("defaults") or {})
+        self.priority = int(spec.get("priority", 50))
+        self.keywords = spec.get("keywords") or (
+            [spec["literal"]] if "literal" in spec and not self.ignore_case else None)
+        try:
+            self.regex = re.compile(self.pattern, re.IGNORECASE if self.ignore_case else 0)
+        except re.error as e:
+            raise ValueError(f"{source}: rule {self.name!r} has a bad regex ({e})") from e
+
+    def alternative(self, index):
+        """This rule's pattern for the combined matcher, with its group names made unique."""
+        def rename(m):
+            return f"(?P<r{index}_{m.group(1)}>" if m.group(1) else f"(?P=r{index}_{m.group(2)})"
+
+        pattern = _NAMED_GROUP.sub(rename, self.pattern)
+        return f"(?i:{pattern})" if self.ignore_case else f"(?:{pattern})"
+
+    def suggest(self, line):
+        """The suggestion for `line`, or None if this rule does not match it."""
+        if self.keywords and not any(keyword in line for keyword in self.keywords):
+            return None
+        m = self.regex.search(line)
+        if m is None:
+            return None
+        fields = dict(self.defaults)
+        fields.update({k: v.strip() for k, v in m.groupdict().items() if v})
+        return self.suggestion.format_map(_Fields(fields))
+
+
+class _Fields(dict):
+    def __missing__(self, key):
+        return ""
+
+
+class RuleSet:
+    def __init__(self, rules):
+        self.rules = rules
+        keywords = sorted({keyword for rule in rules for keyword in rule.keywords or ()})
+        patterns = [rule.alternative(i) for i, rule in enumerate(rules) if not rule.keywords]
+        self.combined = re.compile("|".join([re.escape(keyword) for keyword in keywords] + patterns))
+
+    @classmethod
+    def load(cls, paths):
+        rules = {}
+        for path in paths:
+            with open(path, "r", encoding="utf-8") as f:
+                try:
+                    specs = json.load(f)
+                except ValueError as e:
+                    raise ValueError(f"{path}: not valid JSON ({e})") from e
+            if not isinstance(specs, list):
+                raise ValueError(f"{path}: expected a list of rules")
+            for spec in specs:
+                rule = Rule(spec, path)
+                rules[rule.name] = rule
+        return cls(list(rules.values()))
+
+    def scan(self, stream):
+        """
+        Reads a text stream once and returns (findings, lines, chars).
+        findings maps (rule, suggestion) to {"priority", "count", "line", "example"}.
+        """
+        findings = {}
+        line_number = 1
+        chars = 0
+        carry = ""
+        ends_with_newline = True
+        while True:
+            block = stream.read(BLOCK_CHARS)
+            text = carry + block
+            if not text:
+                break
+            carry = ""
+            if block:
+                # Only whole lines are scanned; the unfinished tail waits for the next block
+                cut = text.rfind("\n") + 1
+                if cut == 0 and len(text) < MAX_LINE_CHARS:
+                    carry = text
+                    continue
+                if cut:
+                    text, carry = text[:cut], text[cut:]
+            chars += len(text)
+            self._scan_block(text, line_number, findings)
+            line_number += text.count("\n")
+            ends_with_newline = text.endswith("\n")
+        lines = line_number - 1 if ends_with_newline else line_number
+        return findings, lines, chars
+
+    def _scan_block(self, text, first_line, findings):
+        counted_to, line_number, last_start = 0, first_line, -1
+        for m in self.combined.finditer(text):
+            start = text.rfind("\n", 0, m.start()) + 1
+            if start == last_start:
+                continue
+            last_start = start
+            end = text.find("\n", m.start())
+            line = text[start:end if end != -1 else len(text)]
+            line_number += text.count("\n", counted_to, start)
+            counted_to = start
+            for rule in self.rules:
+                suggestion = rule.suggest(line)
+                if suggestion is None:
+                    continue
+                key = (rule.name, suggestion)
+                finding = findings.get(key)
+                if finding is not None:
+                    finding["count"] += 1
+                elif len(findings) < MAX_FINDINGS:
+                    findings[key] = {"priority": rule.priority, "count": 1, "line": line_number,
+                                     "example": line.strip()[:160]}
+
+
+def ranked(findings):
+    """Findings as (rule, suggestion, finding), most important first."""
+    order = sorted(findings.items(), key=lambda item: (-item[1]["priority"], -item[1]["count"], item[1]["line"]))
+    return [(rule, suggestion, finding) for (rule, suggestion), finding in order]
+
+
+_rules = None
+_rules_lock = threading.Lock()
+
+
+def get_rules():
+    """The built-in rules plus AGENT_ERROR_RULES, compiled once."""
+    global _rules
+    with _rules_lock:
+        if _rules is None:
+            _rules = RuleSet.load([RULES_PATH] + [p for p in EXTRA_RULES.split(os.pathsep) if p])
+    return _rules
+
+
+def diagnose(stream, limit=MAX_SUGGESTIONS):
+    """Scans a text stream and returns the ranked suggestions as one observation."""
+    findings, lines, _ = get_rules().scan(stream)
+    if not findings:
+        return "No specific error fix found. Please review the error log manually."
+    found = ranked(findings)
+    out = [f"🩺 {len(found)} distinct issue(s) in {lines} log lines, most important first:"]
+    for i, (rule, suggestion, finding) in enumerate(found[:limit], 1):
+        times = f", {finding['count']}x" if finding["count"] > 1 else ""
+        out.append(f"{i}. {suggestion} [{rule}{times}; first at line {finding['line']}: {finding['example']}]")
+    if len(found) > limit:
+        out.append(f"... and {len(found) - limit} more")
+    return "\n".join(out)
+
+
+def diagnose_text(text, limit=MAX_SUGGESTIONS):
+    return diagnose(io.StringIO(text), limit)
@@ -0,0 +1,115 @@
+"""
+Retrieval of the few-shot examples relevant to a request.
+
+Each profile's examples are text files under prompt_examples/<profile>/.
+An optional `Keywords:` first line and the example's User Query say what
+it is about. ExampleLibrary ranks them against the request with BM25 and
+appends the best AGENT_EXAMPLES_K to the user message. An example must
+share at least AGENT_EXAMPLES_MIN_OVERLAP with the request's topic, so
+unrelated requests get none. The system prompt therefore stays small and
+identical across requests.
+"""
+import math
+import os
+import re
+from collections import Counter
+
+from .history import estimate_tokens
+
+
+EXAMPLES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "prompt_examples")
+TOP_K = int(os.getenv("AGENT_EXAMPLES_K", "2"))
+# How much a request must share with an example's topic before the example is sent:
+# a word of its User Query line counts 2, one only in its Keywords line counts 1
+MIN_OVERLAP = int(os.getenv("AGENT_EXAMPLES_MIN_OVERLAP", "2"))
+
+_WORD = re.compile(r"[a-z0-9]+")
+_STOPWORDS = {
+    "a", "an", "and", "app", "at", "be", "build", "create", "for", "in", "it", "make", "me",
+    "my", "of", "on", "please", "run", "simple", "that", "the", "to", "using", "with",
+}
+
+
+def _terms(text):
+    return [w for w in _WORD.findall(text.lower()) if w not in _STOPWORDS and len(w) > 1]
+
+
+class Example:
+    def __init__(self, name, text):
+        self.name = name
+        lines = text.strip().splitlines()
+        keywords = ""
+        if lines and lines[0].startswith("Keywords:"):
+            keywords = lines.pop(0)[len("Keywords:"):]
+        self.text = "\n".join(lines)
+        query = next((l for l in lines if l.startswith("User Query:")), "")
+        # The query and keywords say what an example is about; the body only counts once.
+        self.terms = Counter(_terms(query) * 3 + _terms(keywords) * 3 + _terms(self.text))
+        self.query_terms = set(_terms(query))
+        self.keywords = set(_terms(keywords))
+        self.length = sum(self.terms.values())
+        self.tokens = estimate_tokens(self.text)
+
+
+class ExampleLibrary:
+    """
+    Few-shot examples kept as text files (one per example, optionally starting
+    with a `Keywords:` line) and ranked against the user query with BM25.
+    Only the top-k are sent, inside the user message, so the system prompt
+    stays byte-identical across requests and provider prefix caching can hit.
+    An example whose topic shares too little with the request (MIN_OVERLAP)
+    is never sent, however it ranks, so unrelated requests get none.
+    """
+
+    def __init__(self, directory, k=TOP_K, min_overlap=MIN_OVERLAP):
+        self.k = k
+        self.min_overlap = min_overlap
+        self.examples = []
+        for name in sorted(os.listdir(directory)):
+            if name.endswith(".txt"):
+                with open(os.path.join(directory, name), "r", encoding="utf-8") as f:
+                    self.examples.append(Example(name[:-4], f.read()))
+        self.document_freq = Counter(term for e in self.examples for term in e.terms)
+        self.avg_length = sum(e.length for e in self.examples) / max(1, len(self.examples))
+
+    def search(self, query, k=None):
+        """The k best-matching examples on the request's topic; none when nothing is close."""
+        k = self.k if k is None else k
+        if not self.examples or k <= 0:
+            return []
+        terms = set(_terms(query))
+        n = len(self.examples)
+        scored = []
+        for example in self.examples:
+            overlap = 2 * len(terms & example.query_terms) + len(terms & example.keywords - example.query_terms)
+            if overlap < self.min_overlap:
+                continue
+            score = 0.0
+            for term in terms:
+                tf = example.terms.get(term, 0)
+                if not tf:
+                    continue
+                df = self.document_freq[term]
+                idf = math.log(1 + (n - df + 0.5) / (df + 0.5))
+                score += idf * tf * 2.2 / (tf + 1.2 * (0.25 + 0.75 * example.length / self.avg_length))
+            if score > 0:
+                scored.append((score, example))
+        scored.sort(key=lambda item: -item[0])
+        return [example for _, example in scored[:k]]
+
+    def total_tokens(self):
+        return sum(e.tokens for e in self.examples)
+
+    def inject(self, query):
+        """
+        Returns (content, chosen, saved): the user message with the relevant
+        examples appended, the examples chosen, and the prompt tokens saved on
+        every call compared to sending the whole library.
+        """
+        chosen = self.search(query)
+        if not chosen:
+            return query, [], self.total_tokens()
+        block = "\n\n".join(f"Example:\n{e.text}" for e in chosen)
+        content = f"{query}\n\nExamples of similar tasks (follow the same step format):\n\n{block}"
+        saved = self.total_tokens() - (estimate_tokens(content) - estimate_tokens(query))
+        return content, chosen, saved
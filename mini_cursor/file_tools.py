@@ -0,0 +1,241 @@
+"""
+File reading and writing for the file tools.
+
+read_file reads a line or byte range of a file without decoding the rest;
+large files are memory-mapped. Binary files are described instead of
+decoded. A whole-file read over AGENT_READ_MAX_BYTES shows only its first
+and last lines. A per-workspace ReadCache answers the re-read of a file
+the model has already seen, and that is unchanged, with a short
+reference. atomic_write replaces a file through a temp file and a rename,
+and tells write_listeners (e.g. the project index).
+"""
+import mmap
+import os
+import tempfile
+
+from . import workspace
+
+
+# About a quarter of the default history budget, so one read never dominates the prompt
+MAX_READ_BYTES = int(os.getenv("AGENT_READ_MAX_BYTES", str(16 * 1024)))
+MMAP_THRESHOLD = 1024 * 1024
+SNIFF_BYTES = 8192
+
+# Called with the path after every atomic_write (e.g. to keep the project index fresh).
+write_listeners = []
+
+_MAGIC = [
+    (b"\x89PNG", "PNG image"),
+    (b"\xff\xd8\xff", "JPEG image"),
+    (b"GIF8", "GIF image"),
+    (b"RIFF", "RIFF media (WebP/WAV/AVI)"),
+    (b"%PDF", "PDF document"),
+    (b"PK\x03\x04", "ZIP archive (also jar/docx/xlsx)"),
+    (b"\x1f\x8b", "gzip archive"),
+    (b"\x7fELF", "ELF executable"),
+    (b"MZ", "Windows executable"),
+    (b"\x00asm", "WebAssembly module"),
+    (b"SQLite format 3", "SQLite database"),
+    (b"wOFF", "WOFF font"),
+    (b"wOF2", "WOFF2 font"),
+]
+
+
+class ReadCache:
+    """
+    Remembers which file versions the model has already seen this session,
+    keyed by (path, mtime, size), so an unchanged re-read can be answered
+    with a short reference instead of the whole body. Once the history has
+    compacted a turn's observations, the files read or written in it are
+    forgotten, since the model no longer has their content.
+    """
+
+    def __init__(self):
+        self.turn = 0
+        self.seen = {}
+
+    def next_turn(self, verbatim_turns=None):
+        """Starts a model turn; verbatim_turns is how many recent turns the history still holds in full."""
+        self.turn += 1
+        if verbatim_turns is not None:
+            oldest = self.turn - verbatim_turns
+            self.seen = {path: entry for path, entry in self.seen.items() if entry[2] >= oldest}
+
+    def lookup(self, path, st):
+        entry = self.seen.get(os.path.abspath(path))
+        if entry and entry[0] == st.st_mtime_ns and entry[1] == st.st_size:
+            return entry
+        return None
+
+    def remember(self, path, how="read"):
+        try:
+            st = os.stat(path)
+        except OSError:
+            return
+        self.seen[os.path.abspath(path)] = (st.st_mtime_ns, st.st_size, self.turn, how)
+
+
+def get_read_cache():
+    """The active workspace's read cache."""
+    return workspace.current().state("read_cache", lambda ws: ReadCache())
+
+
+def atomic_write(path, content):
+    """
+    Writes `content` to a temp file next to `path` and renames it into place,
+    so a crash mid-write never leaves a truncated file. Keeps the old mode.
+    """
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=directory or ".", prefix=f".{os.path.basename(path)}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8", newline="") as f:
+            f.write(content)
+            f.flush()
+            os.fsync(f.fileno())
+        if os.path.exists(path):
+            os.chmod(tmp, os.stat(path).st_mode & 0o7777)
+        else:
+            umask = os.umask(0)
+            os.umask(umask)
+            os.chmod(tmp, 0o666 & ~umask)
+        os.replace(tmp, path)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+    for listener in write_listeners:
+        listener(path)
+
+
+def _describe_binary(path, head, size):
+    kind = next((label for magic, label in _MAGIC if head.startswith(magic)), "binary data")
+    return f"📦 {path} is a binary file ({kind}, {size} bytes); not decoded."
+
+
+def _is_binary(head):
+    if b"\x00" in head:
+        return True
+    try:
+        head.decode("utf-8")
+    except UnicodeDecodeError as e:
+        # A multi-byte character cut off at the sniff boundary is still text.
+        return e.start < len(head) - 4
+    return False
+
+
+def _open_view(f, size):
+    """mmap for large files (no copy into Python memory), plain bytes otherwise."""
+    if size >= MMAP_THRESHOLD:
+        return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    return f.read()
+
+
+def _skip_lines(view, pos, count):
+    """Offset just past `count` newlines from `pos`, and how many were actually found."""
+    found = 0
+    size = len(view)
+    while found < count and pos < size:
+        chunk = view[pos:pos + 1024 * 1024]
+        newlines = chunk.count(b"\n")
+        if found + newlines < count:
+            found += newlines
+            pos += len(chunk)
+            continue
+        for _ in range(count - found):
+            pos = view.find(b"\n", pos) + 1
+        found = count
+    return pos, found
+
+
+def _line_range(view, start_line, end_line):
+    """Returns (text, total_lines_or_None) for 1-based inclusive line numbers."""
+    start, found = _skip_lines(view, 0, start_line - 1)
+    if found < start_line - 1 or start >= len(view):
+        return "", found
+    end, _ = _skip_lines(view, start, end_line - start_line + 1)
+    return bytes(view[start:end]).decode("utf-8", errors="replace"), None
+
+
+def _head_and_tail(file_path, view, size):
+    """The first and last whole lines of a large file, within MAX_READ_BYTES, and how to read the rest."""
+    half = MAX_READ_BYTES // 2
+    head_end = bytes(view[:half]).rfind(b"\n") + 1 or half
+    tail_start = size - half
+    cut = bytes(view[tail_start:tail_start + half]).find(b"\n")
+    tail_start = tail_start + cut + 1 if cut != -1 else tail_start
+    head = bytes(view[:head_end])
+    tail = bytes(view[tail_start:])
+    lines = _skip_lines(view, 0, size)[1] + (0 if bytes(view[-1:]) == b"\n" else 1)
+    head_lines = head.count(b"\n")
+    tail_first = lines - tail.count(b"\n") + (1 if tail.endswith(b"\n") else 0)
+    return (
+        f"{head.decode('utf-8', errors='replace')}"
+        f"[... {file_path} is {size} bytes / {lines} lines; showing lines 1-{head_lines} and {tail_first}-{lines}. "
+        f"Read lines {head_lines + 1}-{tail_first - 1} with start_line/end_line (or offset/length) ...]\n"
+        f"{tail.decode('utf-8', errors='replace')}"
+    )
+
+
+def read_file(file_path, start_line=None, end_line=None, offset=None, length=None, force=False):
+    """
+    Reads a text file, optionally just a line range (1-based, inclusive) or a
+    byte range. Binary files are summarized instead of decoded, files over
+    MAX_READ_BYTES are shown as their first and last lines with a hint to
+    read ranges, and a whole-file re-read of an unchanged file returns a
+    short reference unless `force`.
+    """
+    path = workspace.current().resolve(file_path)
+    if not os.path.exists(path):
+        return "❌ File not found"
+    if os.path.isdir(path):
+        return f"❌ {file_path} is a directory"
+    st = os.stat(path)
+    read_cache = get_read_cache()
+    ranged = start_line is not None or end_line is not None or offset is not None or length is not None
+
+    if not ranged and not force:
+        seen = read_cache.lookup(path, st)
+        if seen is not None:
+            _, _, turn, how = seen
+            verb = "wrote" if how == "write" else "read"
+            return (
+                f"♻️ {file_path} is unchanged since you {verb} it in turn {turn}; content not repeated. "
+                "Pass force=true to get it again."
+            )
+
+    with open(path, "rb") as f:
+        head = f.read(SNIFF_BYTES)
+        if _is_binary(head):
+            return _describe_binary(file_path, head, st.st_size)
+        f.seek(0)
+        view = _open_view(f, st.st_size)
+        try:
+            if offset is not None or length is not None:
+                start = max(0, int(offset or 0))
+                stop = min(st.st_size, start + int(length)) if length is not None else st.st_size
+                stop = min(stop, start + MAX_READ_BYTES)
+                text = bytes(view[start:stop]).decode("utf-8", errors="replace")
+                return f"{file_path} bytes {start}-{stop} of {st.st_size}:\n{text}"
+
+            if start_line is not None or end_line is not None:
+                first = max(1, int(start_line or 1))
+                last = int(end_line) if end_line is not None else first + 199
+                text, total = _line_range(view, first, last)
+                if total is not None:
+                    return f"❌ {file_path} has only {total} lines"
+                if len(text) > MAX_READ_BYTES:
+                    text = text[:MAX_READ_BYTES] + "\n[... range truncated ...]"
+                return f"{file_path} lines {first}-{last}:\n{text}"
+
+            if st.st_size > MAX_READ_BYTES:
+                return _head_and_tail(file_path, view, st.st_size)
+            text = bytes(view).decode("utf-8", errors="replace")
+        finally:
+            if isinstance(view, mmap.mmap):
+                view.close()
+
+    read_cache.remember(path, "read")
+    return text
+
@@ -0,0 +1,258 @@
+"""
+Native function-calling protocol (AGENT_PROTOCOL=tools).
+
+Instead of describing tools in prose and parsing `{"step": "action", ...}`
+out of the reply text, `available_tools` is sent as OpenAI `tools=` schemas
+and calls come back as structured `tool_calls`. Results go back as `tool`
+messages, and a reply without tool calls is the final answer. The JSON
+protocol in agent.py stays the default and the fallback when an
+endpoint rejects `tools=`.
+
+The shorter system prompt does not make requests smaller: with the schemas
+each request carries more fixed tokens than the JSON protocol's prompt
+(2313 against 1630 for the chat profile, see benchmarks/bench_protocols.py).
+What it saves is the parse failures and repair round-trips.
+"""
+import asyncio
+import contextlib
+import inspect
+import json
+import os
+import re
+
+from . import checkpoints, tracing
+from .batch import run_calls
+from .client import REQUEST_TIMEOUT, create
+from .file_tools import get_read_cache
+from .recovery import RetryBudget, repair_json
+
+
+PROTOCOL = os.getenv("AGENT_PROTOCOL", "json")
+
+# JSON schema types for tool inputs that are not plain strings.
+PARAM_TYPES = {
+    "timeout": {"type": "number"},
+    "start_line": {"type": "integer"},
+    "end_line": {"type": "integer"},
+    "offset": {"type": "integer"},
+    "length": {"type": "integer"},
+    "lines": {"type": "integer"},
+    "depth": {"type": "integer"},
+    "page": {"type": "integer"},
+    "force": {"type": "boolean"},
+    "fresh": {"type": "boolean"},
+    "regex": {"type": "boolean"},
+    "symbols": {"type": "boolean"},
+    "edits": {
+        "type": "array",
+        "items": {
+            "type": "object",
+            "properties": {
+                "search": {"type": "string", "description": "Exact existing lines, with a little context."},
+                "replace": {"type": "string", "description": "The new lines."},
+            },
+            "required": ["search", "replace"],
+        },
+    },
+}
+
+
+class ToolsUnsupported(RuntimeError):
+    pass
+
+
+# `tools` or `tool_choice` as a word; not tool_calls, tool_call_id or a "tool" role message
+_TOOLS_PARAM = re.compile(r"\btools\b|\btool_choice\b", re.IGNORECASE)
+
+
+def _rejects_tools(error):
+    """Whether a 400 is about the `tools=`/`tool_choice` parameters rather than, say, the prompt."""
+    # The offending parameter or error code when the endpoint names one, else the message
+    param = getattr(error, "param", None)
+    if param:
+        return bool(_TOOLS_PARAM.match(param))
+    code = getattr(error, "code", None)
+    if code:
+        return bool(_TOOLS_PARAM.search(code.replace("_", " ")) or "tool_choice" in code)
+    return bool(_TOOLS_PARAM.search(getattr(error, "message", None) or str(error)))
+
+
+def tool_schemas(available_tools):
+    """
+    Builds `tools=` schemas from available_tools. Parameters come from each
+    tool's "input" descriptions (or its signature when it has none); the
+    ones without a default in the function signature are required.
+    """
+    schemas = []
+    for name, tool in available_tools.items():
+        params = inspect.signature(tool["fn"]).parameters
+        inputs = tool.get("input") or {
+            key: key.replace("_", " ")
+            for key, param in params.items()
+            if param.kind in (param.POSITIONAL_OR_KEYWORD, param.KEYWORD_ONLY) and param.default is param.empty
+        }
+        properties, required = {}, []
+        for key, description in inputs.items():
+            properties[key] = {**PARAM_TYPES.get(key, {"type": "string"}), "description": description}
+            param = params.get(key)
+            if param is not None and param.default is param.empty:
+                required.append(key)
+        schemas.append({
+            "type": "function",
+            "function": {
+                "name": name,
+                "description": tool["description"],
+                "parameters": {"type": "object", "properties": properties, "required": required},
+            },
+        })
+    return schemas
+
+
+def _parse_arguments(raw):
+    """Returns (arguments, repaired) for a tool call's JSON argument string."""
+    if not raw or not raw.strip():
+        return {}, False
+    try:
+        arguments, repaired = json.loads(raw), False
+    except ValueError:
+        arguments, repaired = repair_json(raw), True
+    if not isinstance(arguments, dict):
+        raise ValueError("arguments must be a JSON object")
+    return arguments, repaired
+
+
+def _short(value, limit=120):
+    text = " ".join(str(value).split())
+    return text if len(text) <= limit else text[:limit - 3] + "..."
+
+
+async def run_tools_task(client, history, available_tools, model, verified=False, tracer=None, limiter=None,
+                         router=None):
+    """
+    Runs the agent loop with native tool calls for the user message already
+    appended to `history`, and returns the final answer (None on give-up).
+    Unless `verified` says an earlier task already got through, a first
+    request rejected over its `tools=` raises ToolsUnsupported so the caller
+    can fall back to the JSON protocol; other 400s are raised as they are.
+    Tools run in worker threads; cancelling the task stops waiting for them.
+    `limiter` (an asyncio.Semaphore) caps concurrent model calls across
+    sessions; `router` (a routing.Router) picks the model per turn instead
+    of always `model`.
+    """
+    # The client is built by now, so this import costs nothing extra
+    import openai
+
+    tracer = tracer or tracing.tracer
+    limiter = limiter or contextlib.nullcontext()
+    schemas = tool_schemas(available_tools)
+    tracer.start_task()
+    retries = RetryBudget()
+
+    while True:
+        messages = history.for_request()
+        get_read_cache().next_turn(history.verbatim_turns)
+        turn = tracer.begin(messages, protocol="tools", tools=schemas)
+        turn_model = router.choose(turn) if router is not None else model
+        try:
+            async with limiter:
+                response = await asyncio.wait_for(
+                    create(client, messages=messages, model=turn_model, tools=schemas, tool_choice="auto"),
+                    REQUEST_TIMEOUT,
+                )
+        except openai.BadRequestError as e:
+            if verified or not _rejects_tools(e):
+                raise
+            tracer.discard()
+            raise ToolsUnsupported(str(e)) from e
+        except asyncio.TimeoutError:
+            turn.interrupted("timeout")
+            delay = retries.failed()
+            if delay is None:
+                print(f"❌ Giving up after {retries.max_retries} timed-out requests in a row")
+                tracer.finish()
+                return None
+            print(f"⏱️ The model did not answer within {REQUEST_TIMEOUT:.0f}s; retrying in {delay:.1f}s")
+            await asyncio.sleep(delay)
+            continue
+        verified = True
+
+        message = response.choices[0].message if response.choices else None
+        content = message.content if message is not None else None
+        turn.response(content, response)
+        tool_calls = (message.tool_calls if message is not None else None) or []
+
+        if not tool_calls:
+            if content and content.strip():
+                turn.step("output")
+                print(f"🤖: {content}")
+                if retries.saved:
+                    print(f"🔧 Repaired {retries.saved} malformed tool arguments locally ({retries.saved} model calls saved)")
+                tracer.finish()
+                return content
+            turn.parse_error("empty reply")
+            delay = retries.failed()
+            if delay is None:
+                print(f"❌ Giving up after {retries.max_retries} empty replies in a row")
+                tracer.finish()
+                return None
+            print(f"🔁 Empty reply; retrying in {delay:.1f}s")
+            await asyncio.sleep(delay)
+            history.append({"role": "user", "content": "❌ Your last reply was empty. Call a tool, or answer in plain text when the task is done."})
+            continue
+
+        turn.step("action")
+        if content and content.strip():
+            print(f"🧠: {content}")
+        history.append({
+            "role": "assistant",
+            "content": content,
+            "tool_calls": [
+                {"id": c.id, "type": "function", "function": {"name": c.function.name, "arguments": c.function.arguments or "{}"}}
+                for c in tool_calls
+            ],
+        })
+
+        results = [None] * len(tool_calls)
+        runnable = []
+        for index, call in enumerate(tool_calls):
+            name = call.function.name
+            try:
+                arguments, repaired = _parse_arguments(call.function.arguments)
+            except ValueError as e:
+                turn.parse_error(e)
+                print(f"❌ Error parsing arguments for {name}: {e}")
+                results[index] = f"❌ Could not parse the arguments for {name} ({e}); send them as one JSON object."
+                continue
+            if repaired:
+                retries.saved += 1
+                turn.repaired()
+            if name not in available_tools:
+                print(f"❌ Unknown tool: {name}")
+                results[index] = f"❌ There is no tool named {name!r}. Available tools: {', '.join(available_tools)}"
+                continue
+            runnable.append((index, {"function": name, "input": arguments, "parallel": len(tool_calls) > 1}))
+
+        if runnable:
+            calls = [call for _, call in runnable]
+            print("🧠: running " + ", ".join(f"{call['function']} {_short(call['input'], 60)}" for call in calls))
+            outputs, _ = await asyncio.to_thread(run_calls, calls, available_tools, on_call=turn.tool)
+            names = [call["function"] for call in calls]
+            created = await asyncio.to_thread(checkpoints.auto_checkpoint, f"after {', '.join(names)}", names)
+            if created:
+                outputs[-1] = f"{outputs[-1]}\n📸 checkpoint {created}"
+            for (index, call), output in zip(runnable, outputs):
+                print(f"🧠: output {call['function']}: {output}")
+                results[index] = output
+
+        for call, result in zip(tool_calls, results):
+            history.append({"role": "tool", "tool_call_id": call.id, "content": str(result)})
+
+        if len(runnable) < len(tool_calls):
+            delay = retries.failed()
+            if delay is None:
+                print(f"❌ Giving up after {retries.max_retries} bad tool calls in a row")
+                tracer.finish()
+                return None
+            await asyncio.sleep(delay)
+        else:
+            retries.succeeded()
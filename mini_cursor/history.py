@@ -0,0 +1,180 @@
+"""
+Token-budgeted conversation history.
+
+ConversationHistory holds the messages of one session and, before each
+model call, keeps them under AGENT_HISTORY_BUDGET estimated tokens: old
+observations and file bodies are shortened first, then the oldest turns
+are folded into one capped running summary, so a long session sends a
+flat-sized prompt. Tool results always stay with the assistant message
+that asked for them.
+"""
+import bisect
+import json
+import os
+
+
+BUDGET = int(os.getenv("AGENT_HISTORY_BUDGET", "16000"))
+
+
+def estimate_tokens(text):
+    """Cheap token estimate (~4 chars per token) — good enough for budgeting."""
+    return len(text) // 4 + 4
+
+
+def _message_tokens(message):
+    tokens = estimate_tokens(message.get("content") or "")
+    for call in message.get("tool_calls") or []:
+        tokens += estimate_tokens(call["function"]["name"] + call["function"]["arguments"])
+    return tokens
+
+
+def _shorten(text, limit):
+    if len(text) <= limit:
+        return text
+    half = limit // 2
+    elided = len(text) - 2 * half
+    return f"{text[:half]}\n[... {elided} chars elided ...]\n{text[-half:]}"
+
+
+def _one_line(text, limit=120):
+    line = " ".join(str(text).split())
+    return line if len(line) <= limit else line[:limit - 3] + "..."
+
+
+class ConversationHistory:
+    """
+    Holds the chat `messages` and keeps them inside a token budget.
+
+    The system prompt and the most recent `keep_recent` messages are sent
+    verbatim. When the estimate goes over `budget`, older observations and
+    file bodies are shortened first; if that is not enough, the oldest range
+    is collapsed into a single running summary that is itself capped, so the
+    prompt size stays flat however long the session runs.
+    """
+
+    SUMMARY_PREFIX = "Summary of earlier steps in this session:"
+
+    def __init__(self, system_prompt, budget=None, keep_recent=None, observation_chars=None):
+        self.budget = budget or BUDGET
+        self.keep_recent = keep_recent or int(os.getenv("AGENT_HISTORY_RECENT", "12"))
+        self.observation_chars = observation_chars or int(os.getenv("AGENT_OBSERVATION_CHARS", "1500"))
+        self.summary_tokens = self.budget // 4
+        self.messages = [{"role": "system", "content": system_prompt}]
+        self._summary_lines = []
+        # Messages appended so far, and how many there were at each request
+        self._appended = 0
+        self._requests = []
+        # After a compaction, how many of the latest requests' messages are still verbatim (else None)
+        self.verbatim_turns = None
+
+    def append(self, message):
+        self.messages.append(message)
+        self._appended += 1
+
+    def __len__(self):
+        return len(self.messages)
+
+    def tokens(self):
+        return sum(_message_tokens(m) for m in self.messages)
+
+    def for_request(self):
+        """Compacts in place if needed and returns the list to send."""
+        self._requests.append(self._appended)
+        self.verbatim_turns = None
+        if self.tokens() > self.budget:
+            kept = self._compact()
+            # Turns whose replies and tool results were all appended after the untouched cut
+            first = bisect.bisect_left(self._requests, self._appended - kept)
+            self.verbatim_turns = len(self._requests) - first - 1
+        return self.messages
+
+    def _compact(self):
+        """Shrinks the history to the budget; returns how many trailing messages were left untouched."""
+        recent_start = max(self._first_body(), len(self.messages) - self.keep_recent)
+        # Never separate tool results from the assistant message that requested them.
+        while recent_start > self._first_body() and self.messages[recent_start].get("role") == "tool":
+            recent_start -= 1
+
+        # 1. Shorten bulky observations and write_file bodies outside the recent window.
+        for i in range(self._first_body(), recent_start):
+            self._shrink(i, self.observation_chars // 4)
+        kept = len(self.messages) - recent_start
+        if self.tokens() <= self.budget:
+            return kept
+
+        # 2. Collapse everything before the recent window into the summary.
+        if recent_start > self._first_body():
+            old = self.messages[self._first_body():recent_start]
+            self._summary_lines.extend(self._summarize(m) for m in old)
+            while (
+                len(self._summary_lines) > 1
+                and estimate_tokens("\n".join(self._summary_lines)) > self.summary_tokens
+            ):
+                self._summary_lines.pop(0)
+            summary = {
+                "role": "user",
+                "content": self.SUMMARY_PREFIX + "\n" + "\n".join(self._summary_lines),
+            }
+            self.messages[1:recent_start] = [summary]
+        if self.tokens() <= self.budget:
+            return kept
+
+        # 3. Still too big: shorten the recent window too, except the latest message.
+        for i in range(self._first_body(), len(self.messages) - 1):
+            self._shrink(i, self.observation_chars)
+        return 1
+
+    def _first_body(self):
+        # Index of the first message after the system prompt and running summary.
+        if len(self.messages) > 1 and (self.messages[1].get("content") or "").startswith(self.SUMMARY_PREFIX):
+            return 2
+        return 1
+
+    def _shrink(self, index, limit):
+        message = self.messages[index]
+        if message.get("role") == "tool":
+            if len(message.get("content") or "") > limit:
+                self.messages[index] = {**message, "content": _shorten(message["content"], limit)}
+            return
+        if message.get("role") != "assistant" or message.get("tool_calls"):
+            return
+        try:
+            step = json.loads(message.get("content") or "")
+        except ValueError:
+            return
+        if not isinstance(step, dict):
+            return
+        changed = False
+        if isinstance(step.get("content"), str) and len(step["content"]) > limit:
+            step["content"] = _shorten(step["content"], limit)
+            changed = True
+        tool_input = step.get("input")
+        if isinstance(tool_input, dict) and isinstance(tool_input.get("content"), str) and len(tool_input["content"]) > limit:
+            tool_input["content"] = _shorten(tool_input["content"], limit)
+            changed = True
+        if changed:
+            self.messages[index] = {**message, "content": json.dumps(step)}
+
+    def _summarize(self, message):
+        content = message.get("content") or ""
+        if message.get("role") == "user":
+            return f"- user: {_one_line(content, 200)}"
+        if message.get("role") == "tool":
+            return f"- result: {_one_line(content, 80)}"
+        if message.get("tool_calls"):
+            calls = ", ".join(
+                f"{c['function']['name']} {_one_line(c['function']['arguments'], 60)}" for c in message["tool_calls"]
+            )
+            return f"- action {calls}"
+        try:
+            step = json.loads(content)
+        except ValueError:
+            return f"- assistant: {_one_line(content)}"
+        if not isinstance(step, dict):
+            return f"- assistant: {_one_line(content)}"
+        if step.get("step") == "action":
+            tool_input = step.get("input")
+            if isinstance(tool_input, dict):
+                tool_input = tool_input.get("path") or ", ".join(tool_input)
+            return f"- action {step.get('function')}: {_one_line(tool_input or '', 80)}"
+        return f"- {step.get('step')}: {_one_line(step.get('content') or '')}"
@@ -0,0 +1,256 @@
+"""
+Record/replay cache of model responses, for deterministic offline runs.
+
+With AGENT_LLM_CACHE set to on, record or replay, the model client is
+wrapped in a CachingClient. Each request is keyed by a sha256 over its
+normalized messages, the model and the sampling parameters, and the reply
+(text and tool calls) is stored on disk in a size-capped LRU store. A
+streamed reply is stored only once it is complete. "replay" never goes
+to the network. AGENT_LLM_TRANSCRIPT also appends every stored response
+to a JSONL file, which mock_server.py can serve.
+"""
+import hashlib
+import json
+import os
+import tempfile
+import threading
+from types import SimpleNamespace
+
+from .client import close, create, iterate
+
+
+CACHE_DIR = os.getenv("AGENT_LLM_CACHE_DIR", os.path.join(".mini_cursor", "llm_cache"))
+CACHE_MAX_BYTES = int(os.getenv("AGENT_LLM_CACHE_MAX_MB", "256")) * 1024 * 1024
+
+# Request parameters that do not change what the model says.
+_IGNORED_PARAMS = {"stream", "stream_options", "timeout", "extra_headers"}
+
+
+def _normalize_message(message):
+    normalized = {"role": message.get("role"), "content": (message.get("content") or "").strip()}
+    for key in ("name", "tool_calls", "tool_call_id"):
+        if message.get(key) is not None:
+            normalized[key] = message[key]
+    return normalized
+
+
+def cache_key(messages, model, **params):
+    """sha256 over the normalized messages, the model and the sampling parameters."""
+    payload = {
+        "model": model,
+        "messages": [_normalize_message(m) for m in messages],
+        "params": {k: v for k, v in params.items() if k not in _IGNORED_PARAMS},
+    }
+    blob = json.dumps(payload, sort_keys=True, separators=(",", ":"), ensure_ascii=False, default=str)
+    return hashlib.sha256(blob.encode("utf-8")).hexdigest()
+
+
+class ResponseCache:
+    """
+    Content-addressed, on-disk store of model responses.
+
+    Entries live at `<dir>/<key[:2]>/<key>.json`. Reads bump the file's mtime,
+    and once the total size passes `max_bytes` the least recently used
+    entries are deleted until it fits again.
+    """
+
+    def __init__(self, directory=CACHE_DIR, max_bytes=CACHE_MAX_BYTES):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._size = None
+
+    def _path(self, key):
+        return os.path.join(self.directory, key[:2], f"{key}.json")
+
+    def get(self, key):
+        path = self._path(key)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return None
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        return entry
+
+    def put(self, key, entry):
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(entry, f, ensure_ascii=False)
+        with self._lock:
+            size = self._current_size()
+            old = os.path.getsize(path) if os.path.exists(path) else 0
+            os.replace(tmp, path)
+            self._size = size - old + os.path.getsize(path)
+            if self._size > self.max_bytes:
+                self._evict()
+
+    def _entries(self):
+        for root, _, files in os.walk(self.directory):
+            for name in files:
+                if name.endswith(".json"):
+                    path = os.path.join(root, name)
+                    try:
+                        st = os.stat(path)
+                    except OSError:
+                        continue
+                    yield st.st_mtime, st.st_size, path
+
+    def _current_size(self):
+        if self._size is None:
+            self._size = sum(size for _, size, _ in self._entries())
+        return self._size
+
+    def _evict(self):
+        for _, size, path in sorted(self._entries()):
+            if self._size <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+                self._size -= size
+            except OSError:
+                pass
+
+
+class CacheMiss(RuntimeError):
+    pass
+
+
+def _tool_calls(calls):
+    if not calls:
+        return None
+    return [
+        SimpleNamespace(id=c["id"], type="function", function=SimpleNamespace(**c["function"]))
+        for c in calls
+    ]
+
+
+def _completion(content, model, tool_calls=None):
+    message = SimpleNamespace(role="assistant", content=content, tool_calls=_tool_calls(tool_calls))
+    return SimpleNamespace(
+        choices=[SimpleNamespace(index=0, message=message, finish_reason="tool_calls" if tool_calls else "stop")],
+        model=model,
+        usage=None,
+        cached=True,
+    )
+
+
+class _ReplayStream:
+    """Mimics an openai Stream over cached content, in small chunks."""
+
+    def __init__(self, content, chunk_size=64):
+        self.content = content or ""
+        self.chunk_size = chunk_size
+
+    def __iter__(self):
+        for i in range(0, len(self.content), self.chunk_size):
+            delta = SimpleNamespace(content=self.content[i:i + self.chunk_size])
+            yield SimpleNamespace(choices=[SimpleNamespace(index=0, delta=delta)])
+
+    def close(self):
+        pass
+
+
+class _RecordingStream:
+    """
+    Passes a live stream through and stores what was read once it is closed,
+    but only a complete reply: the stream was read to the end, or what was
+    read is a whole JSON object. A stream cut short by a cancel or a timeout
+    is not recorded, so a truncated reply is never replayed.
+    """
+
+    def __init__(self, stream, on_close):
+        self.stream = stream
+        self.on_close = on_close
+        self.parts = []
+        self.finished = False
+
+    async def __aiter__(self):
+        async for chunk in iterate(self.stream):
+            if chunk.choices and chunk.choices[0].delta.content:
+                self.parts.append(chunk.choices[0].delta.content)
+            yield chunk
+        self.finished = True
+
+    async def close(self):
+        await close(self.stream)
+        content = "".join(self.parts)
+        if content and (self.finished or _whole_json(content)):
+            self.on_close(content)
+
+
+def _whole_json(text):
+    try:
+        json.loads(text)
+    except ValueError:
+        return False
+    return True
+
+
+class CachingClient:
+    """
+    Wraps an OpenAI client (sync or async) so `await
+    client.chat.completions.create(...)` is served from the response cache
+    when possible.
+
+    mode "on" reads and writes the cache, "replay" never touches the network
+    and raises CacheMiss instead, "record" always calls the model and stores
+    the result. Every stored response is also appended to `transcript` (a
+    JSONL file) when given, which is what mock_server.py replays.
+    """
+
+    def __init__(self, client, mode="on", cache=None, transcript=None):
+        self.client = client
+        self.mode = mode
+        self.cache = cache or ResponseCache()
+        self.transcript = transcript
+        self.hits = 0
+        self.misses = 0
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self.create))
+
+    async def create(self, messages, model, stream=False, **params):
+        key = cache_key(messages, model, **params)
+        if self.mode != "record":
+            entry = self.cache.get(key)
+            if entry is not None:
+                self.hits += 1
+                if stream:
+                    return _ReplayStream(entry["content"])
+                return _completion(entry["content"], model, entry.get("tool_calls"))
+        self.misses += 1
+        if self.mode == "replay" or self.client is None:
+            raise CacheMiss(f"No cached response for request {key[:12]}")
+
+        def store(content, tool_calls=None):
+            entry = {"key": key, "model": model, "content": content}
+            if tool_calls:
+                entry["tool_calls"] = tool_calls
+            self.cache.put(key, entry)
+            if self.transcript:
+                with open(self.transcript, "a", encoding="utf-8") as f:
+                    f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+
+        response = await create(self.client, messages=messages, model=model, stream=stream, **params)
+        if stream:
+            return _RecordingStream(response, store)
+        message = response.choices[0].message
+        tool_calls = [
+            {"id": c.id, "function": {"name": c.function.name, "arguments": c.function.arguments}}
+            for c in message.tool_calls or []
+        ]
+        if message.content is not None or tool_calls:
+            store(message.content, tool_calls)
+        return response
+
+
+def wrap_client(client):
+    """Applies AGENT_LLM_CACHE (off | on | record | replay) to `client`."""
+    mode = os.getenv("AGENT_LLM_CACHE", "off")
+    if mode == "off":
+        return client
+    return CachingClient(client, mode=mode, transcript=os.getenv("AGENT_LLM_TRANSCRIPT"))
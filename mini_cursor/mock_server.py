@@ -0,0 +1,185 @@
+"""
+Local OpenAI-compatible stand-in that replays recorded model responses.
+
+Record a session with
+
+    AGENT_LLM_CACHE=record AGENT_LLM_TRANSCRIPT=session.jsonl mini-cursor
+
+then replay it offline with
+
+    python -m mini_cursor.mock_server session.jsonl --port 8765
+    AGENT_BASE_URL=http://127.0.0.1:8765/v1/ GEMINI_API_KEY=mock mini-cursor
+
+Requests are matched by the same key the response cache uses; when nothing
+matches (e.g. an observation contained a timing), the next unused response
+in transcript order is served instead.
+"""
+import argparse
+import itertools
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from .history import estimate_tokens
+from .llm_cache import cache_key
+
+
+class Transcript:
+    def __init__(self, paths):
+        self.entries = []
+        for path in paths:
+            with open(path, "r", encoding="utf-8") as f:
+                self.entries.extend(json.loads(line) for line in f if line.strip())
+        self.by_key = {e["key"]: i for i, e in enumerate(self.entries) if "key" in e}
+        self.cursor = 0
+        self.lock = threading.Lock()
+        self.exact = 0
+        self.sequential = 0
+
+    def lookup(self, key):
+        with self.lock:
+            index = self.by_key.get(key)
+            if index is not None:
+                self.exact += 1
+            elif self.cursor < len(self.entries):
+                index = self.cursor
+                self.sequential += 1
+            else:
+                return None
+            self.cursor = max(self.cursor, index + 1)
+            return self.entries[index]
+
+
+class MockHandler(BaseHTTPRequestHandler):
+    transcript = None
+    chunk_size = 64
+    # Keep-alive like a real endpoint, so clients can reuse pooled connections
+    protocol_version = "HTTP/1.1"
+    ids = itertools.count(1)
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        if self.path.rstrip("/").endswith("/models"):
+            self._json(200, {"object": "list", "data": [{"id": "mock", "object": "model"}]})
+        else:
+            self._json(404, {"error": {"message": "not found"}})
+
+    def do_POST(self):
+        if not self.path.rstrip("/").endswith("/chat/completions"):
+            self._json(404, {"error": {"message": "not found"}})
+            return
+        length = int(self.headers.get("Content-Length") or 0)
+        request = json.loads(self.rfile.read(length) or b"{}")
+        messages = request.pop("messages", [])
+        model = request.pop("model", "mock")
+        stream = request.pop("stream", False)
+        entry = self.transcript.lookup(cache_key(messages, model, **request))
+        if entry is None:
+            self._json(404, {"error": {"message": "transcript exhausted", "type": "mock_miss"}})
+            return
+        content = entry.get("content") or ""
+        tool_calls = [
+            {"id": c["id"], "type": "function", "function": c["function"]} for c in entry.get("tool_calls") or []
+        ]
+
+        completion_id = f"chatcmpl-mock-{next(self.ids)}"
+        created = int(time.time())
+        prompt_tokens = sum(estimate_tokens(m.get("content") or "") for m in messages)
+        usage = {
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": estimate_tokens(content),
+            "total_tokens": prompt_tokens + estimate_tokens(content),
+        }
+        if not stream:
+            message = {"role": "assistant", "content": entry.get("content")}
+            if tool_calls:
+                message["tool_calls"] = tool_calls
+            self._json(200, {
+                "id": completion_id,
+                "object": "chat.completion",
+                "created": created,
+                "model": model,
+                "choices": [{
+                    "index": 0,
+                    "message": message,
+                    "finish_reason": "tool_calls" if tool_calls else "stop",
+                }],
+                "usage": usage,
+            })
+            return
+
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Cache-Control", "no-cache")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        pieces = [content[i:i + self.chunk_size] for i in range(0, len(content), self.chunk_size)]
+        try:
+            for i, piece in enumerate(pieces):
+                delta = {"content": piece}
+                if i == 0:
+                    delta["role"] = "assistant"
+                self._event({
+                    "id": completion_id,
+                    "object": "chat.completion.chunk",
+                    "created": created,
+                    "model": model,
+                    "choices": [{"index": 0, "delta": delta, "finish_reason": None}],
+                })
+            self._event({
+                "id": completion_id,
+                "object": "chat.completion.chunk",
+                "created": created,
+                "model": model,
+                "choices": [{"index": 0, "delta": {}, "finish_reason": "stop"}],
+                "usage": usage,
+            })
+            self._chunk(b"data: [DONE]\n\n")
+            self._chunk(b"")
+        except (BrokenPipeError, ConnectionResetError):
+            # The agent closes the stream as soon as the JSON object is complete.
+            pass
+
+    def _event(self, payload):
+        self._chunk(b"data: " + json.dumps(payload).encode("utf-8") + b"\n\n")
+
+    def _chunk(self, data):
+        self.wfile.write(f"{len(data):x}\r\n".encode("ascii") + data + b"\r\n")
+        self.wfile.flush()
+
+    def _json(self, status, payload):
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+def serve(transcript_paths, host="127.0.0.1", port=8765):
+    handler = type("Handler", (MockHandler,), {"transcript": Transcript(transcript_paths)})
+    return ThreadingHTTPServer((host, port), handler)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay recorded model responses over an OpenAI-compatible API.")
+    parser.add_argument("transcripts", nargs="+", help="JSONL transcripts written with AGENT_LLM_TRANSCRIPT")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    args = parser.parse_args()
+    server = serve(args.transcripts, args.host, args.port)
+    transcript = server.RequestHandlerClass.transcript
+    print(f"🤖 Mock model on http://{args.host}:{server.server_port}/v1/ ({len(transcript.entries)} responses)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        print(f"served {transcript.exact} exact and {transcript.sequential} sequential matches")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,573 @@
+"""
+Incremental project index behind the search_code and list_tree tools.
+
+Each workspace gets a ProjectIndex of its file tree, which honours
+.gitignore files and DEFAULT_IGNORES. It holds the Python and JS/TS
+symbol definitions and a trigram index for substring and regex search.
+Searches read only the candidate files the trigrams allow, and results
+are paged. The index is kept fresh by re-stat'ing the tree while it is
+being queried, and by file_tools' write listeners. Only files whose
+mtime or size changed are read again.
+"""
+import ast
+import os
+import re
+import threading
+import time
+from array import array
+
+from . import file_tools, workspace
+
+
+REFRESH_SECS = float(os.getenv("AGENT_INDEX_REFRESH_SECS", "2.0"))
+# The refresher stops after this long without a query and restarts with the next one
+IDLE_SECS = float(os.getenv("AGENT_INDEX_IDLE_SECS", "60"))
+MAX_INDEXED_BYTES = 512 * 1024
+PAGE_SIZE = 50
+DEFAULT_IGNORES = [".git/", "node_modules/", "__pycache__/", ".venv/", "venv/", ".mini_cursor/"]
+
+_TOKEN = re.compile(r"\w+|[^\w\s]+")
+_PY_EXTS = {".py", ".pyi"}
+_JS_EXTS = {".js", ".jsx", ".ts", ".tsx", ".mjs", ".cjs", ".vue", ".svelte"}
+_JS_SYMBOLS = re.compile(
+    r"^\s*(?:export\s+(?:default\s+)?)?(?:"
+    r"(?:async\s+)?function\s*\*?\s*(?P<function>[A-Za-z_$][\w$]*)"
+    r"|class\s+(?P<class>[A-Za-z_$][\w$]*)"
+    r"|interface\s+(?P<interface>[A-Za-z_$][\w$]*)"
+    r"|type\s+(?P<type>[A-Za-z_$][\w$]*)\s*(?:<[^=]*>)?\s*="
+    r"|enum\s+(?P<enum>[A-Za-z_$][\w$]*)"
+    r"|(?:const|let|var)\s+(?P<variable>[A-Za-z_$][\w$]*)\s*(?::[^=]+)?=\s*(?:async\s+)?(?:function\b|\([^)]*\)\s*=>|[A-Za-z_$][\w$]*\s*=>)"
+    r")",
+    re.MULTILINE,
+)
+
+
+def _glob_to_regex(glob):
+    out = []
+    i = 0
+    while i < len(glob):
+        if glob.startswith("**/", i):
+            out.append("(?:.*/)?")
+            i += 3
+        elif glob.startswith("**", i):
+            out.append(".*")
+            i += 2
+        elif glob[i] == "*":
+            out.append("[^/]*")
+            i += 1
+        elif glob[i] == "?":
+            out.append("[^/]")
+            i += 1
+        elif glob[i] == "[":
+            end = glob.find("]", i + 1)
+            if end == -1:
+                out.append(re.escape(glob[i]))
+                i += 1
+            else:
+                out.append("[" + glob[i + 1:end].replace("!", "^", 1) + "]")
+                i = end + 1
+        else:
+            out.append(re.escape(glob[i]))
+            i += 1
+    return "".join(out)
+
+
+class IgnoreRules:
+    """A small .gitignore matcher: negation, dir-only, anchored and ** patterns."""
+
+    def __init__(self, patterns=DEFAULT_IGNORES):
+        self.rules = []
+        self._combined = None
+        for pattern in patterns:
+            self.add(pattern, "")
+
+    def add(self, pattern, base):
+        pattern = pattern.rstrip()
+        if not pattern or pattern.startswith("#"):
+            return
+        negate = pattern.startswith("!")
+        if negate:
+            pattern = pattern[1:]
+        dir_only = pattern.endswith("/")
+        pattern = pattern.rstrip("/")
+        anchored = "/" in pattern
+        body = _glob_to_regex(pattern.lstrip("/"))
+        prefix = re.escape(base + "/") if base else ""
+        regex = f"^{prefix}{body}$" if anchored else f"^{prefix}(?:.*/)?{body}$"
+        self.rules.append((re.compile(regex), negate, dir_only))
+        self._combined = None
+
+    def load(self, gitignore_path, base):
+        try:
+            with open(gitignore_path, "r", encoding="utf-8", errors="replace") as f:
+                for line in f:
+                    self.add(line, base)
+        except OSError:
+            pass
+
+    def _compile(self):
+        # Without negations the order does not matter: one alternation per kind.
+        if any(negate for _, negate, _ in self.rules):
+            self._combined = False
+            return
+        files = [r.pattern for r, _, dir_only in self.rules if not dir_only] or ["(?!)"]
+        dirs = [r.pattern for r, _, _ in self.rules] or ["(?!)"]
+        self._combined = (re.compile("|".join(files)), re.compile("|".join(dirs)))
+
+    def ignored(self, relpath, is_dir):
+        if self._combined is None:
+            self._compile()
+        if self._combined:
+            return bool(self._combined[is_dir].match(relpath))
+        result = False
+        for regex, negate, dir_only in self.rules:
+            if dir_only and not is_dir:
+                continue
+            if regex.match(relpath):
+                result = not negate
+        return result
+
+
+def required_literals(pattern):
+    """
+    Literal runs that every match of a regex must contain, for trigram
+    filtering. Conservative: text inside groups, classes or before a
+    quantifier is skipped, and alternation disables filtering entirely.
+    """
+    if "|" in pattern:
+        return []
+    literals, current = [], []
+    depth = 0
+    i = 0
+    while i < len(pattern):
+        ch = pattern[i]
+        if ch == "\\" and i + 1 < len(pattern):
+            nxt = pattern[i + 1]
+            if depth == 0 and not nxt.isalnum():
+                current.append(nxt)
+            else:
+                literals.append("".join(current))
+                current = []
+            i += 2
+            continue
+        if ch in "?*{" and current:
+            current.pop()
+        if ch in "([":
+            depth += 1
+        if ch in "([.^$+?*{}])" or depth:
+            literals.append("".join(current))
+            current = []
+            if ch in ")]":
+                depth = max(0, depth - 1)
+        else:
+            current.append(ch)
+        i += 1
+    literals.append("".join(current))
+    return [literal for literal in literals if len(literal) >= 3]
+
+
+def _trigrams(text):
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+def token_trigrams(text, cache):
+    """
+    Trigrams inside each word/punctuation run of `text` (lowercased). Runs
+    repeat a lot across a codebase, so their trigram sets are memoized in
+    `cache`. A substring query is filtered with the same per-run trigrams.
+    """
+    grams = set()
+    for token in set(_TOKEN.findall(text.lower())):
+        if len(token) < 3:
+            continue
+        found = cache.get(token)
+        if found is None:
+            if len(cache) > 500_000:
+                cache.clear()
+            found = cache[token] = frozenset(_trigrams(token))
+        grams |= found
+    return grams
+
+
+def python_symbols(source):
+    try:
+        tree = ast.parse(source)
+    except (SyntaxError, ValueError):
+        return []
+    symbols = []
+    for node in ast.walk(tree):
+        if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
+            symbols.append((node.name, "function", node.lineno))
+        elif isinstance(node, ast.ClassDef):
+            symbols.append((node.name, "class", node.lineno))
+    for node in tree.body:
+        if isinstance(node, ast.Assign):
+            for target in node.targets:
+                if isinstance(target, ast.Name):
+                    symbols.append((target.id, "variable", node.lineno))
+    return symbols
+
+
+def js_symbols(source):
+    symbols = []
+    for match in _JS_SYMBOLS.finditer(source):
+        kind = match.lastgroup
+        symbols.append((match.group(kind), kind, source.count("\n", 0, match.start(kind)) + 1))
+    return symbols
+
+
+def _relative_dir(path, root):
+    """`path` as an index key relative to `root`: "" for the root itself, None when outside it."""
+    if not path:
+        return ""
+    relpath = os.path.relpath(os.path.normpath(os.path.join(root, path)), root).replace(os.sep, "/")
+    if relpath == ".." or relpath.startswith("../"):
+        return None
+    return "" if relpath == "." else relpath
+
+
+def _is_under(relpath, base):
+    return not base or relpath == base or relpath.startswith(base + "/")
+
+
+class FileEntry:
+    __slots__ = ("id", "mtime", "size", "text", "symbols")
+
+    def __init__(self, id, mtime, size, text, symbols):
+        self.id = id
+        self.mtime = mtime
+        self.size = size
+        self.text = text
+        self.symbols = symbols
+
+
+class ProjectIndex:
+    """
+    In-memory index of a workspace: the file tree, Python/JS/TS symbols and a
+    trigram index (file id arrays per trigram) for substring search.
+
+    `refresh()` re-stats the tree and only re-reads files whose (mtime, size)
+    changed; a changed file gets a new id and its old postings are dropped
+    lazily. While the index is being queried a background thread refreshes
+    every REFRESH_SECS, so queries rarely wait on a walk; after IDLE_SECS
+    without a query it stops, and the next query refreshes first if the
+    index is stale. Writes made through file_tools are applied right away.
+    .gitignore files at any level apply.
+    """
+
+    def __init__(self, root):
+        self.root = os.path.abspath(root)
+        self.files = {}
+        self.paths = []
+        self.postings = {}
+        self.symbols = {}
+        self.dead = 0
+        self.lock = threading.RLock()
+        self._token_cache = {}
+        self._refresher = None
+        self._interval = REFRESH_SECS
+        self._refreshed = 0.0
+        self._queried = time.monotonic()
+        self._stopped = threading.Event()
+
+    def refresh(self):
+        self._refreshed = time.monotonic()
+        found = dict(self._walk())
+        with self.lock:
+            for relpath, st in found.items():
+                entry = self.files.get(relpath)
+                if entry is None or entry.mtime != st.st_mtime_ns or entry.size != st.st_size:
+                    self._index_file(relpath, st)
+            for relpath in [p for p in self.files if p not in found]:
+                self._drop(relpath)
+            if self.dead > 1000 and self.dead > len(self.files):
+                self._compact()
+
+    def start_refresher(self, interval=REFRESH_SECS):
+        def loop():
+            while not self._stopped.wait(interval):
+                if time.monotonic() - self._queried > IDLE_SECS:
+                    break
+                try:
+                    self.refresh()
+                except Exception:
+                    pass
+
+        self._interval = interval
+        with self.lock:
+            if self._refresher is None or not self._refresher.is_alive():
+                self._refresher = threading.Thread(target=loop, name="project-index", daemon=True)
+                self._refresher.start()
+
+    def ensure_fresh(self):
+        """Called before a query: refreshes now if the refresher went idle, and keeps it running."""
+        self._queried = time.monotonic()
+        if self._stopped.is_set() or (self._refresher is not None and self._refresher.is_alive()):
+            return
+        if time.monotonic() - self._refreshed > self._interval:
+            self.refresh()
+        self.start_refresher(self._interval)
+
+    def close(self):
+        """Stops the background refresher and forgets this index."""
+        self._stopped.set()
+        with _indexes_lock:
+            if _indexes.get(self.root) is self:
+                del _indexes[self.root]
+
+    def update_path(self, path):
+        """Re-indexes one file immediately (called after the agent writes it)."""
+        relpath = os.path.relpath(os.path.abspath(path), self.root).replace(os.sep, "/")
+        if relpath.startswith(".."):
+            return
+        with self.lock:
+            try:
+                st = os.stat(os.path.join(self.root, relpath))
+            except OSError:
+                self._drop(relpath)
+                return
+            self._index_file(relpath, st)
+
+    def _walk(self):
+        rules = IgnoreRules()
+        stack = [""]
+        while stack:
+            reldir = stack.pop()
+            absdir = os.path.join(self.root, reldir)
+            rules.load(os.path.join(absdir, ".gitignore"), reldir)
+            try:
+                entries = list(os.scandir(absdir))
+            except OSError:
+                continue
+            for entry in entries:
+                relpath = f"{reldir}/{entry.name}" if reldir else entry.name
+                try:
+                    is_dir = entry.is_dir(follow_symlinks=False)
+                    if rules.ignored(relpath, is_dir):
+                        continue
+                    if is_dir:
+                        stack.append(relpath)
+                    elif entry.is_file(follow_symlinks=False):
+                        yield relpath, entry.stat(follow_symlinks=False)
+                except OSError:
+                    continue
+
+    def _index_file(self, relpath, st):
+        self._drop(relpath)
+        file_id = len(self.paths)
+        self.paths.append(relpath)
+        grams = ()
+        symbols = []
+        if st.st_size <= MAX_INDEXED_BYTES:
+            try:
+                with open(os.path.join(self.root, relpath), "rb") as f:
+                    data = f.read()
+            except OSError:
+                data = b"\x00"
+            if b"\x00" not in data[:8192]:
+                text = data.decode("utf-8", errors="replace")
+                grams = token_trigrams(text, self._token_cache)
+                ext = os.path.splitext(relpath)[1].lower()
+                if ext in _PY_EXTS:
+                    symbols = python_symbols(text)
+                elif ext in _JS_EXTS:
+                    symbols = js_symbols(text)
+        self.files[relpath] = FileEntry(file_id, st.st_mtime_ns, st.st_size, bool(grams), symbols)
+        for gram in grams:
+            ids = self.postings.get(gram)
+            if ids is None:
+                ids = self.postings[gram] = array("I")
+            ids.append(file_id)
+        for name, kind, line in symbols:
+            self.symbols.setdefault(name.lower(), []).append((relpath, line, kind, name))
+
+    def _drop(self, relpath):
+        entry = self.files.pop(relpath, None)
+        if entry is None:
+            return
+        self.paths[entry.id] = None
+        self.dead += 1
+        for name, _, _ in entry.symbols:
+            hits = [h for h in self.symbols.get(name.lower(), []) if h[0] != relpath]
+            if hits:
+                self.symbols[name.lower()] = hits
+            else:
+                self.symbols.pop(name.lower(), None)
+
+    def _compact(self):
+        """Drops deleted and replaced files from `paths` and renumbers the postings to match."""
+        new_ids = {}
+        paths = []
+        for old_id, relpath in enumerate(self.paths):
+            if relpath is not None:
+                new_ids[old_id] = len(paths)
+                paths.append(relpath)
+        for gram in list(self.postings):
+            ids = array("I", (new_ids[i] for i in self.postings[gram] if i in new_ids))
+            if ids:
+                self.postings[gram] = ids
+            else:
+                del self.postings[gram]
+        for entry in self.files.values():
+            entry.id = new_ids[entry.id]
+        self.paths = paths
+        self.dead = 0
+
+    def candidates(self, literals):
+        """Files whose postings hold every trigram of every literal (None = no filter possible)."""
+        grams = set()
+        for literal in literals:
+            grams |= token_trigrams(literal, {})
+        if not grams:
+            return None
+        with self.lock:
+            lists = [self.postings.get(g) for g in grams]
+            if any(ids is None for ids in lists):
+                return set()
+            lists.sort(key=len)
+            result = set(lists[0])
+            for ids in lists[1:]:
+                if len(result) <= 32:
+                    break  # few enough to verify by reading
+                result.intersection_update(ids)
+            return {self.paths[i] for i in result if self.paths[i] is not None}
+
+    def search_text(self, query, regex=False, path=None, limit=None):
+        if regex:
+            pattern = re.compile(query, re.IGNORECASE)
+            literals = required_literals(query)
+        else:
+            pattern = re.compile(re.escape(query), re.IGNORECASE)
+            literals = [query]
+        paths = self.candidates(literals)
+        with self.lock:
+            if paths is None:
+                paths = [p for p, e in self.files.items() if e.text]
+        base = _relative_dir(path, self.root)
+        if base is None:
+            return []
+        hits = []
+        for relpath in sorted(paths):
+            if not _is_under(relpath, base):
+                continue
+            try:
+                with open(os.path.join(self.root, relpath), "r", encoding="utf-8", errors="replace") as f:
+                    for number, line in enumerate(f, 1):
+                        if pattern.search(line):
+                            hits.append((relpath, number, line.strip()[:200]))
+                            if limit and len(hits) >= limit:
+                                return hits
+            except OSError:
+                continue
+        return hits
+
+    def search_symbols(self, query):
+        query = query.lower()
+        with self.lock:
+            exact = list(self.symbols.get(query, []))
+            partial = [
+                hit
+                for name, hits in self.symbols.items()
+                if name != query and query in name
+                for hit in hits
+            ]
+        return sorted(exact) + sorted(partial, key=lambda h: (len(h[3]), h[0], h[1]))
+
+
+_indexes = {}
+_indexes_lock = threading.Lock()
+
+
+def get_index(root=None):
+    """The index for `root` (default: the workspace root), built on first use and kept fresh in the background."""
+    root = os.path.abspath(root or workspace.current().root)
+    with _indexes_lock:
+        index = _indexes.get(root)
+        if index is None:
+            index = _indexes[root] = ProjectIndex(root)
+            index.refresh()
+            index.start_refresher()
+    return index
+
+
+def _workspace_index():
+    # Owned by the active workspace, so closing a session stops its refresher
+    index = workspace.current().state("index", lambda ws: get_index(ws.root))
+    index.ensure_fresh()
+    return index
+
+
+def _on_write(path):
+    path = os.path.abspath(path)
+    for root, index in list(_indexes.items()):
+        if path.startswith(root + os.sep):
+            index.update_path(path)
+
+
+file_tools.write_listeners.append(_on_write)
+
+
+def _page(items, page, page_size, render):
+    page = max(1, int(page or 1))
+    total = len(items)
+    start = (page - 1) * page_size
+    shown = items[start:start + page_size]
+    if not shown:
+        return f"No results on page {page} ({total} total)."
+    pages = (total + page_size - 1) // page_size
+    lines = [f"{start + 1}-{start + len(shown)} of {total} (page {page}/{pages})"]
+    lines.extend(render(item) for item in shown)
+    if page < pages:
+        lines.append(f"... pass page={page + 1} for more")
+    return "\n".join(lines)
+
+
+def search_code(query, regex=False, symbols=False, path=None, page=1):
+    """Searches the workspace index for text (substring or regex) or symbol names."""
+    if not query:
+        return "❌ search_code needs a query"
+    started = time.perf_counter()
+    index = _workspace_index()
+    if symbols:
+        hits = index.search_symbols(query)
+        result = _page(hits, page, PAGE_SIZE, lambda h: f"{h[0]}:{h[1]} {h[2]} {h[3]}")
+    else:
+        try:
+            hits = index.search_text(query, regex=regex, path=path, limit=int(page or 1) * PAGE_SIZE + 1)
+        except re.error as e:
+            return f"❌ Invalid regex: {e}"
+        result = _page(hits, page, PAGE_SIZE, lambda h: f"{h[0]}:{h[1]}: {h[2]}")
+        if len(hits) > int(page or 1) * PAGE_SIZE:
+            result = result.replace(" of ", " of at least ", 1)
+    return f"{result}\n({(time.perf_counter() - started) * 1000:.0f} ms, {len(index.files)} files indexed)"
+
+
+def list_tree(path=".", depth=2, page=1):
+    """Lists indexed files and folders under `path`, folders summarized below `depth`."""
+    index = _workspace_index()
+    base = _relative_dir(path, index.root)
+    if base is None:
+        return f"❌ {path} is outside the workspace"
+    prefix = base + "/" if base else ""
+    depth = max(1, int(depth or 2))
+    counts = {}
+    with index.lock:
+        relpaths = list(index.files)
+    for relpath in relpaths:
+        if prefix and not relpath.startswith(prefix):
+            continue
+        parts = relpath[len(prefix):].split("/")
+        if len(parts) <= depth:
+            counts.setdefault(relpath[len(prefix):], None)
+        else:
+            folder = "/".join(parts[:depth]) + "/"
+            counts[folder] = (counts.get(folder) or 0) + 1
+    if not counts:
+        return f"❌ No indexed files under {path}"
+    items = sorted(counts.items())
+    return _page(
+        items,
+        page,
+        200,
+        lambda item: f"{item[0]}  ({item[1]} files)" if item[1] else item[0],
+    )
@@ -0,0 +1,139 @@
+"""
+Recovery from malformed, empty or unusable model replies.
+
+parse_reply first repairs what it can locally: code fences, prose around
+the object, concatenated objects and trailing commas. Each of those saves
+a model call. Anything else goes through retry_after. It backs off with
+jittered exponential delays (AGENT_RETRY_BASE_SECS, AGENT_RETRY_MAX_SECS),
+and the next request carries a corrective observation, so it is not an
+identical resend. A RetryBudget ends the task after AGENT_MAX_RETRIES bad
+replies in a row instead of looping forever.
+"""
+import asyncio
+import json
+import os
+import random
+import re
+
+
+MAX_RETRIES = int(os.getenv("AGENT_MAX_RETRIES", "3"))
+RETRY_BASE_SECS = float(os.getenv("AGENT_RETRY_BASE_SECS", "0.5"))
+RETRY_MAX_SECS = float(os.getenv("AGENT_RETRY_MAX_SECS", "8"))
+
+_FENCE = re.compile(r"```[a-zA-Z0-9_-]*[ \t]*\n?(.*?)```", re.DOTALL)
+
+
+def _strip_trailing_commas(text):
+    """Drops commas directly before `}` or `]`, leaving string contents alone."""
+    out = []
+    in_string = escape = False
+    for i, ch in enumerate(text):
+        if in_string:
+            if escape:
+                escape = False
+            elif ch == "\\":
+                escape = True
+            elif ch == '"':
+                in_string = False
+        elif ch == '"':
+            in_string = True
+        elif ch == ",":
+            rest = text[i + 1:].lstrip()
+            if rest[:1] in ("}", "]"):
+                continue
+        out.append(ch)
+    return "".join(out)
+
+
+def repair_json(text):
+    """
+    Best-effort local repair of a model reply: unwraps ``` code fences,
+    skips prose before the first `{`, takes the first object when several are
+    concatenated and removes trailing commas. Raises ValueError if it still
+    does not parse.
+    """
+    fenced = _FENCE.search(text)
+    if fenced and "{" in fenced.group(1):
+        text = fenced.group(1)
+    start = text.find("{")
+    if start == -1:
+        raise ValueError("no JSON object in reply")
+    decoder = json.JSONDecoder()
+    try:
+        return decoder.raw_decode(text, start)[0]
+    except ValueError:
+        pass
+    try:
+        return decoder.raw_decode(_strip_trailing_commas(text[start:]))[0]
+    except ValueError as e:
+        raise ValueError(f"invalid JSON even after repair: {e}") from None
+
+
+def parse_reply(content):
+    """
+    Parses one model reply into a step dict. Returns (step, repaired), where
+    `repaired` means the strict parse failed and repair_json fixed it locally
+    instead of asking the model again.
+    """
+    if content is None or not content.strip():
+        raise ValueError("empty reply")
+    repaired = False
+    try:
+        step = json.loads(content)
+    except ValueError:
+        step = repair_json(content)
+        repaired = True
+    if not isinstance(step, dict) or not isinstance(step.get("step"), str):
+        raise ValueError('expected a JSON object with a "step" field')
+    return step, repaired
+
+
+class RetryBudget:
+    """
+    Bounds how many bad replies in a row a task tolerates. Each failure gets
+    an exponential backoff with full jitter; a good reply resets the count.
+    `saved` counts the replies repaired locally, i.e. model calls not made.
+    """
+
+    def __init__(self, max_retries=MAX_RETRIES, base_delay=RETRY_BASE_SECS, max_delay=RETRY_MAX_SECS):
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.failures = 0
+        self.saved = 0
+
+    def failed(self):
+        """Records a failure; returns the delay before retrying, or None when out of retries."""
+        self.failures += 1
+        if self.failures > self.max_retries:
+            return None
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** (self.failures - 1)))
+
+    def succeeded(self):
+        self.failures = 0
+
+
+def corrective_observation(problem, content=None, format_hint=True):
+    """A short observation telling the model what was wrong with its last reply."""
+    text = f"❌ {problem}."
+    if content:
+        snippet = " ".join(content.split())
+        text += f" Your reply started with: {snippet[:160]}"
+    if format_hint:
+        text += ' Reply with exactly one JSON object such as { "step": "plan", "content": "..." }.'
+    return {"role": "assistant", "content": json.dumps({"step": "observe", "content": text})}
+
+
+async def retry_after(retries, history, problem, content=None, format_hint=True):
+    """
+    Backs off and queues a corrective observation so the next request is not
+    an identical resend. Returns False once the retry budget is spent.
+    """
+    delay = retries.failed()
+    if delay is None:
+        print(f"❌ Giving up after {retries.max_retries} bad replies in a row: {problem}")
+        return False
+    print(f"🔁 {problem}; retrying in {delay:.1f}s")
+    await asyncio.sleep(delay)
+    history.append(corrective_observation(problem, content, format_hint))
+    return True
@@ -0,0 +1,145 @@
+"""
+Per-turn model routing: a fast model for routine steps, a stronger one when
+a turn looks hard or the fast model keeps failing.
+
+Before every model call the Router looks at the turn about to be sent (its
+prompt size, the step the model took last) and at how the task has gone
+so far (failed replies in a row, turns whose tools failed, fix_errors
+calls), and the first rule that matches picks the model. A rule is
+
+    {"name": "...", "model": "fast" | "strong" | "<model name>",
+     "after": ["plan", "action", null, ...], "min_prompt_tokens": 0,
+     "max_prompt_tokens": ..., "min_failures": 0, "min_tool_errors": 0,
+     "min_fix_errors": 0, "hold": 0}
+
+where every condition given must hold ("after" lists the previous step,
+null meaning the first turn of a request) and "hold" keeps the rule's model
+for that many more turns once it stops matching, so an escalation is not
+dropped the moment one reply succeeds. No match means the fast model, so
+by default only failures and prompts that stay over the history budget
+(AGENT_HISTORY_BUDGET) after compaction escalate. A rules file can
+also send known-hard turns up front, e.g. the first reply of each request:
+
+    {"name": "plan", "after": [null], "model": "strong"}
+
+AGENT_MODEL is the fast model and AGENT_STRONG_MODEL (gemini-2.5-pro) the
+strong one; AGENT_ROUTING_RULES names a JSON file of rules replacing the
+defaults below, and AGENT_ROUTING=0 always uses the fast model. Each turn's
+model and rule are written to the trace next to its latency and tokens;
+`python -m mini_cursor.tracing` breaks them down per model.
+"""
+import json
+import os
+
+from .history import BUDGET as HISTORY_BUDGET
+
+
+ENABLED = os.getenv("AGENT_ROUTING", "1") != "0"
+STRONG_MODEL = os.getenv("AGENT_STRONG_MODEL", "gemini-2.5-pro")
+RULES_PATH = os.getenv("AGENT_ROUTING_RULES", "")
+
+DEFAULT_RULES = [
+    # Two bad replies (unparseable, empty, timed out or an unknown tool) in a row
+    {"name": "keeps-failing", "min_failures": 2, "model": "strong", "hold": 3},
+    {"name": "repeated-fix-errors", "min_fix_errors": 2, "model": "strong", "hold": 3},
+    {"name": "failing-tools", "min_tool_errors": 2, "model": "strong", "hold": 2},
+    # History compaction keeps prompts under its budget, so this only fires when even the recent turns are too big
+    {"name": "large-prompt", "min_prompt_tokens": HISTORY_BUDGET + 1, "model": "strong"},
+]
+
+CONDITIONS = {"after", "min_prompt_tokens", "max_prompt_tokens", "min_failures", "min_tool_errors",
+              "min_fix_errors"}
+
+
+def load_rules(path):
+    with open(path, "r", encoding="utf-8") as f:
+        try:
+            rules = json.load(f)
+        except ValueError as e:
+            raise ValueError(f"{path}: not valid JSON ({e})") from e
+    if not isinstance(rules, list):
+        raise ValueError(f"{path}: expected a list of rules")
+    for rule in rules:
+        if not rule.get("name") or not rule.get("model"):
+            raise ValueError(f"{path}: every rule needs a name and a model")
+        unknown = set(rule) - CONDITIONS - {"name", "model", "hold"}
+        if unknown:
+            raise ValueError(f"{path}: rule {rule['name']!r} has unknown keys {sorted(unknown)}")
+    return rules
+
+
+class Router:
+    """Picks the model for each turn of one session."""
+
+    def __init__(self, fast, strong=STRONG_MODEL, rules=None, enabled=ENABLED):
+        self.fast = fast
+        self.strong = strong or fast
+        self.rules = rules if rules is not None else (load_rules(RULES_PATH) if RULES_PATH else DEFAULT_RULES)
+        self.enabled = enabled
+        self.model = fast
+        self._task = None
+        self._previous = None
+        self._reset()
+
+    def _reset(self):
+        self.failures = 0
+        self.tool_errors = 0
+        self.fix_errors = 0
+        self.last_step = None
+        self._held = None
+
+    def _observe(self, record):
+        """Updates the task's counters from the previous turn's trace record."""
+        tools = record.get("tools") or []
+        failed = bool(record.get("parse_error")) or record.get("interrupted") == "timeout" or (
+            # An action that ran nothing named a tool that does not exist
+            record.get("step") == "action" and not tools)
+        self.failures = self.failures + 1 if failed else 0
+        if tools:
+            self.tool_errors = self.tool_errors + 1 if any(t.get("error") for t in tools) else 0
+        self.fix_errors += sum(1 for t in tools if t.get("name") == "fix_errors")
+        if record.get("step"):
+            self.last_step = record["step"]
+
+    def _matches(self, rule, prompt_tokens):
+        return (
+            ("after" not in rule or self.last_step in rule["after"])
+            and prompt_tokens >= rule.get("min_prompt_tokens", 0)
+            and prompt_tokens <= rule.get("max_prompt_tokens", float("inf"))
+            and self.failures >= rule.get("min_failures", 0)
+            and self.tool_errors >= rule.get("min_tool_errors", 0)
+            and self.fix_errors >= rule.get("min_fix_errors", 0)
+        )
+
+    def _resolve(self, name):
+        return {"fast": self.fast, "strong": self.strong}.get(name, name)
+
+    def choose(self, turn):
+        """The model for `turn` (a tracing.Turn about to be sent); the decision is added to its record."""
+        record = turn.record
+        if record["task"] != self._task:
+            self._task, self._previous = record["task"], None
+            self._reset()
+        if self._previous is not None:
+            self._observe(self._previous)
+        self._previous = record
+
+        if not self.enabled:
+            model, route = self.fast, None
+        else:
+            rule = next((r for r in self.rules if self._matches(r, record["est_prompt_tokens"])), None)
+            if rule is not None:
+                model, route = self._resolve(rule["model"]), rule["name"]
+                self._held = (model, route, rule.get("hold", 0)) if rule.get("hold") else None
+            elif self._held is not None:
+                model, route, left = self._held
+                self._held = (model, route, left - 1) if left > 1 else None
+                route += " (held)"
+            else:
+                model, route = self.fast, "routine"
+        if model != self.model:
+            arrow = "⬇️" if model == self.fast else "⬆️"
+            print(f"{arrow} Switching to {model} ({route or 'routing off'})")
+            self.model = model
+        turn.routed(model, route)
+        return model
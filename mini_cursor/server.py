@@ -0,0 +1,427 @@
+"""
+Multi-session server: many independent agent sessions on one event loop.
+
+Each session has its own history, its own sandboxed Workspace under the
+server root (file tools refuse paths outside it, and its shell, background
+processes and read cache are its own) and its own trace turns. Model calls
+from all sessions share one connection pool and are capped at
+AGENT_MAX_MODEL_CALLS in flight; tools run on a pool of AGENT_TOOL_WORKERS
+threads so a slow command only holds up its own session.
+
+    python -m mini_cursor.server --port 8766 [--root .mini_cursor/sessions]
+    mini-cursor --serve 8766
+
+The API is JSON over HTTP/1.1 (keep-alive):
+
+    POST   /sessions                 {"profile"?, "protocol"?} -> {"id", "root"}
+    GET    /sessions                 -> [{"id", "root", "busy", "requests"}]
+    POST   /sessions/{id}/messages   {"content", "stream"?} -> {"result", "output"}
+                                     with "stream": true, NDJSON lines
+                                     {"output": line} ... then {"result": ...}
+    POST   /sessions/{id}/cancel     cancels the running request
+    DELETE /sessions/{id}            cancels it and closes the workspace
+    GET    /health
+
+A session runs one request at a time (409 while busy), and one left idle
+for AGENT_SESSION_TTL_SECS (30 minutes; 0 keeps sessions forever) is
+closed like a DELETE. The sandbox covers file tool paths and where the
+shell starts; it is not OS-level isolation, so a command can still `cd`
+out of the workspace.
+
+Anyone who can reach the port can run shell commands, so the server only
+binds to a non-loopback address with a token (--token or
+AGENT_SERVER_TOKEN); every request except /health must then carry
+`Authorization: Bearer <token>`.
+"""
+import argparse
+import asyncio
+import contextlib
+import contextvars
+import hmac
+import io
+import ipaddress
+import json
+import os
+import sys
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from http import HTTPStatus
+
+from . import tracing
+from .agent import Session
+from .profiles import DEFAULT_PROFILE, PROFILES
+from .workspace import Workspace
+
+
+SERVER_ROOT = os.getenv("AGENT_SERVER_ROOT", os.path.join(".mini_cursor", "sessions"))
+MAX_MODEL_CALLS = int(os.getenv("AGENT_MAX_MODEL_CALLS", "16"))
+TOOL_WORKERS = int(os.getenv("AGENT_TOOL_WORKERS", "32"))
+SESSION_TTL = float(os.getenv("AGENT_SESSION_TTL_SECS", "1800"))
+AUTH_TOKEN = os.getenv("AGENT_SERVER_TOKEN", "")
+MAX_BODY = 1 << 20
+
+# Where print() output of the current session goes (None: the real stdout)
+_sink = contextvars.ContextVar("mini_cursor_output", default=None)
+
+
+class _SessionStdout(io.TextIOBase):
+    """sys.stdout while serving: routes each session's prints to its request."""
+
+    def __init__(self, stream):
+        self.stream = stream
+
+    def write(self, text):
+        sink = _sink.get()
+        if sink is None:
+            return self.stream.write(text)
+        sink.write(text)
+        return len(text)
+
+    def flush(self):
+        self.stream.flush()
+
+    def __getattr__(self, name):
+        return getattr(self.stream, name)
+
+
+class _Output:
+    """Collects a request's output as lines; safe to write from tool threads."""
+
+    def __init__(self, loop):
+        self.loop = loop
+        self.queue = asyncio.Queue()
+        self._partial = ""
+        self._lock = threading.Lock()
+
+    def write(self, text):
+        with self._lock:
+            *lines, self._partial = (self._partial + text).split("\n")
+        for line in lines:
+            self.loop.call_soon_threadsafe(self.queue.put_nowait, {"output": line})
+
+    def end(self, item):
+        # Through the same callback queue as write(), so no line lands after the end
+        with self._lock:
+            partial, self._partial = self._partial, ""
+        for value in ([{"output": partial}] if partial else []) + [item, None]:
+            self.loop.call_soon_threadsafe(self.queue.put_nowait, value)
+
+
+class _Entry:
+    def __init__(self, id, session):
+        self.id = id
+        self.session = session
+        self.task = None
+        self.requests = 0
+        self.last_used = time.monotonic()
+
+    @property
+    def busy(self):
+        return self.task is not None and not self.task.done()
+
+    def idle_for(self):
+        return 0.0 if self.busy else time.monotonic() - self.last_used
+
+    def describe(self):
+        return {"id": self.id, "root": self.session.workspace.root, "busy": self.busy, "requests": self.requests}
+
+
+class AgentServer:
+    """
+    Holds the sessions and answers the HTTP API. `client_factory()` builds
+    each session's model client (default: the shared pooled OpenAI client);
+    sessions idle for `session_ttl` seconds are closed, and with a `token`
+    requests must present it.
+    """
+
+    def __init__(self, root=SERVER_ROOT, profile=None, protocol=None, client_factory=None,
+                 max_model_calls=MAX_MODEL_CALLS, tool_workers=TOOL_WORKERS, session_ttl=SESSION_TTL,
+                 token=AUTH_TOKEN, **session_options):
+        self.root = os.path.abspath(root)
+        self.profile = profile or DEFAULT_PROFILE
+        self.protocol = protocol
+        self.client_factory = client_factory
+        self.session_options = session_options
+        self.max_model_calls = max_model_calls
+        self.tool_workers = tool_workers
+        self.session_ttl = session_ttl
+        self.token = token
+        self.sessions = {}
+        self.limiter = None
+        self._server = None
+        self._reaper = None
+        self._connections = set()
+
+    async def start(self, host="127.0.0.1", port=8766):
+        """Starts listening on the running loop; returns the asyncio server."""
+        if not self.token and not _is_loopback(host):
+            raise ValueError(f"refusing to serve shell access on {host} without a token; "
+                             "pass --token or set AGENT_SERVER_TOKEN")
+        os.makedirs(self.root, exist_ok=True)
+        loop = asyncio.get_running_loop()
+        # asyncio.to_thread (every tool call) runs on this pool
+        loop.set_default_executor(ThreadPoolExecutor(self.tool_workers, thread_name_prefix="tool"))
+        self.limiter = asyncio.Semaphore(self.max_model_calls)
+        if not isinstance(sys.stdout, _SessionStdout):
+            sys.stdout = _SessionStdout(sys.stdout)
+        self._server = await asyncio.start_server(self._connection, host, port)
+        if self.session_ttl > 0:
+            self._reaper = asyncio.create_task(self._reap())
+        return self._server
+
+    async def _reap(self):
+        """Closes sessions that have been idle longer than session_ttl."""
+        while True:
+            await asyncio.sleep(min(60.0, self.session_ttl / 4))
+            for id, entry in list(self.sessions.items()):
+                idle = entry.idle_for()
+                if idle > self.session_ttl and self.sessions.get(id) is entry:
+                    print(f"⌛ Closing session {id} after {idle:.0f}s idle")
+                    await self.delete_session(id)
+
+    async def close(self):
+        if self._reaper is not None:
+            self._reaper.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self._reaper
+        if self._server is not None:
+            self._server.close()
+            # Idle keep-alive connections would otherwise outlive the server
+            for task in self._connections:
+                task.cancel()
+            await asyncio.gather(*self._connections, return_exceptions=True)
+        for id in list(self.sessions):
+            await self.delete_session(id)
+        if isinstance(sys.stdout, _SessionStdout):
+            sys.stdout = sys.stdout.stream
+
+    def create_session(self, profile=None, protocol=None):
+        if profile is not None and profile not in PROFILES:
+            raise ValueError(f"unknown profile {profile!r}; choose one of {', '.join(sorted(PROFILES))}")
+        if protocol not in (None, "json", "tools"):
+            raise ValueError(f"unknown protocol {protocol!r}; choose json or tools")
+        id = uuid.uuid4().hex[:12]
+        root = os.path.join(self.root, id)
+        os.makedirs(root)
+        session = Session(
+            profile=profile or self.profile,
+            client=self.client_factory() if self.client_factory else None,
+            protocol=protocol or self.protocol,
+            workspace=Workspace(root, sandboxed=True),
+            limiter=self.limiter,
+            tracer=tracing.Tracer(tracing.tracer.path),
+            **self.session_options,
+        )
+        entry = self.sessions[id] = _Entry(id, session)
+        return entry
+
+    async def delete_session(self, id):
+        entry = self.sessions.pop(id, None)
+        if entry is None:
+            return
+        await self._cancel(entry)
+        # Stops the shell and background processes, which can take a moment
+        await asyncio.to_thread(entry.session.workspace.close)
+
+    async def _cancel(self, entry):
+        if entry.busy:
+            entry.task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await entry.task
+
+    async def _run(self, entry, content, output):
+        _sink.set(output)
+        try:
+            result = await entry.session.arun(content)
+        except asyncio.CancelledError:
+            output.end({"result": None, "cancelled": True})
+            raise
+        except Exception as e:
+            output.end({"result": None, "error": f"{type(e).__name__}: {e}"})
+            return
+        finally:
+            entry.last_used = time.monotonic()
+        output.end({"result": result})
+
+    async def _connection(self, reader, writer):
+        task = asyncio.current_task()
+        self._connections.add(task)
+        try:
+            while True:
+                request = await _read_request(reader)
+                if request is None:
+                    break
+                method, path, headers, body = request
+                keep_alive = headers.get("connection", "").lower() != "close"
+                try:
+                    payload = json.loads(body) if body else {}
+                except ValueError:
+                    payload = None
+                if not isinstance(payload, dict):
+                    await _respond(writer, 400, {"error": "the body must be a JSON object"})
+                else:
+                    await self._route(writer, method, path.split("?")[0].rstrip("/").split("/")[1:], payload, headers)
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        except asyncio.CancelledError:
+            # close() ends idle connections; nothing is left to answer
+            pass
+        except ValueError as e:
+            with contextlib.suppress(ConnectionError):
+                await _respond(writer, 400, {"error": str(e)})
+        finally:
+            self._connections.discard(task)
+            writer.close()
+            with contextlib.suppress(ConnectionError, asyncio.CancelledError):
+                await writer.wait_closed()
+
+    async def _route(self, writer, method, parts, payload, headers):
+        if parts == ["health"] and method == "GET":
+            busy = sum(entry.busy for entry in self.sessions.values())
+            return await _respond(writer, 200, {"status": "ok", "sessions": len(self.sessions), "busy": busy})
+        if self.token and not hmac.compare_digest(headers.get("authorization", ""), f"Bearer {self.token}"):
+            return await _respond(writer, 401, {"error": "missing or wrong bearer token"})
+        if parts == ["sessions"] and method == "GET":
+            return await _respond(writer, 200, [entry.describe() for entry in self.sessions.values()])
+        if parts == ["sessions"] and method == "POST":
+            try:
+                entry = self.create_session(payload.get("profile"), payload.get("protocol"))
+            except ValueError as e:
+                return await _respond(writer, 400, {"error": str(e)})
+            return await _respond(writer, 201, entry.describe())
+        if len(parts) < 2 or parts[0] != "sessions":
+            return await _respond(writer, 404, {"error": "not found"})
+        entry = self.sessions.get(parts[1])
+        if entry is None:
+            return await _respond(writer, 404, {"error": f"no session {parts[1]}"})
+        entry.last_used = time.monotonic()
+        action = parts[2] if len(parts) > 2 else None
+        if action is None and method == "DELETE":
+            await self.delete_session(entry.id)
+            return await _respond(writer, 200, {"deleted": entry.id})
+        if action is None and method == "GET":
+            return await _respond(writer, 200, entry.describe())
+        if action == "cancel" and method == "POST":
+            was_busy = entry.busy
+            await self._cancel(entry)
+            return await _respond(writer, 200, {"cancelled": was_busy})
+        if action == "messages" and method == "POST":
+            return await self._message(writer, entry, payload)
+        return await _respond(writer, 405, {"error": f"{method} is not supported here"})
+
+    async def _message(self, writer, entry, payload):
+        content = payload.get("content")
+        if not isinstance(content, str) or not content.strip():
+            return await _respond(writer, 400, {"error": "content must be a non-empty string"})
+        if entry.busy:
+            return await _respond(writer, 409, {"error": "the session is already running a request"})
+        output = _Output(asyncio.get_running_loop())
+        entry.requests += 1
+        entry.task = asyncio.create_task(self._run(entry, content, output))
+
+        if not payload.get("stream"):
+            lines = []
+            while (item := await output.queue.get()) is not None:
+                if "output" in item:
+                    lines.append(item["output"])
+                else:
+                    final = item
+            return await _respond(writer, 200, {**final, "output": "\n".join(lines)})
+
+        writer.write(b"HTTP/1.1 200 OK\r\nContent-Type: application/x-ndjson\r\nTransfer-Encoding: chunked\r\n\r\n")
+        while (item := await output.queue.get()) is not None:
+            line = (json.dumps(item, ensure_ascii=False) + "\n").encode("utf-8")
+            writer.write(b"%x\r\n%s\r\n" % (len(line), line))
+            # A client that went away stops reading; the request itself keeps running
+            await writer.drain()
+        writer.write(b"0\r\n\r\n")
+        await writer.drain()
+
+
+def _is_loopback(host):
+    if host == "localhost":
+        return True
+    try:
+        return ipaddress.ip_address(host).is_loopback
+    except ValueError:
+        # A hostname or "" (all interfaces)
+        return False
+
+
+async def _read_request(reader):
+    """Reads one HTTP/1.1 request: (method, path, headers, body), or None at EOF."""
+    line = await reader.readline()
+    if not line.strip():
+        return None
+    try:
+        method, path, _ = line.decode("latin-1").split(" ", 2)
+    except ValueError:
+        raise ValueError("malformed request line")
+    headers = {}
+    while True:
+        line = await reader.readline()
+        if line in (b"\r\n", b"\n", b""):
+            break
+        name, _, value = line.decode("latin-1").partition(":")
+        headers[name.strip().lower()] = value.strip()
+    length = int(headers.get("content-length") or 0)
+    if length > MAX_BODY:
+        raise ValueError(f"the body is larger than {MAX_BODY} bytes")
+    body = await reader.readexactly(length) if length else b""
+    return method.upper(), path, headers, body
+
+
+async def _respond(writer, status, payload):
+    body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+    head = (f"HTTP/1.1 {status} {HTTPStatus(status).phrase}\r\n"
+            f"Content-Type: application/json\r\nContent-Length: {len(body)}\r\n\r\n")
+    writer.write(head.encode("latin-1") + body)
+    await writer.drain()
+
+
+def serve(host="127.0.0.1", port=8766, **options):
+    """Runs the server until Ctrl-C."""
+    server = AgentServer(**options)
+
+    async def main():
+        try:
+            listener = await server.start(host, port)
+        except ValueError as e:
+            print(f"❌ {e}")
+            return
+        print(f"🛰️ Serving agent sessions on http://{host}:{port} (workspaces in {server.root})")
+        try:
+            async with listener:
+                await listener.serve_forever()
+        finally:
+            await server.close()
+
+    with contextlib.suppress(KeyboardInterrupt):
+        asyncio.run(main())
+
+
+def main(argv=None):
+    from dotenv import load_dotenv
+
+    load_dotenv()
+    parser = argparse.ArgumentParser(prog="mini-cursor-server", description="Serve many agent sessions over HTTP.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8766)
+    parser.add_argument("--root", default=SERVER_ROOT, help="directory for session workspaces (default AGENT_SERVER_ROOT)")
+    parser.add_argument("--profile", default=DEFAULT_PROFILE, choices=sorted(PROFILES))
+    parser.add_argument("--protocol", choices=["json", "tools"], default=None)
+    parser.add_argument("--token", default=AUTH_TOKEN,
+                        help="bearer token clients must send; required off loopback (default AGENT_SERVER_TOKEN)")
+    parser.add_argument("--session-ttl", type=float, default=SESSION_TTL, metavar="SECS",
+                        help="close sessions idle this long, 0 for never (default AGENT_SESSION_TTL_SECS)")
+    args = parser.parse_args(argv)
+    serve(args.host, args.port, root=args.root, profile=args.profile, protocol=args.protocol,
+          token=args.token, session_ttl=args.session_ttl)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,215 @@
+"""
+The persistent session shell behind run_command.
+
+Each workspace gets one long-lived bash process (ShellWorker), so commands
+skip the shell start-up, and `cd` and `export` carry over from one call to
+the next. Output is spooled as it arrives. A timeout kills the process
+group and starts a new shell in the last directory, and an interrupt
+stops only the running command. Where bash is unavailable, commands fall
+back to a one-off shell each.
+"""
+import os
+import select
+import shutil
+import signal
+import subprocess
+import threading
+import time
+import uuid
+
+from . import workspace
+from .spool import new_spool, run_spooled, summarize_spool
+
+
+DEFAULT_TIMEOUT = float(os.getenv("AGENT_COMMAND_TIMEOUT", "300"))
+
+
+class ShellWorker:
+    """
+    A long-lived bash process that runs commands one after another.
+
+    Each command runs under eval in a shell function (so `cd` and `export`
+    stick, and an interrupt can abort the rest of it), fed stdin from
+    /dev/null, and followed by a sentinel line that carries the exit code
+    and the current directory. Output is copied to a spool file as it
+    arrives. On timeout the whole process group is killed
+    and a fresh shell is started in the last known directory. Commands from
+    different threads (e.g. a cancelled task's tool still running in its
+    worker thread) take turns, so their output and sentinels never mix.
+    """
+
+    def __init__(self, cwd=None, shell=None):
+        self.shell = shell or shutil.which("bash") or "/bin/sh"
+        self.root = self.cwd = os.path.abspath(cwd or os.getcwd())
+        self.proc = None
+        self._lock = threading.Lock()
+        self._start()
+
+    def _start(self):
+        self._token = uuid.uuid4().hex
+        self.proc = subprocess.Popen(
+            [self.shell],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.STDOUT,
+            cwd=self.cwd,
+            start_new_session=True,
+            bufsize=0,
+        )
+        # interrupt() aborts the command function below; the shell itself survives
+        self.proc.stdin.write(b"trap 'return 130 2>/dev/null' INT\n")
+
+    def alive(self):
+        return self.proc is not None and self.proc.poll() is None
+
+    def run(self, command, timeout=None, out=None):
+        """
+        Runs one command, writing its output to the binary file `out`.
+        Returns the exit code, or None if the command timed out.
+        """
+        with self._lock:
+            return self._run(command, timeout, out)
+
+    def _run(self, command, timeout, out):
+        if not self.alive():
+            self._start()
+        marker = f"__MC_{self._token}__".encode()
+        # The command arrives through a quoted heredoc and runs under eval, so
+        # an unbalanced quote or brace is bash's own syntax error rather than
+        # something that swallows the sentinel and hangs until the timeout.
+        delimiter = f"__MC_CMD_{self._token}__"
+        script = (
+            "__mc_run() {\nlocal __mc_cmd\n"
+            f"IFS= read -r -d '' __mc_cmd <<'{delimiter}'\n{command}\n{delimiter}\n"
+            'eval "$__mc_cmd"\n} </dev/null 2>&1\n__mc_run\n'
+            f"printf '\\n%s %d %s\\n' '{marker.decode()}' \"$?\" \"$PWD\"\n"
+        )
+        try:
+            self.proc.stdin.write(script.encode())
+            self.proc.stdin.flush()
+        except BrokenPipeError:
+            self._start()
+            return self._run(command, timeout, out)
+
+        fd = self.proc.stdout.fileno()
+        deadline = None if timeout is None else time.monotonic() + timeout
+        pending = b""
+        needle = b"\n" + marker
+        while True:
+            wait = None if deadline is None else max(0.0, deadline - time.monotonic())
+            ready, _, _ = select.select([fd], [], [], wait)
+            if not ready:
+                if out is not None:
+                    out.write(pending)
+                self.kill()
+                return None
+            chunk = os.read(fd, 65536)
+            if not chunk:
+                # The command ended the shell itself (e.g. `exit`).
+                if out is not None:
+                    out.write(pending)
+                code = self.proc.wait()
+                self.proc = None
+                return code
+            pending += chunk
+            index = pending.find(needle)
+            if index == -1:
+                # Keep a tail that could hold the start of a split sentinel.
+                keep = len(needle) - 1
+                if out is not None and len(pending) > keep:
+                    out.write(pending[:-keep])
+                pending = pending[-keep:] if len(pending) > keep else pending
+                continue
+            if out is not None:
+                out.write(pending[:index])
+            trailer = pending[index + len(needle):]
+            while b"\n" not in trailer:
+                more = os.read(fd, 4096)
+                if not more:
+                    break
+                trailer += more
+            status, _, cwd = trailer.split(b"\n", 1)[0].decode(errors="replace").strip().partition(" ")
+            if cwd:
+                self.cwd = cwd
+            return int(status) if status.isdigit() else 1
+
+    def interrupt(self):
+        """
+        Sends SIGINT to the shell's process group, as Ctrl-C would in a
+        terminal: the running command stops and `run` returns its exit code,
+        while the shell keeps its directory and variables.
+        """
+        proc = self.proc
+        if proc is None or proc.poll() is not None:
+            return
+        try:
+            os.killpg(proc.pid, signal.SIGINT)
+        except (ProcessLookupError, PermissionError):
+            pass
+
+    def kill(self):
+        if self.proc is None:
+            return
+        try:
+            os.killpg(self.proc.pid, signal.SIGKILL)
+        except (ProcessLookupError, PermissionError):
+            pass
+        self.proc.wait()
+        self.proc = None
+
+    def close(self):
+        if self.alive():
+            try:
+                self.proc.stdin.write(b"exit\n")
+                self.proc.stdin.flush()
+                self.proc.wait(timeout=2)
+            except (BrokenPipeError, subprocess.TimeoutExpired):
+                pass
+        self.kill()
+
+
+def get_worker():
+    """Returns the workspace's shell worker, starting it in the workspace root on first use."""
+    return workspace.current().state("shell", lambda ws: ShellWorker(cwd=ws.root))
+
+
+def current_dir():
+    """The session shell's working directory (the workspace root before it starts)."""
+    active = workspace.current()
+    worker = active.peek("shell")
+    return worker.cwd if worker is not None else active.root
+
+
+def interrupt_worker():
+    """Interrupts the command running in the session shell, if any."""
+    worker = workspace.current().peek("shell")
+    if worker is not None:
+        worker.interrupt()
+
+
+def run_in_worker(command, timeout=None):
+    """
+    Runs `command` in the persistent shell and returns the spooled summary.
+    Falls back to a one-off shell where bash is unavailable (e.g. Windows).
+    """
+    return run_with_code(command, timeout)[1]
+
+
+def run_with_code(command, timeout=None):
+    """Like run_in_worker, but returns (exit code, summary); the code is None after a timeout or when unknown."""
+    if os.name != "posix":
+        return None, run_spooled(command, cwd=workspace.current().root)
+    worker = get_worker()
+    spool_id, path = new_spool()
+    with open(path, "wb") as out:
+        code = worker.run(command, timeout=timeout or DEFAULT_TIMEOUT, out=out)
+    if code is None:
+        summary = summarize_spool(spool_id, path, returncode=-1)
+        return None, (
+            f"{summary}\n⏱️ Timed out after {timeout or DEFAULT_TIMEOUT:.0f}s. "
+            f"The shell was restarted in {worker.cwd}; exported variables were lost."
+        )
+    summary = summarize_spool(spool_id, path, code)
+    if worker.cwd != worker.root:
+        summary += f"\n📂 cwd: {os.path.relpath(worker.cwd, worker.root)}"
+    return code, summary
@@ -0,0 +1,140 @@
+"""
+Bounded command output.
+
+Commands write stdout and stderr to a spool file in a per-workspace temp
+directory instead of into memory. The model is shown a summary: the whole
+output when it is short, otherwise the first AGENT_OUTPUT_HEAD and last
+AGENT_OUTPUT_TAIL lines, with line and byte counts and an output id.
+`read_output` pages through the rest by line range. Spool directories are
+removed when their workspace closes or the process exits.
+"""
+import atexit
+import itertools
+import os
+import shutil
+import subprocess
+import tempfile
+import threading
+from collections import deque
+
+from . import workspace
+
+
+HEAD_LINES = int(os.getenv("AGENT_OUTPUT_HEAD", "20"))
+TAIL_LINES = int(os.getenv("AGENT_OUTPUT_TAIL", "40"))
+MAX_LINE_CHARS = 500
+MAX_RANGE_LINES = 200
+
+_root = None
+_root_lock = threading.Lock()
+
+
+class Spool:
+    """A workspace's directory of command output, removed when it is closed or the process exits."""
+
+    def __init__(self):
+        global _root
+        with _root_lock:
+            if _root is None:
+                _root = tempfile.mkdtemp(prefix="mini_cursor_spool_")
+                atexit.register(shutil.rmtree, _root, True)
+        self.path = tempfile.mkdtemp(dir=_root)
+        self.ids = itertools.count(1)
+
+    def close(self):
+        shutil.rmtree(self.path, True)
+
+
+def _spool():
+    return workspace.current().state("spool", lambda ws: Spool())
+
+
+def spool_dir():
+    """The active workspace's directory for command output."""
+    return _spool().path
+
+
+def new_spool():
+    """Reserves a spool id and returns (id, path)."""
+    spool = _spool()
+    spool_id = f"cmd-{next(spool.ids)}"
+    return spool_id, os.path.join(spool.path, f"{spool_id}.log")
+
+
+def _clip(line):
+    line = line.rstrip("\r\n")
+    if len(line) > MAX_LINE_CHARS:
+        return line[:MAX_LINE_CHARS] + f" [... {len(line) - MAX_LINE_CHARS} chars]"
+    return line
+
+
+def _format_size(size):
+    for unit in ("B", "KB", "MB"):
+        if size < 1024 or unit == "MB":
+            return f"{size:.0f} {unit}" if unit == "B" else f"{size:.1f} {unit}"
+        size /= 1024
+
+
+def summarize_spool(spool_id, path, returncode=0):
+    """
+    Builds the observation for a spooled output: the whole thing when it is
+    short, otherwise a head/tail window with byte and line counts and the id
+    to pass to `read_output` for the rest.
+    """
+    size = os.path.getsize(path)
+    head = []
+    tail = deque(maxlen=TAIL_LINES)
+    lines = 0
+    with open(path, "r", encoding="utf-8", errors="replace") as f:
+        for line in f:
+            lines += 1
+            if len(head) < HEAD_LINES:
+                head.append(_clip(line))
+            else:
+                tail.append(_clip(line))
+
+    status = "✅ Command executed" if returncode == 0 else f"❌ Command exited with code {returncode}"
+    if lines <= HEAD_LINES + TAIL_LINES:
+        return f"{status}:\n" + "\n".join(head + list(tail))
+
+    omitted = lines - len(head) - len(tail)
+    return (
+        f"{status} ({lines} lines, {_format_size(size)}, output id: {spool_id}):\n"
+        + "\n".join(head)
+        + f"\n[... {omitted} lines omitted — use read_output with id {spool_id} to see them ...]\n"
+        + "\n".join(tail)
+    )
+
+
+def run_spooled(command, cwd=None):
+    """Runs `command` in a shell with stdout and stderr streamed to a spool file."""
+    spool_id, path = new_spool()
+    with open(path, "wb") as out:
+        proc = subprocess.Popen(command, shell=True, cwd=cwd, stdout=out, stderr=subprocess.STDOUT)
+        returncode = proc.wait()
+    return summarize_spool(spool_id, path, returncode)
+
+
+def output_path(id):
+    """Where the spooled output `id` (e.g. cmd-3) is kept."""
+    return os.path.join(spool_dir(), f"{os.path.basename(id)}.log")
+
+
+def read_output(id, start_line=1, end_line=None):
+    """Returns lines start_line..end_line (1-based, inclusive) of a spooled output."""
+    path = output_path(id)
+    if not os.path.exists(path):
+        return f"❌ No output with id {id}"
+    start_line = max(1, int(start_line))
+    end_line = int(end_line) if end_line else start_line + MAX_RANGE_LINES - 1
+    end_line = min(end_line, start_line + MAX_RANGE_LINES - 1)
+
+    selected = []
+    total = 0
+    with open(path, "r", encoding="utf-8", errors="replace") as f:
+        for total, line in enumerate(f, 1):
+            if start_line <= total <= end_line:
+                selected.append(f"{total}: {_clip(line)}")
+    if not selected:
+        return f"❌ {id} has {total} lines; nothing in range {start_line}-{end_line}"
+    return f"{id} lines {start_line}-{min(end_line, total)} of {total}:\n" + "\n".join(selected)
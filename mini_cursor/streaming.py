@@ -0,0 +1,271 @@
+"""
+Streamed model replies for the JSON protocol.
+
+stream_step() requests one step with `stream=True` and feeds the chunks to
+an IncrementalJSONParser, which follows the reply object's top-level keys.
+The step is dispatched the moment the object closes, instead of after the
+last chunk, and `plan`/`observe` text is echoed to the terminal as it
+arrives. The rest of the stream is drained in the background (up to
+DRAIN_SECS), so its connection can go back to the pool.
+"""
+import asyncio
+import time
+
+from .client import close, create, iterate
+
+
+# Steps whose `content` is narrative text meant for the user. Their text is
+# echoed to the terminal while it is still streaming in.
+ECHO_STEPS = ("plan", "observe")
+
+_ESCAPES = {
+    '"': '"',
+    '\\': '\\',
+    '/': '/',
+    'b': '\b',
+    'f': '\f',
+    'n': '\n',
+    'r': '\r',
+    't': '\t',
+}
+
+
+class IncrementalJSONParser:
+    """
+    Tracks a single JSON object as it arrives in arbitrary chunks.
+
+    Only the top-level keys are followed: the `step` value is recorded once
+    its string closes, and the decoded text of `content` is handed to
+    `on_text` as it streams. `done` flips to True the moment the outer
+    object closes, so the caller can stop reading and dispatch right away.
+    Anything before the first `{` (code fences, whitespace) is ignored.
+    """
+
+    def __init__(self, on_text=None):
+        self.on_text = on_text
+        self.step = None
+        self.done = False
+        self._chunks = []
+        self._stack = []
+        self._started = False
+        self._in_string = False
+        self._escape = False
+        self._unicode = None
+        self._high_surrogate = None
+        self._is_key = False
+        self._expect_key = False
+        self._key = None
+        self._string = []
+        self._pending_text = []
+
+    @property
+    def text(self):
+        """The JSON text seen so far, starting at the opening brace."""
+        return "".join(self._chunks)
+
+    def feed(self, chunk):
+        for ch in chunk:
+            if self.done:
+                break
+            if not self._started:
+                if ch != "{":
+                    continue
+                self._started = True
+            self._chunks.append(ch)
+            if self._in_string:
+                self._feed_string(ch)
+            else:
+                self._feed_structure(ch)
+        return self.done
+
+    def _feed_structure(self, ch):
+        if ch == '"':
+            self._in_string = True
+            self._is_key = self._at_top() and self._expect_key
+            self._string = []
+        elif ch in "{[":
+            self._stack.append(ch)
+            self._expect_key = ch == "{"
+        elif ch in "}]":
+            self._stack.pop()
+            if not self._stack:
+                self.done = True
+                self._flush_text()
+            self._expect_key = False
+        elif ch == ":":
+            self._expect_key = False
+        elif ch == ",":
+            self._expect_key = bool(self._stack) and self._stack[-1] == "{"
+            if self._at_top():
+                self._key = None
+
+    def _feed_string(self, ch):
+        if self._unicode is not None:
+            self._unicode += ch
+            if len(self._unicode) == 4:
+                try:
+                    code = int(self._unicode, 16)
+                except ValueError:
+                    code = 0xFFFD
+                self._unicode = None
+                self._emit_codepoint(code)
+            return
+        if self._escape:
+            self._escape = False
+            if ch == "u":
+                self._unicode = ""
+            else:
+                self._emit(_ESCAPES.get(ch, ch))
+            return
+        if ch == "\\":
+            self._escape = True
+        elif ch == '"':
+            self._close_string()
+        else:
+            self._emit(ch)
+
+    def _emit_codepoint(self, code):
+        if 0xD800 <= code <= 0xDBFF:
+            self._high_surrogate = code
+            return
+        if 0xDC00 <= code <= 0xDFFF and self._high_surrogate is not None:
+            code = 0x10000 + ((self._high_surrogate - 0xD800) << 10) + (code - 0xDC00)
+        self._high_surrogate = None
+        self._emit(chr(code))
+
+    def _emit(self, text):
+        self._string.append(text)
+        if self._at_top() and not self._is_key and self._key == "content":
+            self._pending_text.append(text)
+            self._flush_text()
+
+    def _close_string(self):
+        self._in_string = False
+        value = "".join(self._string)
+        if not self._at_top():
+            return
+        if self._is_key:
+            self._key = value
+        elif self._key == "step":
+            self.step = value
+            self._flush_text()
+
+    def _flush_text(self):
+        # `content` may stream before `step`; hold it until we know the step.
+        if self.on_text is None or self.step is None:
+            return
+        if self._pending_text and self.step in ECHO_STEPS:
+            self.on_text("".join(self._pending_text))
+        self._pending_text = []
+
+    def _at_top(self):
+        return len(self._stack) == 1
+
+
+# Seconds to keep reading a stream after its JSON object closed
+DRAIN_SECS = 5
+
+_draining = set()
+
+
+async def _drain(stream, chunks):
+    """
+    Reads what is left of a stream (finish reason, usage, [DONE]) and closes
+    it. A response read to the end lets its connection go back to the pool;
+    closing it early would drop the connection.
+    """
+    async def read_rest():
+        async for _ in chunks:
+            pass
+
+    try:
+        await asyncio.wait_for(read_rest(), DRAIN_SECS)
+    except Exception:
+        pass
+    finally:
+        await close(stream)
+
+
+async def finish_drains():
+    """Waits for the running loop's background drains (e.g. before it stops)."""
+    loop = asyncio.get_running_loop()
+    pending = [task for task in _draining if task.get_loop() is loop]
+    if pending:
+        await asyncio.gather(*pending, return_exceptions=True)
+
+
+class StreamedTurn:
+    """Result of one streamed model call."""
+
+    def __init__(self, content, echoed, ttft, dispatch, usage=None):
+        self.content = content
+        self.echoed = echoed
+        self.ttft = ttft
+        self.dispatch = dispatch
+        # Only set when the server sent usage before the object closed.
+        self.usage = usage
+
+    def timing(self):
+        ttft = f"{self.ttft:.2f}s" if self.ttft is not None else "n/a"
+        return f"⏱️  first token {ttft} · dispatch {self.dispatch:.2f}s"
+
+
+async def stream_step(client, messages, model, **kwargs):
+    """
+    Requests one step with `stream=True` and returns a StreamedTurn as soon
+    as the JSON object is complete; the rest of the stream is drained in the
+    background. `plan`/`observe` text is printed as it arrives; `echoed`
+    tells the caller not to print it a second time.
+    """
+    started = time.perf_counter()
+    ttft = None
+    echoed = False
+
+    def on_text(text):
+        nonlocal echoed
+        if not echoed:
+            print("🧠: ", end="")
+            echoed = True
+        print(text, end="", flush=True)
+
+    parser = IncrementalJSONParser(on_text)
+    raw = []
+    usage = None
+    stream = await create(
+        client,
+        messages=messages,
+        response_format={"type": "json_object"},
+        stream=True,
+        model=model,
+        **kwargs,
+    )
+    chunks = iterate(stream)
+    try:
+        async for chunk in chunks:
+            if getattr(chunk, "usage", None) is not None:
+                usage = chunk.usage
+            if not chunk.choices:
+                continue
+            delta = chunk.choices[0].delta.content
+            if not delta:
+                continue
+            if ttft is None:
+                ttft = time.perf_counter() - started
+            raw.append(delta)
+            if parser.feed(delta):
+                break
+    finally:
+        if parser.done and hasattr(stream, "__aiter__"):
+            # Dispatch now; the rest of the response is read in the background
+            task = asyncio.ensure_future(_drain(stream, chunks))
+            _draining.add(task)
+            task.add_done_callback(_draining.discard)
+        else:
+            await close(stream)
+
+    if echoed:
+        print()
+    dispatch = time.perf_counter() - started
+    content = parser.text if parser.done else "".join(raw) or None
+    return StreamedTurn(content, echoed, ttft, dispatch, usage)
+
@@ -0,0 +1,195 @@
+"""
+Background processes (dev servers, watchers) that must not block the agent.
+
+start_process launches a command in its own process group and returns at
+once. A reader thread keeps the last AGENT_PROCESS_LOG_LINES lines of its
+output in a ring buffer. tail_process and wait_for_process read that
+buffer; the latter waits until a line matches a pattern such as
+"ready on". stop_process signals the whole group, and every process is
+stopped when its workspace closes.
+"""
+import itertools
+import os
+import re
+import signal
+import subprocess
+import threading
+import time
+from collections import deque
+
+from . import workspace
+from .shell_worker import current_dir
+
+
+LOG_LINES = int(os.getenv("AGENT_PROCESS_LOG_LINES", "2000"))
+MAX_LINE_CHARS = 500
+
+
+class ManagedProcess:
+    """A background process plus a bounded ring buffer of its output."""
+
+    def __init__(self, name, command, cwd):
+        self.name = name
+        self.command = command
+        self.cwd = cwd
+        self.started = time.time()
+        self.log = deque(maxlen=LOG_LINES)
+        self.lines = 0
+        self.changed = threading.Condition()
+        popen_kwargs = {"start_new_session": True} if os.name == "posix" else {}
+        self.proc = subprocess.Popen(
+            command,
+            shell=True,
+            cwd=cwd,
+            stdin=subprocess.DEVNULL,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.STDOUT,
+            **popen_kwargs,
+        )
+        self.reader = threading.Thread(target=self._read, name=f"log-{name}", daemon=True)
+        self.reader.start()
+
+    def _read(self):
+        for raw in iter(self.proc.stdout.readline, b""):
+            line = raw.decode("utf-8", errors="replace").rstrip("\r\n")
+            if len(line) > MAX_LINE_CHARS:
+                line = line[:MAX_LINE_CHARS] + " [...]"
+            with self.changed:
+                self.lines += 1
+                self.log.append((self.lines, line))
+                self.changed.notify_all()
+        self.proc.stdout.close()
+        self.proc.wait()
+        with self.changed:
+            self.changed.notify_all()
+
+    def running(self):
+        return self.proc.poll() is None
+
+    def status(self):
+        if self.running():
+            return f"running (pid {self.proc.pid}, up {time.time() - self.started:.0f}s)"
+        return f"exited with code {self.proc.returncode}"
+
+    def tail(self, count):
+        if count <= 0:
+            # [-0:] would be the whole log
+            return []
+        with self.changed:
+            return [line for _, line in list(self.log)[-count:]]
+
+    def wait_for(self, pattern, timeout):
+        """Blocks until a log line matches `pattern`; returns the line or None."""
+        regex = re.compile(pattern, re.IGNORECASE)
+        deadline = time.monotonic() + timeout
+        seen = 0
+        with self.changed:
+            while True:
+                for number, line in self.log:
+                    if number > seen:
+                        seen = number
+                        if regex.search(line):
+                            return line
+                remaining = deadline - time.monotonic()
+                if remaining <= 0 or (not self.running() and not self.reader.is_alive()):
+                    return None
+                self.changed.wait(remaining)
+
+    def stop(self, grace=5):
+        if self.running():
+            self._signal(signal.SIGTERM)
+            try:
+                self.proc.wait(timeout=grace)
+            except subprocess.TimeoutExpired:
+                self._signal(signal.SIGKILL if os.name == "posix" else signal.SIGTERM)
+                self.proc.wait()
+        self.reader.join(timeout=1)
+
+    def _signal(self, sig):
+        try:
+            if os.name == "posix":
+                # Dev servers spawn children (npm -> node -> esbuild); stop the whole group.
+                os.killpg(self.proc.pid, sig)
+            else:
+                self.proc.send_signal(sig)
+        except (ProcessLookupError, PermissionError):
+            pass
+
+
+class ProcessSupervisor:
+    """Starts, tracks and stops the session's background processes."""
+
+    def __init__(self):
+        self.processes = {}
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+
+    def start(self, command, name=None, cwd=None):
+        with self._lock:
+            name = name or f"proc-{next(self._ids)}"
+            existing = self.processes.get(name)
+            if existing and existing.running():
+                raise ValueError(f"A process named {name} is already running: {existing.command}")
+            self.processes[name] = ManagedProcess(name, command, cwd or os.getcwd())
+        return name
+
+    def get(self, name):
+        return self.processes.get(name)
+
+    def stop_all(self):
+        for process in list(self.processes.values()):
+            process.stop(grace=2)
+
+    close = stop_all
+
+
+def get_supervisor():
+    """The active workspace's process supervisor (stopped when the workspace closes)."""
+    return workspace.current().state("processes", lambda ws: ProcessSupervisor())
+
+
+def start_process(command, name=None, cwd=None):
+    """Starts `command` in the background and returns right away."""
+    try:
+        cwd = workspace.current().resolve(cwd) if cwd else current_dir()
+        name = get_supervisor().start(command, name=name, cwd=cwd)
+    except ValueError as e:
+        return f"❌ {e}"
+    return f"🚀 Started {name} in the background: {command}"
+
+
+def list_processes(*args, **kwargs):
+    supervisor = get_supervisor()
+    if not supervisor.processes:
+        return "No background processes."
+    return "\n".join(
+        f"- {p.name}: {p.status()} — {p.command}" for p in supervisor.processes.values()
+    )
+
+
+def tail_process(name, lines=40):
+    process = get_supervisor().get(name)
+    if process is None:
+        return f"❌ No process named {name}"
+    recent = process.tail(int(lines))
+    output = "\n".join(recent)
+    return f"{name} {process.status()}, last {len(recent)} of {process.lines} lines:\n{output}"
+
+
+def wait_for_process(name, pattern, timeout=30):
+    process = get_supervisor().get(name)
+    if process is None:
+        return f"❌ No process named {name}"
+    line = process.wait_for(pattern, float(timeout))
+    if line is not None:
+        return f"✅ {name} is ready: {line}"
+    recent = "\n".join(process.tail(15))
+    return f"❌ {name} did not print /{pattern}/ within {timeout}s ({process.status()}). Recent output:\n{recent}"
+
+
+def stop_process(name):
+    process = get_supervisor().get(name)
+    if process is None:
+        return f"❌ No process named {name}"
+    process.stop()
+    return f"🛑 Stopped {name} ({process.status()})"
@@ -0,0 +1,236 @@
+"""
+The tools the agent can call, shared by every profile. `available_tools`
+maps each tool name to its function, a description and its inputs; the JSON
+protocol lists them in the system prompt and the native protocol sends them
+as `tools=` schemas.
+"""
+import os
+import time
+
+from . import command_cache, workspace
+from .checkpoints import checkpoint, diff, restore
+from .command_cache import describe_hit, get_command_cache
+from .edits import edit_file
+from .file_tools import atomic_write, get_read_cache, read_file
+from .project_index import list_tree, search_code
+from .shell_worker import current_dir, run_in_worker, run_with_code
+from .error_rules import diagnose, diagnose_text
+from .spool import output_path, read_output
+from .supervisor import list_processes, start_process, stop_process, tail_process, wait_for_process
+
+
+def _flag(value):
+    """A boolean tool input; models sometimes send "false" or "0" as strings."""
+    if isinstance(value, str):
+        return value.strip().lower() in ("true", "1", "yes")
+    return bool(value)
+
+
+def get_system_info(*args, **kwargs):
+    try:
+        # For posix systems like Linux and MacOS, os.uname() is available.
+        system_info = os.uname().sysname if hasattr(os, 'uname') else os.name
+        if system_info == "posix":
+            if os.path.exists("/System/Library"):
+                return "MacOS"
+            else:
+                return "Linux"
+        elif system_info == "nt":
+            return "Windows"
+        else:
+            return "Unknown"
+    except Exception as e:
+        return str(e)
+
+def run_command(command, timeout=None, fresh=False):
+    try:
+        # Repeated installs and read-only commands are answered from the cache while their inputs are unchanged
+        if not command_cache.ENABLED:
+            # Runs in the persistent session shell; output is spooled to disk
+            return run_in_worker(command, timeout=timeout)
+        cache = get_command_cache()
+        if _flag(fresh):
+            entry, found = None, command_cache.classify(command, current_dir())
+        else:
+            entry, found = cache.lookup(command, current_dir())
+        if entry is not None:
+            if found[2]:
+                # A skipped `cd app && npm install` still leaves the shell in app/
+                run_in_worker(found[2], timeout=timeout)
+            return describe_hit(entry)
+        started = time.perf_counter()
+        code, summary = run_with_code(command, timeout=timeout)
+        cache.store(command, found, code, summary, time.perf_counter() - started)
+        return summary
+    except Exception as e:
+        return f"❌ Error: {str(e)}"
+    
+def write_file(path, content):
+    print(f"📝 Writing to {path}")
+    
+    # Relative to the session's workspace, which a sandboxed session cannot leave
+    target = workspace.current().resolve(path)
+    # ✅ Creates missing directories; temp file + rename so a crash never leaves a truncated file
+    atomic_write(target, content)
+    # The model already has this content; an unchanged re-read returns a reference
+    get_read_cache().remember(target, "write")
+    
+    return f"{path} created and code written successfully."
+
+
+
+def fix_errors(error_log: str = "", path: str = None) -> str:
+    """
+    Matches an error log against the configurable rules in error_rules.json
+    and returns deduplicated, ranked suggestions. `path` scans a log file or
+    a run_command output id (cmd-3) as a stream instead, so even a huge
+    build log never has to pass through the model or fit in memory.
+    """
+    if not path:
+        return diagnose_text(error_log or "")
+    spooled = output_path(path)
+    target = spooled if os.path.exists(spooled) else workspace.current().resolve(path)
+    try:
+        with open(target, "r", encoding="utf-8", errors="replace") as f:
+            return diagnose(f)
+    except OSError as e:
+        return f"❌ Error: cannot read {path} ({e.strerror})"
+
+available_tools = {
+    "run_command": {
+        "fn": run_command,
+        "description": "Executes one or more shell commands in the persistent session shell and returns the output.",
+        "input": {
+            "command": "The shell command(s) to run. cd and exported variables persist between calls.",
+            "timeout": "Optional timeout in seconds (default 300).",
+            "fresh": "Optional, true to run it even when a cached result (repeated install or read-only command) applies."
+        }
+    },
+    "read_file": {
+        "fn": read_file,
+        "description": "Reads and returns the content of a specified file, or a line/byte range of it.",
+        "input": {
+            "file_path": "The path to the file to read.",
+            "start_line": "Optional first line to return (1-based).",
+            "end_line": "Optional last line to return (inclusive).",
+            "offset": "Optional byte offset for a byte-range read.",
+            "length": "Optional number of bytes for a byte-range read.",
+            "force": "Return the content even if it is unchanged since you last saw it."
+        }
+    },
+    "write_file": {
+        "fn": write_file,
+        "description": "Writes or overwrites content into a specified file path.",
+        "input": {
+            "path": "The path to the file that will be written or overwritten.",
+            "content": "The text content to be written into the file."
+        }
+    }, 
+    "edit_file": {
+        "fn": edit_file,
+        "description": "Changes part of an existing file with search/replace blocks or a unified diff; written atomically.",
+        "input": {
+            "path": "The path to the file to edit.",
+            "edits": "A list of {\"search\": old text, \"replace\": new text} pairs, or SEARCH/REPLACE blocks as one string.",
+            "diff": "Alternatively, a unified diff for this file."
+        }
+    },
+    "search_code": {
+        "fn": search_code,
+        "description": "Searches the indexed workspace for text, a regex or symbol definitions without shelling out to grep.",
+        "input": {
+            "query": "The text, regex or symbol name to look for.",
+            "regex": "Optional, true to treat query as a regular expression.",
+            "symbols": "Optional, true to search function/class/variable definitions instead of text.",
+            "path": "Optional folder to limit the search to.",
+            "page": "Optional result page (50 hits per page)."
+        }
+    },
+    "list_tree": {
+        "fn": list_tree,
+        "description": "Lists the files of the workspace (or a folder), honouring .gitignore.",
+        "input": {
+            "path": "Optional folder to list (default: workspace root).",
+            "depth": "Optional number of levels to expand before folders are summarized (default 2).",
+            "page": "Optional result page."
+        }
+    },
+    "read_output": {
+        "fn": read_output,
+        "description": "Returns a line range from the full output of an earlier command.",
+        "input": {
+            "id": "The output id reported by run_command (e.g. cmd-3).",
+            "start_line": "First line to return (1-based).",
+            "end_line": "Last line to return (at most 200 lines per call)."
+        }
+    },
+    "start_process": {
+        "fn": start_process,
+        "description": "Starts a long-running command (dev server, watcher) in the background and returns immediately.",
+        "input": {
+            "command": "The command to start, run from the shell's current directory.",
+            "name": "A short name used to refer to the process later."
+        }
+    },
+    "wait_for_process": {
+        "fn": wait_for_process,
+        "description": "Waits until a background process prints a line matching a regex (e.g. 'listening on').",
+        "input": {
+            "name": "The process name.",
+            "pattern": "Regex to wait for (case-insensitive).",
+            "timeout": "Seconds to wait (default 30)."
+        }
+    },
+    "tail_process": {
+        "fn": tail_process,
+        "description": "Returns the latest log lines of a background process.",
+        "input": {
+            "name": "The process name.",
+            "lines": "How many lines to return (default 40)."
+        }
+    },
+    "list_processes": {
+        "fn": list_processes,
+        "description": "Lists background processes and whether they are still running."
+    },
+    "stop_process": {
+        "fn": stop_process,
+        "description": "Stops a background process and its children."
+    },
+    "fix_errors": {
+        "fn": fix_errors,
+        "description": "Analyzes error logs or stack traces and suggests possible fixes.",
+        "input": {
+            "error_log": "The error output or stack trace to analyze.",
+            "path": "Alternatively, a log file or run_command output id (e.g. cmd-3) to scan in full."
+        }
+    },
+    "checkpoint": {
+        "fn": checkpoint,
+        "description": "Saves a checkpoint of the workspace files that restore can return to.",
+        "input": {
+            "label": "A short note on what the checkpoint is for."
+        }
+    },
+    "restore": {
+        "fn": restore,
+        "description": "Restores the workspace files to a checkpoint; the current state is checkpointed first.",
+        "input": {
+            "id": "The checkpoint id (e.g. cp-3)."
+        }
+    },
+    "diff": {
+        "fn": diff,
+        "description": "Shows which files changed since a checkpoint, with unified diffs.",
+        "input": {
+            "id": "The checkpoint id to compare from (e.g. cp-3).",
+            "to": "Another checkpoint id to compare with (default: the current files).",
+            "path": "Limit the diff to one file or folder."
+        }
+    },
+    "get_system_info": {
+        "fn": get_system_info,
+        "description": "Returns the operating system type (Windows, MacOS, Linux, or Unknown)."
+    }
+}
+
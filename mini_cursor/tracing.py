@@ -0,0 +1,309 @@
+"""
+Per-turn trace log for the agent loop.
+
+Every model call is one turn, and each turn is written as one JSON line to
+AGENT_TRACE (default .mini_cursor/trace.jsonl; "off" disables it). A line
+holds the request/response timestamps, latency, token usage (or an estimate
+when a stream was closed before usage arrived), the prompt size, the model
+the router picked and why, the step the model chose, the tools it ran with
+their wall times and output sizes, and any parse failure.
+
+Summarize a trace with
+
+    python -m mini_cursor.tracing [trace.jsonl ...]
+"""
+import argparse
+import atexit
+import json
+import os
+import threading
+import time
+import uuid
+from collections import defaultdict
+
+from .history import estimate_tokens
+
+
+TRACE_PATH = os.getenv("AGENT_TRACE", os.path.join(".mini_cursor", "trace.jsonl"))
+
+# Server sessions each have a Tracer but share the file
+_write_lock = threading.Lock()
+
+
+def _usage(response):
+    usage = getattr(response, "usage", None)
+    if usage is None:
+        return None
+    if not isinstance(usage, dict):
+        usage = {k: getattr(usage, k, None) for k in ("prompt_tokens", "completion_tokens", "total_tokens")}
+    return {k: usage.get(k) for k in ("prompt_tokens", "completion_tokens", "total_tokens")}
+
+
+class Turn:
+    """Collects the measurements of one model call and what it dispatched."""
+
+    def __init__(self, task, number, messages, protocol="json", tools=None):
+        prompt = json.dumps(messages, ensure_ascii=False)
+        # Tool schemas are part of the prompt in the native function-calling protocol.
+        schemas = json.dumps(tools, ensure_ascii=False) if tools else ""
+        self._started = time.perf_counter()
+        self.record = {
+            "task": task,
+            "turn": number,
+            "protocol": protocol,
+            "model": None,
+            "route": None,
+            "ts_request": time.time(),
+            "ts_response": None,
+            "latency_s": None,
+            "ttft_s": None,
+            "streamed": False,
+            "messages": len(messages),
+            "prompt_bytes": len(prompt.encode("utf-8")) + len(schemas.encode("utf-8")),
+            "usage": None,
+            "est_prompt_tokens": sum(estimate_tokens(m.get("content") or "") for m in messages)
+            + (estimate_tokens(schemas) if schemas else 0),
+            "est_completion_tokens": None,
+            "response_bytes": None,
+            "step": None,
+            "tools": [],
+            "parse_error": None,
+            "repaired": False,
+            "interrupted": None,
+        }
+
+    def response(self, content, response=None, ttft=None, streamed=False):
+        self.record["ts_response"] = time.time()
+        self.record["latency_s"] = round(time.perf_counter() - self._started, 4)
+        self.record["ttft_s"] = round(ttft, 4) if ttft is not None else None
+        self.record["streamed"] = streamed
+        self.record["usage"] = _usage(response)
+        if content is not None:
+            self.record["response_bytes"] = len(content.encode("utf-8"))
+            self.record["est_completion_tokens"] = estimate_tokens(content)
+
+    def routed(self, model, route):
+        """The model this turn is sent to and the routing rule that picked it."""
+        self.record["model"] = model
+        self.record["route"] = route
+
+    def step(self, name):
+        self.record["step"] = name
+
+    def parse_error(self, error):
+        self.record["parse_error"] = str(error)[:500]
+
+    def repaired(self):
+        self.record["repaired"] = True
+
+    def interrupted(self, reason):
+        """Marks a turn that never completed: "timeout" or "cancelled"."""
+        self.record["interrupted"] = reason
+
+    def tool(self, name, seconds, output):
+        self.record["tools"].append({
+            "name": name,
+            "wall_s": round(seconds, 4),
+            "ts_end": time.time(),
+            "output_bytes": len(str(output).encode("utf-8")),
+            "error": str(output).startswith("❌"),
+        })
+
+
+class Tracer:
+    """
+    Writes Turn records to a JSONL file. A turn is flushed when the next one
+    begins or the task ends, so `continue` paths in the loop need no cleanup.
+    """
+
+    def __init__(self, path=TRACE_PATH):
+        self.path = None if path in ("", "0", "off") else path
+        self.task = None
+        self.turns = 0
+        self.current = None
+
+    def start_task(self):
+        self.finish()
+        self.task = uuid.uuid4().hex[:12]
+        self.turns = 0
+
+    def begin(self, messages, protocol="json", tools=None):
+        self.finish()
+        if self.task is None:
+            self.start_task()
+        self.turns += 1
+        self.current = Turn(self.task, self.turns, messages, protocol, tools)
+        return self.current
+
+    def discard(self):
+        """Drops the open turn without writing it (e.g. a request that was never answered)."""
+        self.current = None
+
+    def finish(self):
+        turn, self.current = self.current, None
+        if turn is None or self.path is None:
+            return
+        line = json.dumps(turn.record, ensure_ascii=False) + "\n"
+        with _write_lock:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(line)
+
+
+tracer = Tracer()
+atexit.register(tracer.finish)
+
+
+def percentile(values, pct):
+    """Nearest-rank percentile; None for an empty list."""
+    values = sorted(v for v in values if v is not None)
+    if not values:
+        return None
+    rank = max(1, -(-len(values) * pct // 100))
+    return values[int(rank) - 1]
+
+
+def load(paths):
+    records = []
+    for path in paths:
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    try:
+                        records.append(json.loads(line))
+                    except ValueError:
+                        continue
+    return records
+
+
+def tool_wall(records):
+    """
+    Seconds spent running tools across `records`. Calls that ran in parallel
+    inside a batch overlap, so their intervals are merged instead of summed.
+    """
+    intervals = []
+    total = 0.0
+    for record in records:
+        for call in record.get("tools") or []:
+            if call.get("ts_end") is None:
+                total += call["wall_s"]
+            else:
+                intervals.append((call["ts_end"] - call["wall_s"], call["ts_end"]))
+    end = None
+    for start, stop in sorted(intervals):
+        if end is None or start > end:
+            total += stop - start
+            end = stop
+        elif stop > end:
+            total += stop - end
+            end = stop
+    return total
+
+
+def _tokens(record):
+    usage = record.get("usage") or {}
+    prompt = usage.get("prompt_tokens")
+    completion = usage.get("completion_tokens")
+    estimated = prompt is None or completion is None
+    if prompt is None:
+        prompt = record.get("est_prompt_tokens") or 0
+    if completion is None:
+        completion = record.get("est_completion_tokens") or 0
+    return prompt + completion, estimated
+
+
+def summarize(records):
+    """Returns the p50/p95 report for a list of trace records as text."""
+    if not records:
+        return "No trace records."
+
+    def row(label, values, unit="", scale=1):
+        p50, p95 = percentile(values, 50), percentile(values, 95)
+        if p50 is None:
+            return f"  {label:<28} n/a"
+        return f"  {label:<28} p50 {p50 * scale:10.2f}{unit}   p95 {p95 * scale:10.2f}{unit}   n={len([v for v in values if v is not None])}"
+
+    tasks = defaultdict(list)
+    for record in records:
+        tasks[record.get("task")].append(record)
+    task_tokens, any_estimated = [], False
+    for turns in tasks.values():
+        total = 0
+        for record in turns:
+            tokens, estimated = _tokens(record)
+            total += tokens
+            any_estimated = any_estimated or estimated
+        task_tokens.append(total)
+
+    tool_times = defaultdict(list)
+    for record in records:
+        for call in record.get("tools") or []:
+            tool_times[call["name"]].append(call["wall_s"])
+    parse_errors = sum(1 for r in records if r.get("parse_error"))
+    repaired = sum(1 for r in records if r.get("repaired"))
+    tool_errors = sum(1 for r in records for c in r.get("tools") or [] if c.get("error"))
+
+    lines = [f"📊 {len(records)} turns in {len(tasks)} tasks"]
+    lines.append("Model:")
+    lines.append(row("latency", [r.get("latency_s") for r in records], "s"))
+    lines.append(row("first token", [r.get("ttft_s") for r in records], "s"))
+    lines.append(row("prompt size", [r.get("prompt_bytes") for r in records], " KB", 1 / 1024))
+    lines.append(row("messages per request", [r.get("messages") for r in records]))
+    lines.append("Per task:")
+    lines.append(row("tokens" + (" (some estimated)" if any_estimated else ""), task_tokens))
+    lines.append(row("turns", [len(t) for t in tasks.values()]))
+    lines.append(row("model time", [sum(r.get("latency_s") or 0 for r in t) for t in tasks.values()], "s"))
+    lines.append(row("tool time", [tool_wall(t) for t in tasks.values()], "s"))
+    if tool_times:
+        lines.append("Tools:")
+        for name, times in sorted(tool_times.items(), key=lambda item: -sum(item[1])):
+            lines.append(row(name, times, "s"))
+    protocols = defaultdict(list)
+    for record in records:
+        protocols[record.get("protocol") or "json"].append(record)
+    if len(protocols) > 1:
+        lines.append("Protocols:")
+        for name, turns in sorted(protocols.items()):
+            failed = sum(1 for r in turns if r.get("parse_error"))
+            prompt_tokens = percentile([_tokens(r)[0] for r in turns], 50)
+            lines.append(
+                f"  {name:<28} {len(turns)} turns, prompt+reply tokens p50 {prompt_tokens}, "
+                f"parse failures {failed} ({failed / len(turns):.1%})"
+            )
+    models = defaultdict(list)
+    for record in records:
+        if record.get("model"):
+            models[record["model"]].append(record)
+    if models:
+        lines.append("Models:")
+        for name, turns in sorted(models.items(), key=lambda item: -len(item[1])):
+            failed = sum(1 for r in turns if r.get("parse_error"))
+            lines.append(
+                f"  {name:<28} {len(turns)} turns, latency p50 {percentile([r.get('latency_s') for r in turns], 50)}s, "
+                f"total {sum(r.get('latency_s') or 0 for r in turns):.1f}s and {sum(_tokens(r)[0] for r in turns)} tokens, "
+                f"parse failures {failed}"
+            )
+        routes = defaultdict(int)
+        for record in records:
+            if record.get("route"):
+                routes[(record["route"], record.get("model"))] += 1
+        lines.append("  routes: " + ", ".join(f"{route} → {model} {count}x" for (route, model), count in
+                                              sorted(routes.items(), key=lambda item: -item[1])))
+    lines.append(f"Parse failures: {parse_errors}   repaired locally (model calls saved): {repaired}   tool errors: {tool_errors}")
+    interrupted = [r.get("interrupted") for r in records if r.get("interrupted")]
+    if interrupted:
+        lines.append(f"Timed out: {interrupted.count('timeout')}   cancelled: {interrupted.count('cancelled')}")
+    return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Summarize agent trace logs (p50/p95 latencies and tokens per task).")
+    parser.add_argument("traces", nargs="*", default=[TRACE_PATH], help="JSONL trace files written by the agent")
+    args = parser.parse_args()
+    print(summarize(load(args.traces)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""
+Per-session workspaces. A Workspace is the directory a session's tools work
+in plus the state they keep for it: the shell, background processes, the
+read cache and spooled command output. The active workspace is a context
+variable, so every session's asyncio task (and the tool threads it starts)
+sees its own. Outside a session, tools use a process-wide default rooted at
+the current directory, which is what the CLI does.
+"""
+import atexit
+import contextlib
+import contextvars
+import os
+import threading
+
+
+class Workspace:
+    def __init__(self, root, sandboxed=False):
+        self.root = os.path.realpath(root)
+        # A sandboxed workspace refuses file tool paths outside its root
+        self.sandboxed = sandboxed
+        self._state = {}
+        self._lock = threading.Lock()
+
+    def resolve(self, path):
+        """The absolute path for a tool's path argument, relative to the root."""
+        full = os.path.normpath(os.path.join(self.root, path))
+        if self.sandboxed:
+            real = os.path.realpath(full)
+            if real != self.root and not real.startswith(self.root + os.sep):
+                raise PermissionError(f"{path} is outside the workspace")
+        return full
+
+    def state(self, name, factory):
+        """Per-workspace tool state, created with factory(workspace) on first use."""
+        with self._lock:
+            value = self._state.get(name)
+            if value is None:
+                value = self._state[name] = factory(self)
+        return value
+
+    def peek(self, name):
+        """Tool state if it was created already, else None."""
+        return self._state.get(name)
+
+    def close(self):
+        """Closes every piece of state that has a close() (shell, processes, spool)."""
+        with self._lock:
+            values, self._state = list(self._state.values()), {}
+        for value in values:
+            close = getattr(value, "close", None)
+            if close is not None:
+                close()
+
+
+_current = contextvars.ContextVar("mini_cursor_workspace", default=None)
+_default = None
+_default_lock = threading.Lock()
+
+
+def current():
+    """The active workspace, or the process-wide default rooted at the cwd."""
+    global _default
+    workspace = _current.get()
+    if workspace is not None:
+        return workspace
+    with _default_lock:
+        if _default is None:
+            _default = Workspace(os.getcwd())
+            atexit.register(_default.close)
+    return _default
+
+
+@contextlib.contextmanager
+def activate(workspace):
+    """Makes `workspace` the active one for the current context (task or thread)."""
+    token = _current.set(workspace)
+    try:
+        yield workspace
+    finally:
+        _current.reset(token)
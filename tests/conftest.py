@@ -0,0 +1,13 @@
+import pytest
+
+from mini_cursor import workspace
+
+
+@pytest.fixture
+def ws(tmp_path, monkeypatch):
+    """A fresh workspace in a temp directory, active (and the cwd) for the test."""
+    monkeypatch.chdir(tmp_path)
+    active = workspace.Workspace(str(tmp_path))
+    with workspace.activate(active):
+        yield active
+    active.close()
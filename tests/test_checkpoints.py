@@ -0,0 +1,67 @@
+from mini_cursor import checkpoints
+
+
+def make_files(root):
+    (root / "a.txt").write_text("original\n")
+    (root / "node_modules" / "pkg").mkdir(parents=True)
+    (root / "node_modules" / "pkg" / "index.js").write_text("module.exports = 1;\n")
+
+
+def test_diff_lists_changes_since_a_checkpoint(ws, tmp_path):
+    make_files(tmp_path)
+    record, created = checkpoints.get_store().create("first")
+    assert created and record["id"] == "cp-1"
+    (tmp_path / "a.txt").write_text("changed\n")
+    (tmp_path / "b.txt").write_text("new\n")
+    report = checkpoints.diff("cp-1")
+    assert report.startswith("🔍 cp-1 (first) → workspace: 1 modified, 1 added, 0 deleted")
+    assert "\nM a.txt\n" in report and "\nA b.txt\n" in report
+    assert "-original" in report and "+changed" in report
+
+
+def test_unchanged_tree_is_not_checkpointed_again(ws, tmp_path):
+    make_files(tmp_path)
+    store = checkpoints.get_store()
+    store.create("first")
+    _, created = store.create("again", auto=True)
+    assert not created
+
+
+def test_restore_puts_files_back_and_skips_node_modules(ws, tmp_path):
+    make_files(tmp_path)
+    checkpoints.get_store().create("first")
+    (tmp_path / "a.txt").write_text("changed\n")
+    (tmp_path / "b.txt").write_text("new\n")
+    (tmp_path / "node_modules" / "pkg" / "index.js").write_text("module.exports = 2;\n")
+
+    report = checkpoints.restore("cp-1")
+    assert report.startswith("⏪ Restored cp-1 (first): 1 files written, 1 removed.")
+    assert (tmp_path / "a.txt").read_text() == "original\n"
+    assert not (tmp_path / "b.txt").exists()
+    assert (tmp_path / "node_modules" / "pkg" / "index.js").read_text() == "module.exports = 2;\n"
+
+    # The state before the restore was saved, so the restore can be undone
+    before = report.rsplit(" ", 1)[1].rstrip(".")
+    checkpoints.restore(before)
+    assert (tmp_path / "a.txt").read_text() == "changed\n"
+    assert (tmp_path / "b.txt").read_text() == "new\n"
+
+
+def test_diff_limited_to_a_path(ws, tmp_path):
+    make_files(tmp_path)
+    checkpoints.get_store().create("first")
+    (tmp_path / "b.txt").write_text("new\n")
+    assert checkpoints.diff("cp-1", path="a.txt") == "🔍 No differences between cp-1 and workspace under a.txt"
+
+
+def test_unknown_checkpoint(ws):
+    assert checkpoints.restore("cp-9").startswith("❌")
+
+
+def test_auto_checkpoint_is_opt_in(ws, tmp_path, monkeypatch):
+    make_files(tmp_path)
+    monkeypatch.setattr(checkpoints, "ENABLED", False)
+    assert checkpoints.auto_checkpoint("after write_file", ["write_file"]) is None
+    monkeypatch.setattr(checkpoints, "ENABLED", True)
+    assert checkpoints.auto_checkpoint("after read_file", ["read_file"]) is None
+    assert checkpoints.auto_checkpoint("after write_file", ["write_file"]) == "cp-1"
@@ -0,0 +1,64 @@
+import os
+
+import pytest
+
+from mini_cursor import command_cache
+from mini_cursor.command_cache import CommandCache, classify
+from mini_cursor.tools import run_command
+
+
+@pytest.mark.parametrize("command, kind", [
+    ("npm install", "install"),
+    ("pip install -r requirements.txt", "install"),
+    ("ls -la", "read-only"),
+    ("cat a.txt | grep x", "read-only"),
+    ("node -v", "read-only"),
+])
+def test_cacheable(command, kind, tmp_path):
+    assert classify(command, str(tmp_path))[0] == kind
+
+
+@pytest.mark.parametrize("command", ["rm -rf build", "echo hi > f", "git status", "cd app; npm install",
+                                     "ls && rm x"])
+def test_not_cacheable(command, tmp_path):
+    assert classify(command, str(tmp_path)) is None
+
+
+def test_install_after_cd_runs_in_that_directory(tmp_path):
+    kind, directory, prefix = classify("cd app && npm install", str(tmp_path))
+    assert (kind, directory, prefix) == ("install", os.path.join(str(tmp_path), "app"), "cd app")
+
+
+def test_read_only_entry_is_invalidated_by_a_change(tmp_path):
+    (tmp_path / "a.txt").write_text("one\n")
+    cache = CommandCache()
+    entry, found = cache.lookup("cat a.txt", str(tmp_path))
+    assert entry is None
+    cache.store("cat a.txt", found, 0, "one", 0.1)
+    assert cache.lookup("cat a.txt", str(tmp_path))[0] is not None
+    (tmp_path / "a.txt").write_text("two, and longer\n")
+    assert cache.lookup("cat a.txt", str(tmp_path))[0] is None
+
+
+def test_other_commands_drop_read_only_entries(tmp_path):
+    cache = CommandCache()
+    _, found = cache.lookup("ls", str(tmp_path))
+    cache.store("ls", found, 0, "", 0.1)
+    cache.store("touch x", None, 0, "", 0.1)
+    assert cache.lookup("ls", str(tmp_path))[0] is None
+
+
+def test_failed_runs_are_not_cached(tmp_path):
+    cache = CommandCache()
+    _, found = cache.lookup("ls missing", str(tmp_path))
+    cache.store("ls missing", found, 2, "No such file", 0.1)
+    assert cache.lookup("ls missing", str(tmp_path))[0] is None
+
+
+@pytest.mark.skipif(os.name != "posix", reason="uses the persistent bash worker")
+@pytest.mark.parametrize("fresh, cached", [(False, True), ("false", True), ("False", True), ("true", False),
+                                           (True, False)])
+def test_run_command_fresh_flag(ws, monkeypatch, fresh, cached):
+    monkeypatch.setattr(command_cache, "ENABLED", True)
+    run_command("ls")
+    assert run_command("ls", fresh=fresh).startswith("♻️") is cached
@@ -0,0 +1,66 @@
+import pytest
+
+from mini_cursor.edits import EditError, apply_edit, edit_file, parse_blocks, parse_unified_diff
+
+
+SOURCE = "def greet(name):\n    print('hi', name)\n\n\ndef bye():\n    print('bye')\n"
+
+
+def test_exact_match():
+    assert apply_edit(SOURCE, "print('bye')", "print('see you')") == SOURCE.replace("'bye'", "'see you'")
+
+
+def test_whitespace_insensitive_match_keeps_file_indentation():
+    # The model indented with two spaces where the file uses four
+    text = apply_edit(SOURCE, "def bye():\n  print('bye')\n", "def bye():\n  print('bye')\n  return 1\n")
+    assert text.endswith("def bye():\n    print('bye')\n    return 1\n")
+
+
+def test_fuzzy_match():
+    text = apply_edit(SOURCE, "def greet(name):\n    print('hi',  name )\n", "def greet(name):\n    print('hello', name)\n")
+    assert "print('hello', name)" in text
+    assert "'hi'" not in text
+
+
+def test_ambiguous_match_needs_context_or_hint():
+    text = "x = 1\ny = 2\nx = 1\n"
+    with pytest.raises(EditError, match="matches 2 places"):
+        apply_edit(text, "x = 1", "x = 3")
+    assert apply_edit(text, "x = 1", "x = 3", hint=3) == "x = 1\ny = 2\nx = 3\n"
+
+
+def test_miss_reports_closest_lines():
+    with pytest.raises(EditError, match="closest match is lines"):
+        apply_edit(SOURCE, "class Greeter:\n    pass\n", "")
+
+
+def test_empty_search_is_rejected():
+    with pytest.raises(EditError, match="empty search"):
+        apply_edit(SOURCE, "  \n", "x")
+
+
+def test_parse_blocks():
+    edits = parse_blocks("<<<<<<< SEARCH\na = 1\n=======\na = 2\n>>>>>>> REPLACE\n")
+    assert edits == [{"search": "a = 1\n", "replace": "a = 2\n"}]
+    with pytest.raises(EditError):
+        parse_blocks("no blocks here")
+
+
+def test_parse_unified_diff_applies():
+    diff = "--- a/f.py\n+++ b/f.py\n@@ -5,2 +5,2 @@\n def bye():\n-    print('bye')\n+    print('ciao')\n"
+    text = SOURCE
+    for change in parse_unified_diff(diff):
+        text = apply_edit(text, change["search"], change["replace"], change.get("line"))
+    assert "print('ciao')" in text
+
+
+def test_edit_file_is_all_or_nothing(ws):
+    ws_path = ws.resolve("app.py")
+    with open(ws_path, "w") as f:
+        f.write(SOURCE)
+    result = edit_file("app.py", [{"search": "print('bye')", "replace": "print('x')"},
+                                  {"search": "does not exist at all", "replace": ""}])
+    assert result.startswith("❌ edit 2 of 2")
+    with open(ws_path) as f:
+        assert f.read() == SOURCE
+    assert edit_file("app.py", [{"search": "print('bye')", "replace": "print('x')"}]).startswith("✏️")
@@ -0,0 +1,21 @@
+from mini_cursor.error_rules import diagnose_text
+
+
+LOG = """\
+Error: listen EADDRINUSE: address already in use :::3000
+Traceback (most recent call last):
+ModuleNotFoundError: No module named 'flask'
+ModuleNotFoundError: No module named 'flask'
+"""
+
+
+def test_distinct_issues_are_ranked_and_counted():
+    report = diagnose_text(LOG)
+    assert report.startswith("🩺 2 distinct issue(s) in 4 log lines")
+    first, second = report.splitlines()[1:3]
+    assert first.startswith("1. Port 3000 is already in use") and "[port-in-use;" in first
+    assert second.startswith("2. Python module 'flask' is missing") and "[python-missing-module, 2x;" in second
+
+
+def test_no_match():
+    assert diagnose_text("everything is fine\n") == "No specific error fix found. Please review the error log manually."
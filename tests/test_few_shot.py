@@ -0,0 +1,31 @@
+import os
+
+import pytest
+
+from mini_cursor.few_shot import EXAMPLES_DIR, ExampleLibrary
+
+
+@pytest.fixture(scope="module")
+def library():
+    return ExampleLibrary(os.path.join(EXAMPLES_DIR, "chat"))
+
+
+@pytest.mark.parametrize("query, name", [
+    ("build a FastAPI CRUD api for books", "fastapi-crud-api"),
+    ("Create a ToDo app", "todo-html-css-js"),
+])
+def test_relevant_example_is_chosen(library, query, name):
+    assert [e.name for e in library.search(query)][:1] == [name]
+
+
+def test_unrelated_request_gets_no_examples(library):
+    query = "Write a Python script that renames all .jpeg files in a folder to .jpg"
+    assert library.search(query) == []
+    content, chosen, saved = library.inject(query)
+    assert (content, chosen, saved) == (query, [], library.total_tokens())
+
+
+def test_injected_examples_follow_the_request(library):
+    content, chosen, saved = library.inject("Create a ToDo app")
+    assert content.startswith("Create a ToDo app\n\nExamples of similar tasks")
+    assert chosen and 0 < saved < library.total_tokens()
@@ -0,0 +1,45 @@
+from types import SimpleNamespace
+
+import pytest
+
+from mini_cursor.function_calling import PARAM_TYPES, _rejects_tools
+from mini_cursor.tools import _flag
+
+
+def error(message="", param=None, code=None):
+    return SimpleNamespace(message=message, param=param, code=code)
+
+
+@pytest.mark.parametrize("rejected", [
+    error(param="tools"),
+    error(param="tools[0].function.parameters"),
+    error(param="tool_choice"),
+    error(code="tools_not_supported"),
+    error(code="invalid_tool_choice"),
+    error("This model does not support tools."),
+])
+def test_tool_parameter_rejections(rejected):
+    assert _rejects_tools(rejected)
+
+
+@pytest.mark.parametrize("other", [
+    error(param="messages[3].tool_call_id"),
+    error(param="messages[2].tool_calls"),
+    error(code="context_length_exceeded"),
+    error("messages with role 'tool' must be a response to a preceding message with 'tool_calls'"),
+    error("Invalid 'tool_call_id': call_1"),
+])
+def test_other_bad_requests(other):
+    assert not _rejects_tools(other)
+
+
+def test_fresh_is_a_boolean_parameter():
+    assert PARAM_TYPES["fresh"] == {"type": "boolean"}
+
+
+@pytest.mark.parametrize("value, expected", [
+    (True, True), (False, False), (None, False), ("true", True), ("True", True), ("1", True), ("yes", True),
+    ("false", False), ("False", False), ("0", False), ("", False),
+])
+def test_flag(value, expected):
+    assert _flag(value) is expected
@@ -0,0 +1,62 @@
+import json
+
+from mini_cursor.history import ConversationHistory
+
+
+def observe(text):
+    return {"role": "assistant", "content": json.dumps({"step": "observe", "content": text})}
+
+
+def test_small_history_is_sent_verbatim():
+    history = ConversationHistory("system", budget=1000)
+    history.append({"role": "user", "content": "hello"})
+    messages = history.for_request()
+    assert [m["content"] for m in messages] == ["system", "hello"]
+    assert history.verbatim_turns is None
+
+
+def test_stays_under_budget_and_keeps_the_system_prompt():
+    history = ConversationHistory("system", budget=2000, keep_recent=4, observation_chars=400)
+    for i in range(60):
+        history.append({"role": "user", "content": f"request {i}"})
+        history.append(observe(f"output {i}\n" + "x" * 3000))
+        history.for_request()
+        assert history.tokens() <= 2000
+    messages = history.messages
+    assert messages[0] == {"role": "system", "content": "system"}
+    assert messages[1]["content"].startswith(ConversationHistory.SUMMARY_PREFIX)
+    assert "request 59" in messages[-2]["content"]
+
+
+def test_old_observations_are_shortened_before_summarizing():
+    history = ConversationHistory("system", budget=800, keep_recent=2, observation_chars=400)
+    history.append({"role": "user", "content": "first"})
+    history.append(observe("y" * 4000))
+    history.append({"role": "user", "content": "second"})
+    history.append(observe("short"))
+    history.for_request()
+    assert not history.messages[1]["content"].startswith(ConversationHistory.SUMMARY_PREFIX)
+    assert len(json.loads(history.messages[2]["content"])["content"]) < 400
+
+
+def test_tool_results_stay_with_the_call_that_requested_them():
+    history = ConversationHistory("system", budget=600, keep_recent=2, observation_chars=200)
+    history.append({"role": "user", "content": "u" * 2000})
+    call = {"id": "c1", "type": "function", "function": {"name": "read_file", "arguments": '{"path": "a"}'}}
+    history.append({"role": "assistant", "content": None, "tool_calls": [call]})
+    history.append({"role": "tool", "tool_call_id": "c1", "content": "a" * 300})
+    history.append({"role": "tool", "tool_call_id": "c1", "content": "b" * 300})
+    history.for_request()
+    roles = [m["role"] for m in history.messages]
+    first_tool = roles.index("tool")
+    assert history.messages[first_tool - 1].get("tool_calls")
+
+
+def test_verbatim_turns_counts_untouched_requests():
+    history = ConversationHistory("system", budget=3000, keep_recent=6, observation_chars=400)
+    for i in range(20):
+        history.append({"role": "user", "content": f"request {i}"})
+        history.append(observe("z" * 2000))
+        history.for_request()
+    assert history.verbatim_turns is not None
+    assert 0 <= history.verbatim_turns <= 3
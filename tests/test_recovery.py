@@ -0,0 +1,45 @@
+import pytest
+
+from mini_cursor.recovery import RetryBudget, parse_reply, repair_json
+
+
+def test_strict_reply_is_not_repaired():
+    assert parse_reply('{"step": "plan", "content": "x"}') == ({"step": "plan", "content": "x"}, False)
+
+
+@pytest.mark.parametrize("reply", [
+    '```json\n{"step": "plan", "content": "x"}\n```',
+    'Sure, here it is: {"step": "plan", "content": "x"}',
+    '{"step": "plan", "content": "x"}{"step": "output", "content": "y"}',
+    '{"step": "plan", "content": "x",}',
+    '{"step": "plan", "content": "x", "list": [1, 2,],}',
+])
+def test_repairs(reply):
+    step, repaired = parse_reply(reply)
+    assert repaired
+    assert step["step"] == "plan" and step["content"] == "x"
+
+
+def test_trailing_comma_inside_a_string_is_kept():
+    assert repair_json('{"step": "plan", "content": "a,}",}')["content"] == "a,}"
+
+
+@pytest.mark.parametrize("reply, message", [
+    ("", "empty reply"),
+    (None, "empty reply"),
+    ("I will create the files now.", "no JSON object"),
+    ('{"step": "plan", "content": "unterminated', "invalid JSON"),
+    ('{"content": "no step"}', '"step"'),
+])
+def test_unrepairable(reply, message):
+    with pytest.raises(ValueError, match=message):
+        parse_reply(reply)
+
+
+def test_retry_budget_bounds_failures_in_a_row():
+    budget = RetryBudget(max_retries=2, base_delay=1, max_delay=1.5)
+    delays = [budget.failed(), budget.failed()]
+    assert all(0 <= d <= 1.5 for d in delays)
+    assert budget.failed() is None
+    budget.succeeded()
+    assert budget.failed() is not None
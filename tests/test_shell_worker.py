@@ -0,0 +1,51 @@
+import io
+import os
+import shutil
+import time
+
+import pytest
+
+from mini_cursor.shell_worker import ShellWorker
+
+pytestmark = pytest.mark.skipif(os.name != "posix" or shutil.which("bash") is None, reason="needs bash")
+
+
+@pytest.fixture
+def worker(tmp_path):
+    shell = ShellWorker(cwd=str(tmp_path))
+    yield shell
+    shell.close()
+
+
+def run(worker, command, timeout=10):
+    out = io.BytesIO()
+    code = worker.run(command, timeout=timeout, out=out)
+    return code, out.getvalue().decode()
+
+
+def test_state_carries_over(worker, tmp_path):
+    (tmp_path / "sub").mkdir()
+    assert run(worker, "cd sub && export GREETING=hi")[0] == 0
+    code, output = run(worker, 'echo "$GREETING from $(basename "$PWD")"')
+    assert (code, output.strip()) == (0, "hi from sub")
+    assert worker.cwd == str(tmp_path / "sub")
+
+
+def test_unbalanced_quote_fails_fast_and_keeps_the_shell(worker):
+    run(worker, "export KEPT=yes")
+    started = time.monotonic()
+    code, output = run(worker, "echo 'don't do it'", timeout=5)
+    assert time.monotonic() - started < 2
+    assert code == 2
+    assert "unexpected EOF" in output
+    assert run(worker, "echo $KEPT")[1].strip() == "yes"
+
+
+def test_exit_restarts_the_shell(worker):
+    assert run(worker, "exit 3")[0] == 3
+    assert run(worker, "echo still here") == (0, "still here\n")
+
+
+def test_timeout_returns_none(worker):
+    assert run(worker, "sleep 5", timeout=0.5)[0] is None
+    assert run(worker, "echo back")[0] == 0
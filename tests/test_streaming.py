@@ -0,0 +1,44 @@
+import json
+
+import pytest
+
+from mini_cursor.streaming import IncrementalJSONParser
+
+
+def feed(reply, size):
+    echoed = []
+    parser = IncrementalJSONParser(echoed.append)
+    for i in range(0, len(reply), size):
+        parser.feed(reply[i:i + size])
+    return parser, "".join(echoed)
+
+
+@pytest.mark.parametrize("size", [1, 2, 7, 10_000])
+def test_plan_text_is_decoded_as_it_streams(size):
+    content = 'Café 😀 "quoted" \\ back\nnext line\t/'
+    reply = "```json\n" + json.dumps({"step": "plan", "content": content}) + "\n```"
+    parser, echoed = feed(reply, size)
+    assert parser.done and parser.step == "plan"
+    assert echoed == content
+    assert json.loads(parser.text)["content"] == content
+
+
+@pytest.mark.parametrize("size", [1, 5, 10_000])
+def test_surrogate_pair_split_across_chunks(size):
+    parser, echoed = feed('{"step": "observe", "content": "\\ud83d\\ude00!"}', size)
+    assert echoed == "😀!"
+
+
+def test_done_at_the_outer_brace_ignores_what_follows():
+    reply = '{"step": "action", "function": "write_file", "input": {"path": "a", "content": "{x}"}} {"step": "x"}'
+    parser, echoed = feed(reply, 3)
+    assert parser.done and parser.step == "action"
+    # Only top-level narrative text is echoed, never a nested "content"
+    assert echoed == ""
+    assert json.loads(parser.text)["input"]["content"] == "{x}"
+
+
+def test_incomplete_object_is_not_done():
+    parser, _ = feed('{"step": "plan", "content": "still typ', 4)
+    assert not parser.done
+    assert parser.step == "plan"